@@ -68,7 +68,39 @@ def create_app():
 
 def _register_client_side_callbacks(app):
     """Register client-side callbacks for browser-based processing."""
-    from dash import Input, Output, State
+    from dash import ClientsideFunction, Input, Output, State
+
+    # Recolor, filter and toggle prompts on the current plot (assets/plot.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace="plot", function_name="restyle"),
+        [
+            Output("embedding-plot", "figure", allow_duplicate=True),
+            Output("plot-restyle-request", "data"),
+            Output("category-filter", "options"),
+            Output("category-filter", "value"),
+            Output("color-dropdown", "options"),
+        ],
+        [
+            Input("color-dropdown", "value"),
+            Input("show-prompts-toggle", "value"),
+            Input("category-filter", "value"),
+            Input("plot-styles", "data"),
+        ],
+        State("embedding-plot", "figure"),
+        prevent_initial_call=True,
+    )
+
+    # Legend clicks hide and show color labels through the category filter
+    app.clientside_callback(
+        ClientsideFunction(namespace="plot", function_name="legendToggle"),
+        Output("category-filter", "value", allow_duplicate=True),
+        Input("embedding-plot", "restyleData"),
+        [
+            State("category-filter", "value"),
+            State("embedding-plot", "figure"),
+        ],
+        prevent_initial_call=True,
+    )
 
     # Client-side callback for embedding generation
     app.clientside_callback(
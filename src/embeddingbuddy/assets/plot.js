@@ -0,0 +1,186 @@
+// Clientside restyling of the embedding plot.
+//
+// The server sends a figure whenever the projection changes, together with
+// precomputed styles for every color option (see PlotFactory.create_styles).
+// Recoloring, hiding categories and toggling prompts are applied here on the
+// current figure, without a server round trip. Level-of-detail plots are
+// handed back to the server through the plot-restyle-request store. Legend
+// clicks are turned into category filter changes, so they hide points too.
+
+window.dash_clientside = window.dash_clientside || {};
+
+window.dash_clientside.plot = (function () {
+    const AXES = ['x', 'y', 'z'];
+
+    // Unfiltered document coordinates of the current projection, taken from
+    // the figure the first time its styles are seen
+    const cache = { revision: null, coordinates: null };
+
+    const TYPED_ARRAYS = {
+        i1: Int8Array, u1: Uint8Array, i2: Int16Array, u2: Uint16Array,
+        i4: Int32Array, u4: Uint32Array, f4: Float32Array, f8: Float64Array,
+    };
+
+    // Plotly serializes numpy arrays as {dtype, bdata} base64 objects
+    function toArray(value) {
+        if (!value || Array.isArray(value) || !value.bdata) {
+            return value;
+        }
+        const binary = atob(value.bdata);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new TYPED_ARRAYS[value.dtype](bytes.buffer);
+    }
+
+    function snapshotCoordinates(trace) {
+        const coordinates = {};
+        AXES.forEach(function (axis) {
+            if (trace[axis] !== undefined) {
+                coordinates[axis] = trace[axis];
+            }
+        });
+        return coordinates;
+    }
+
+    function filterCoordinates(coordinates, codes, hiddenCodes) {
+        const filtered = {};
+        Object.keys(coordinates).forEach(function (axis) {
+            const values = coordinates[axis];
+            if (hiddenCodes.size === 0) {
+                filtered[axis] = values;
+                return;
+            }
+            const decoded = toArray(values);
+            const decodedCodes = toArray(codes);
+            // Plain arrays, since typed arrays cannot hold the null gaps
+            filtered[axis] = Array.from(decoded, function (value, i) {
+                return hiddenCodes.has(decodedCodes[i]) ? null : value;
+            });
+        });
+        return filtered;
+    }
+
+    // Show each legend entry greyed out while its label is hidden
+    function legendTraces(traces, hiddenLabels) {
+        return traces.map(function (trace) {
+            if (trace.meta === undefined) {
+                return trace;
+            }
+            const visible = hiddenLabels.indexOf(trace.meta) === -1 ? true : 'legendonly';
+            return Object.assign({}, trace, { visible: visible });
+        });
+    }
+
+    return {
+        // Legend entries are empty traces labelled through their meta, so a
+        // click (or an isolating double click) only changes which labels
+        // are hidden; restyle then redraws the plot without them
+        legendToggle: function (restyleData, hidden, figure) {
+            const noUpdate = window.dash_clientside.no_update;
+            if (!restyleData || !figure || !figure.data ||
+                !restyleData[0] || !('visible' in restyleData[0])) {
+                return noUpdate;
+            }
+            const visible = restyleData[0].visible;
+            const hiddenLabels = (hidden || []).slice();
+            let changed = false;
+            (restyleData[1] || []).forEach(function (traceIndex, i) {
+                const trace = figure.data[traceIndex];
+                if (!trace || trace.meta === undefined) {
+                    return;
+                }
+                const value = Array.isArray(visible) ? visible[i] : visible;
+                const position = hiddenLabels.indexOf(trace.meta);
+                if (value === 'legendonly' && position === -1) {
+                    hiddenLabels.push(trace.meta);
+                    changed = true;
+                } else if (value !== 'legendonly' && position !== -1) {
+                    hiddenLabels.splice(position, 1);
+                    changed = true;
+                }
+            });
+            return changed ? hiddenLabels : noUpdate;
+        },
+
+        restyle: function (colorBy, showPrompts, hidden, styles, figure) {
+            const noUpdate = window.dash_clientside.no_update;
+            if (!styles || !figure || !figure.data) {
+                return [noUpdate, noUpdate, noUpdate, noUpdate, noUpdate];
+            }
+            // Tag options depend on the data, so the dropdown follows the styles
+            const colorOptions = styles.color_options;
+            if (!styles.options[colorBy]) {
+                return [noUpdate, noUpdate, noUpdate, noUpdate, colorOptions];
+            }
+
+            const option = styles.options[colorBy];
+            const labelOptions = option.labels.map(function (label) {
+                return { label: label, value: label };
+            });
+            // Drop hidden labels that the current color option does not have
+            const visibleHidden = (hidden || []).filter(function (label) {
+                return option.labels.indexOf(label) !== -1;
+            });
+            const promptsShown = (showPrompts || []).indexOf('show') !== -1;
+
+            if (styles.lod) {
+                const request = {
+                    color_by: colorBy,
+                    show_prompts: showPrompts,
+                    hidden: visibleHidden,
+                };
+                // Skip the request when the server-rendered figure is fresh
+                const triggered = window.dash_clientside.callback_context.triggered;
+                const fromServer = triggered.length === 1 &&
+                    triggered[0].prop_id === 'plot-styles.data';
+                return [
+                    noUpdate,
+                    fromServer ? noUpdate : request,
+                    labelOptions,
+                    visibleHidden,
+                    colorOptions,
+                ];
+            }
+
+            if (cache.revision !== styles.revision) {
+                cache.revision = styles.revision;
+                cache.coordinates = snapshotCoordinates(figure.data[0]);
+            }
+
+            const hiddenCodes = new Set(visibleHidden.map(function (label) {
+                return option.labels.indexOf(label);
+            }));
+            const documentMarker = option.markers[0];
+
+            // Plotly may have hidden the layers on a legend double click
+            const data = [Object.assign(
+                {},
+                figure.data[0],
+                { marker: documentMarker, visible: true },
+                filterCoordinates(cache.coordinates, documentMarker.color, hiddenCodes)
+            )];
+            if (styles.n_layers === 2) {
+                data.push(Object.assign({}, figure.data[1], {
+                    marker: option.markers[1],
+                    visible: promptsShown,
+                }));
+            }
+            const legend = legendTraces(
+                option.legend[promptsShown ? 'prompts' : 'documents'], visibleHidden
+            );
+
+            const layout = Object.assign({}, figure.layout, {
+                title: Object.assign({}, figure.layout.title, { text: option.title }),
+            });
+            return [
+                Object.assign({}, figure, { data: data.concat(legend), layout: layout }),
+                noUpdate,
+                labelOptions,
+                visibleHidden,
+                colorOptions,
+            ];
+        },
+    };
+})();
@@ -22,6 +22,8 @@ Examples:
   embeddingbuddy serve --debug            # Debug logging only (no auto-reload)
   embeddingbuddy serve --port 8080        # Custom port
   embeddingbuddy serve --host 0.0.0.0     # Bind to all interfaces
+  embeddingbuddy reduce data.ndjson --method umap --model-store ./models
+  embeddingbuddy reduce data.ndjson --transform new.ndjson --model-store ./models
         """,
     )
 
@@ -50,6 +52,40 @@ Examples:
         "--debug", action="store_true", help="Enable debug logging (no auto-reload)"
     )
 
+    # Reduce subcommand
+    reduce_parser = subparsers.add_parser(
+        "reduce",
+        help="Compute or reload a layout for an NDJSON file",
+        description="Reduce embeddings from an NDJSON file and write coordinates "
+        "as NDJSON. With a model store, fitted reducers are reused across runs.",
+    )
+    reduce_parser.add_argument("input", help="NDJSON file with embeddings")
+    reduce_parser.add_argument(
+        "--method", default="pca", help="Reduction method (default: pca)"
+    )
+    reduce_parser.add_argument(
+        "--dimensions",
+        type=int,
+        choices=[2, 3],
+        default=3,
+        help="Number of output dimensions (default: 3)",
+    )
+    reduce_parser.add_argument(
+        "--model-store",
+        default=None,
+        help="Directory of persisted reducers "
+        "(default: $EMBEDDINGBUDDY_MODEL_STORE_DIR)",
+    )
+    reduce_parser.add_argument(
+        "--transform",
+        default=None,
+        metavar="NDJSON",
+        help="Project the points in this file through the fitted layout",
+    )
+    reduce_parser.add_argument(
+        "--output", default=None, help="Output file (default: stdout)"
+    )
+
     args = parser.parse_args()
 
     if args.command == "serve":
@@ -57,11 +93,65 @@ Examples:
         from embeddingbuddy.app import serve
 
         serve(host=args.host, port=args.port, dev=args.dev, debug=args.debug)
+    elif args.command == "reduce":
+        reduce_command(args)
     else:
         # No command specified, show help
         parser.print_help()
         sys.exit(0)
 
 
+def reduce_command(args):
+    """Fit (or reload) a reducer and write per-document coordinates."""
+    from contextlib import nullcontext
+    import json
+    from embeddingbuddy.config.settings import AppSettings
+    from embeddingbuddy.data.processor import DataProcessor
+    from embeddingbuddy.models.reducers import ReducerFactory
+    from embeddingbuddy.models.store import ModelStore
+
+    def load(path):
+        with open(path, "r", encoding="utf-8") as f:
+            processed = DataProcessor().process_text(f.read())
+        if processed.error:
+            print(f"Error reading {path}: {processed.error}", file=sys.stderr)
+            sys.exit(1)
+        return processed
+
+    data = load(args.input)
+    reducer = ReducerFactory.create_reducer(
+        args.method,
+        n_components=args.dimensions,
+        random_state=AppSettings.DEFAULT_RANDOM_STATE,
+    )
+
+    store_dir = args.model_store or AppSettings.MODEL_STORE_DIR
+    if store_dir:
+        reducer, reduced_data = ModelStore(store_dir).fit_transform(
+            reducer, data.embeddings
+        )
+    else:
+        reduced_data = reducer.fit_transform(data.embeddings)
+
+    documents = data.documents
+    coordinates = reduced_data.reduced_embeddings
+    if args.transform:
+        new_data = load(args.transform)
+        documents = new_data.documents
+        coordinates = reducer.transform(new_data.embeddings)
+
+    output = (
+        open(args.output, "w", encoding="utf-8")
+        if args.output
+        else nullcontext(sys.stdout)
+    )
+    with output as out:
+        for doc, coords in zip(documents, coordinates):
+            out.write(
+                json.dumps({"id": doc.id, "coordinates": [float(c) for c in coords]})
+                + "\n"
+            )
+
+
 if __name__ == "__main__":
     main()
@@ -32,11 +32,44 @@ class AppSettings:
     DEFAULT_N_COMPONENTS_2D = 2
     DEFAULT_RANDOM_STATE = 42
 
+    # Directory for persisted fitted reducers (empty disables the model store)
+    MODEL_STORE_DIR = os.getenv("EMBEDDINGBUDDY_MODEL_STORE_DIR", "")
+
+    # Reduction process pool (0 workers runs reductions in the request thread)
+    REDUCTION_MAX_WORKERS = int(os.getenv("EMBEDDINGBUDDY_REDUCTION_WORKERS", "2"))
+    REDUCTION_QUEUE_DEPTH = int(os.getenv("EMBEDDINGBUDDY_REDUCTION_QUEUE", "8"))
+
+    # Progressive rendering: stream intermediate t-SNE/UMAP layouts to the plot
+    PROGRESSIVE_RENDERING = (
+        os.getenv("EMBEDDINGBUDDY_PROGRESSIVE", "True").lower() == "true"
+    )
+    PROGRESSIVE_METHODS = ["tsne", "umap"]
+    PROGRESSIVE_POLL_INTERVAL_MS = 500
+
+    # Level-of-detail rendering for large 2D plots: a server-rendered density
+    # image for the full view plus individual points for the zoomed viewport
+    LOD_POINT_THRESHOLD = int(os.getenv("EMBEDDINGBUDDY_LOD_THRESHOLD", "100000"))
+    LOD_MAX_POINTS_PER_VIEW = int(os.getenv("EMBEDDINGBUDDY_LOD_MAX_POINTS", "50000"))
+    LOD_RASTER_SIZE = 512
+
+    # Density mode for 2D plots: a smoothed density heatmap, with individual
+    # points only once the zoomed view holds at most DENSITY_MAX_POINTS
+    DENSITY_GRID_SIZE = 128
+    DENSITY_MAX_POINTS = int(os.getenv("EMBEDDINGBUDDY_DENSITY_MAX_POINTS", "20000"))
+
+    # In-memory LRU cache of rendered figures, bounded by their encoded size
+    FIGURE_CACHE_MAX_BYTES = (
+        int(os.getenv("EMBEDDINGBUDDY_FIGURE_CACHE_MB", "256")) * 1024 * 1024
+    )
+
     # Available Methods
     REDUCTION_METHODS = [
         {"label": "PCA", "value": "pca"},
         {"label": "t-SNE", "value": "tsne"},
         {"label": "UMAP", "value": "umap"},
+        {"label": "Random Projection", "value": "random_projection"},
+        {"label": "Sparse Random Projection", "value": "sparse_random_projection"},
+        {"label": "Truncated SVD", "value": "truncated_svd"},
     ]
 
     COLOR_OPTIONS = [
@@ -45,6 +78,12 @@ class AppSettings:
         {"label": "Tags", "value": "tags"},
     ]
 
+    # High-cardinality color fields keep their K most frequent groups and
+    # bucket the rest into "Other"; the most common tags also get their own
+    # "contains tag" color options
+    COLOR_TOP_K = int(os.getenv("EMBEDDINGBUDDY_COLOR_TOP_K", "10"))
+    COLOR_TAG_OPTIONS = int(os.getenv("EMBEDDINGBUDDY_COLOR_TAG_OPTIONS", "5"))
+
     DIMENSION_OPTIONS = [{"label": "2D", "value": "2d"}, {"label": "3D", "value": "3d"}]
 
     # Default Values
@@ -90,9 +129,52 @@ class AppSettings:
     )
     OPENSEARCH_DEFAULT_SIZE = 100
     OPENSEARCH_SAMPLE_SIZE = 5
-    OPENSEARCH_CONNECTION_TIMEOUT = 30
+    OPENSEARCH_CONNECTION_TIMEOUT = int(
+        os.getenv("EMBEDDINGBUDDY_OPENSEARCH_TIMEOUT", "30")
+    )
     OPENSEARCH_VERIFY_CERTS = True
 
+    # Pooled connections per session: keep-alive pool size (at least the
+    # slice count), retries with exponential backoff, and idle eviction
+    OPENSEARCH_POOL_SIZE = int(os.getenv("EMBEDDINGBUDDY_OPENSEARCH_POOL_SIZE", "10"))
+    OPENSEARCH_MAX_RETRIES = int(
+        os.getenv("EMBEDDINGBUDDY_OPENSEARCH_MAX_RETRIES", "3")
+    )
+    OPENSEARCH_RETRY_BACKOFF = 0.5  # Seconds, doubled on each retry
+    OPENSEARCH_IDLE_TIMEOUT = int(
+        os.getenv("EMBEDDINGBUDDY_OPENSEARCH_IDLE_TIMEOUT", "900")
+    )
+
+    # Paginated loading: documents per page, point-in-time/scroll keep-alive,
+    # and the budget for one load, measured as the payload shipped to the
+    # browser (embeddings plus document fields)
+    OPENSEARCH_PAGE_SIZE = int(os.getenv("EMBEDDINGBUDDY_OPENSEARCH_PAGE_SIZE", "1000"))
+    OPENSEARCH_KEEP_ALIVE = "2m"
+    OPENSEARCH_MAX_LOAD_BYTES = (
+        int(os.getenv("EMBEDDINGBUDDY_OPENSEARCH_MAX_LOAD_MB", "512")) * 1024 * 1024
+    )
+    OPENSEARCH_PROGRESS_POLL_INTERVAL_MS = 500
+    # Concurrent slices for large loads (one per shard, up to this many)
+    OPENSEARCH_MAX_SLICES = int(os.getenv("EMBEDDINGBUDDY_OPENSEARCH_MAX_SLICES", "8"))
+    # Pages fetched ahead of processing, per slice
+    OPENSEARCH_READ_AHEAD_PAGES = 2
+    # Sampled loads: seed for reproducible samples, and the number of
+    # category values sampled separately (the rest form one stratum)
+    OPENSEARCH_SAMPLE_SEED = int(
+        os.getenv("EMBEDDINGBUDDY_OPENSEARCH_SAMPLE_SEED", str(DEFAULT_RANDOM_STATE))
+    )
+    OPENSEARCH_MAX_STRATA = 100
+    # kNN loads: neighbours per prompt, and prompts per _msearch request
+    OPENSEARCH_KNN_K = int(os.getenv("EMBEDDINGBUDDY_OPENSEARCH_KNN_K", "100"))
+    OPENSEARCH_MSEARCH_BATCH = 50
+
+    # Local snapshots of loaded indexes (empty disables them), and the date
+    # field that lets a snapshot be topped up with newly added documents
+    OPENSEARCH_SNAPSHOT_DIR = os.getenv("EMBEDDINGBUDDY_OPENSEARCH_SNAPSHOT_DIR", "")
+    OPENSEARCH_TIMESTAMP_FIELD = os.getenv(
+        "EMBEDDINGBUDDY_OPENSEARCH_TIMESTAMP_FIELD", ""
+    )
+
     # Text Input / Transformers.js Configuration
     DEFAULT_EMBEDDING_MODEL = "Xenova/all-mpnet-base-v2"
     MAX_TEXT_LENGTH = 50000  # Characters (browser memory limits)
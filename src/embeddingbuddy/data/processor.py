@@ -1,11 +1,110 @@
+from itertools import chain
 import numpy as np
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Iterable, List, Optional, Tuple
 from ..models.schemas import Document, ProcessedData
 from ..models.field_mapper import FieldMapper
 from .parser import NDJSONParser
 
 
+class EmbeddingMatrix:
+    """Float32 matrix that vectors are written into, a page at a time.
+
+    Rows are preallocated (``capacity``, or a default that doubles when
+    full), and each page of vectors is converted in one ``np.fromiter``
+    pass straight from the decoded lists, with no float64 intermediate.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, dimension: Optional[int] = None, capacity: Optional[int] = None):
+        self.dimension = dimension
+        self._capacity = capacity or self.INITIAL_CAPACITY
+        self._rows: Optional[np.ndarray] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def extend(self, vectors: List) -> List[bool]:
+        """Write vectors into the next rows; returns which of them fit.
+
+        Vectors of the wrong length or with non-numeric values are skipped.
+        """
+        fits = [self._fits(vector) for vector in vectors]
+        fitting = [vector for vector, fit in zip(vectors, fits) if fit]
+        if not fitting:
+            return fits
+
+        rows = self._reserve(len(fitting))
+        try:
+            values = np.fromiter(
+                chain.from_iterable(fitting),
+                dtype=np.float32,
+                count=len(fitting) * self._width,
+            )
+        except (ValueError, TypeError):
+            # Something is not a number; find out which vectors, one by one
+            return [fit and self._append(vector) for vector, fit in zip(vectors, fits)]
+        rows[self._size : self._size + len(fitting)] = values.reshape(-1, self._width)
+        self._size += len(fitting)
+        return fits
+
+    def truncate(self, size: int):
+        """Drop the rows after the first ``size``."""
+        self._size = min(self._size, size)
+
+    def result(self) -> np.ndarray:
+        """The rows written so far."""
+        if self._rows is None:
+            return np.empty((0, self._width), dtype=np.float32)
+        if self._size < len(self._rows):
+            # Give back the unused rows without copying the used ones
+            self._rows.resize((self._size, self._width), refcheck=False)
+        return self._rows
+
+    @property
+    def _width(self) -> int:
+        # Only unset while no vector has been seen, when there are no rows
+        return self.dimension or 0
+
+    def _fits(self, vector) -> bool:
+        try:
+            length = len(vector)
+        except TypeError:
+            return False
+        if self.dimension is None:
+            self.dimension = length
+        return length == self.dimension
+
+    def _reserve(self, n: int) -> np.ndarray:
+        """Make room for ``n`` more rows and return the row buffer."""
+        if self._rows is None:
+            capacity = max(self._capacity, n)
+            self._rows = np.empty((capacity, self._width), dtype=np.float32)
+        elif self._size + n > len(self._rows):
+            capacity = max(2 * len(self._rows), self._size + n)
+            grown = np.empty((capacity, self._width), dtype=np.float32)
+            grown[: self._size] = self._rows[: self._size]
+            self._rows = grown
+        return self._rows
+
+    def _append(self, vector) -> bool:
+        rows = self._reserve(1)
+        try:
+            rows[self._size] = vector
+        except (ValueError, TypeError):
+            return False
+        self._size += 1
+        return True
+
+
 class DataProcessor:
+    # JSON size of one embedding value in the browser's store payload,
+    # separator included: Dash writes float32 values as full doubles
+    STORED_FLOAT_BYTES = 21
+    # JSON keys and punctuation around one document's fields in that payload
+    STORED_DOCUMENT_BYTES = 75
+
     def __init__(self):
         self.parser = NDJSONParser()
 
@@ -63,6 +162,93 @@ class DataProcessor:
         except Exception as e:
             return ProcessedData(documents=[], embeddings=np.array([]), error=str(e))
 
+    def process_opensearch_pages(
+        self,
+        pages: Iterable[List[dict]],
+        field_mapping,
+        max_documents: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+        id_offset: int = 0,
+        dimension: Optional[int] = None,
+    ) -> ProcessedData:
+        """Process OpenSearch documents page by page as they are fetched.
+
+        Each raw document is turned into a ``Document`` and the vectors of
+        each page are written straight into a float32 embedding matrix, in a
+        single pass and without intermediate copies. The matrix and the
+        document list are preallocated for ``max_documents`` rows of
+        ``dimension`` values (taken from the first vector when not given)
+        and grow as needed; documents whose vector does not fit are skipped.
+        Once written to the matrix a vector's decoded list is dropped, so
+        ``Document.embedding`` is left empty.
+
+        Only one page of raw hits is held at a time. Loading stops after
+        ``max_documents`` documents, or once the estimated size of the
+        payload shipped to the browser reaches ``max_bytes``; at about 21
+        bytes per value that also bounds the 4-byte matrix held here.
+        ``on_progress`` is called with the number of documents loaded so
+        far. Documents without an id are numbered from ``id_offset``.
+        """
+        documents: List[Any] = [None] * (max_documents or 0)
+        loaded = 0
+        embeddings = EmbeddingMatrix(dimension, capacity=max_documents)
+        to_document = FieldMapper.document_builder(field_mapping)
+        loaded_bytes = 0
+        full = False
+        try:
+            for page in pages:
+                candidates = [
+                    doc for doc in (to_document(raw) for raw in page) if doc is not None
+                ]
+                fits = embeddings.extend([doc.embedding for doc in candidates])
+                for doc, fit in zip(candidates, fits):
+                    if not fit:
+                        continue  # Skip invalid documents
+                    if not doc.id:
+                        doc.id = f"doc_{id_offset + loaded}"
+
+                    loaded_bytes += self._stored_bytes(doc, len(doc.embedding))
+                    # A list of Python floats takes 8x its matrix row
+                    doc.embedding = []
+                    if loaded < len(documents):
+                        documents[loaded] = doc
+                    else:
+                        documents.append(doc)
+                    loaded += 1
+                    full = bool(
+                        (max_documents and loaded >= max_documents)
+                        or (max_bytes and loaded_bytes >= max_bytes)
+                    )
+                    if full:
+                        break
+
+                # Rows written past the limit are dropped
+                embeddings.truncate(loaded)
+                if on_progress:
+                    on_progress(loaded)
+                if full:
+                    break
+        except Exception as e:
+            return ProcessedData(documents=[], embeddings=np.array([]), error=str(e))
+        finally:
+            # Release the server-side cursor when stopping early
+            close = getattr(pages, "close", None)
+            if close:
+                close()
+
+        # Give back the preallocated slots nothing was written to
+        del documents[loaded:]
+        if not documents:
+            return ProcessedData(
+                documents=[],
+                embeddings=np.array([]),
+                error="No valid documents after transformation",
+            )
+        return ProcessedData(
+            documents=documents, embeddings=embeddings.result(), truncated=full
+        )
+
     def process_client_embeddings(self, embeddings_data: dict) -> ProcessedData:
         """Process embeddings data received from client-side JavaScript."""
         try:
@@ -147,6 +333,20 @@ class DataProcessor:
         except Exception as e:
             return ProcessedData(documents=[], embeddings=np.array([]), error=str(e))
 
+    @classmethod
+    def _stored_bytes(cls, doc: Document, dimension: int) -> int:
+        """Approximate JSON size of a document and its embedding row once
+        shipped to the browser's store."""
+        return (
+            cls.STORED_FLOAT_BYTES * dimension
+            + cls.STORED_DOCUMENT_BYTES
+            + len(doc.id)
+            + len(doc.text)
+            + len(doc.category or "")
+            + len(doc.subcategory or "")
+            + sum(len(tag) + 4 for tag in doc.tags or [])
+        )
+
     def _extract_embeddings(self, documents: List[Document]) -> np.ndarray:
         if not documents:
             return np.array([])
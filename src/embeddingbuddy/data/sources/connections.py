@@ -0,0 +1,96 @@
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+from ...config.settings import AppSettings
+from .opensearch import OpenSearchClient
+
+
+logger = logging.getLogger(__name__)
+
+
+class OpenSearchConnectionManager:
+    """Keeps one OpenSearch client per browser session, URL and credentials.
+
+    Clients are reused across callbacks, so their pooled keep-alive
+    connections survive between actions and sessions never share (or
+    replace) each other's clients. Clients idle for longer than
+    ``idle_timeout`` seconds are closed, unless a callback is using them.
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = None):
+        self.idle_timeout = (
+            AppSettings.OPENSEARCH_IDLE_TIMEOUT
+            if idle_timeout is None
+            else idle_timeout
+        )
+        # key -> [client, callbacks using it, last use]
+        self._entries: Dict[Tuple[str, str, str], list] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(
+        session_id: Optional[str],
+        url: str,
+        username: Optional[str],
+        password: Optional[str],
+        api_key: Optional[str],
+    ) -> Tuple[str, str, str]:
+        # Credentials are only compared, so keep a digest rather than secrets
+        credentials = hashlib.sha256(
+            repr((username, password, api_key)).encode()
+        ).hexdigest()
+        return (session_id or "", url, credentials)
+
+    def acquire(
+        self,
+        session_id: Optional[str],
+        url: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ) -> OpenSearchClient:
+        """Return the client for these settings; pair with ``release``."""
+        key = self._key(session_id, url, username, password, api_key)
+        now = time.monotonic()
+        with self._lock:
+            idle = self._pop_idle(now)
+            entry = self._entries.setdefault(key, [OpenSearchClient(), 0, now])
+            entry[1] += 1
+            entry[2] = now
+        self._close(idle)
+        return entry[0]
+
+    def release(self, client: OpenSearchClient):
+        """Mark a client returned by ``acquire`` as no longer in use."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry[0] is client:
+                    entry[1] = max(entry[1] - 1, 0)
+                    entry[2] = time.monotonic()
+                    return
+
+    def close_all(self):
+        """Close every client, e.g. on shutdown."""
+        with self._lock:
+            clients = [entry[0] for entry in self._entries.values()]
+            self._entries.clear()
+        self._close(clients)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _pop_idle(self, now: float) -> List[OpenSearchClient]:
+        idle_keys = [
+            key
+            for key, (_, in_use, last_used) in self._entries.items()
+            if not in_use and now - last_used > self.idle_timeout
+        ]
+        return [self._entries.pop(key)[0] for key in idle_keys]
+
+    @staticmethod
+    def _close(clients: List[OpenSearchClient]):
+        for client in clients:
+            logger.info("Closing OpenSearch connection")
+            client.disconnect()
@@ -1,16 +1,165 @@
-from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import (
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Any,
+    Sequence,
+    Tuple,
+)
 import logging
-from opensearchpy import OpenSearch
-from opensearchpy.exceptions import OpenSearchException
+import queue
+import threading
+import time
+from opensearchpy import OpenSearch, Transport
+from opensearchpy.exceptions import (
+    ConnectionError,
+    OpenSearchException,
+    TransportError,
+)
+from ...config.settings import AppSettings
 
 
 logger = logging.getLogger(__name__)
 
 
+def read_ahead(
+    readers: Sequence[Callable[[], Generator[List[Dict], None, None]]],
+    depth: Optional[int] = None,
+) -> Iterator[List[Dict]]:
+    """
+    Run page iterators on background threads and yield their pages as they
+    arrive, so fetching and decoding the next pages overlaps with whatever
+    the consumer does with the current one.
+
+    Each reader is a callable returning a page iterator. Pages are handed
+    over through a queue of ``depth`` pages per reader (default
+    ``AppSettings.OPENSEARCH_READ_AHEAD_PAGES``), which bounds the memory
+    held while the consumer catches up. The first error raised by a reader
+    is re-raised here. Closing the returned iterator stops the readers and
+    closes their iterators, releasing any server-side cursors.
+    """
+    depth = depth or AppSettings.OPENSEARCH_READ_AHEAD_PAGES
+    pages: queue.Queue = queue.Queue(maxsize=depth * len(readers))
+    stop = threading.Event()
+    done = object()
+
+    def hand_over(item) -> bool:
+        # Give up once the consumer has stopped reading
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read(reader: Callable[[], Generator[List[Dict], None, None]]):
+        reader_pages = None
+        try:
+            reader_pages = reader()
+            for page in reader_pages:
+                if not hand_over(page):
+                    break
+        except Exception as e:
+            hand_over(e)
+        finally:
+            if reader_pages is not None:
+                reader_pages.close()
+            hand_over(done)
+
+    with ThreadPoolExecutor(max_workers=len(readers)) as pool:
+        for reader in readers:
+            pool.submit(read, reader)
+        try:
+            finished = 0
+            while finished < len(readers):
+                item = pages.get()
+                if item is done:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+
+
+class BackoffTransport(Transport):
+    """Transport that waits before each retry, doubling the wait every time.
+
+    The stock transport retries failed requests straight away, which only
+    adds load to a cluster that is already struggling.
+    """
+
+    def __init__(self, hosts, backoff_factor: float = 0.5, **kwargs):
+        super().__init__(hosts, **kwargs)
+        self.backoff_factor = backoff_factor
+        self.backoff_retries = self.max_retries
+        # Retries are made here, one request at a time
+        self.max_retries = 0
+
+    def perform_request(self, method, url, *args, **kwargs):
+        for attempt in range(self.backoff_retries + 1):
+            try:
+                return super().perform_request(method, url, *args, **kwargs)
+            except TransportError as e:
+                retry = (
+                    self.retry_on_timeout
+                    if isinstance(e, ConnectionError)
+                    else e.status_code in self.retry_on_status
+                )
+                if not retry or attempt == self.backoff_retries:
+                    raise
+                time.sleep(self.backoff_factor * 2**attempt)
+
+
 class OpenSearchClient:
+    # Trim responses to what is read from them
+    SAMPLE_FILTER_PATH = "hits.hits._source"
+    PIT_FILTER_PATH = "hits.hits._source,hits.hits.sort"
+    # _id keeps hits whose filtered _source is empty, so short pages stay short
+    SCROLL_FILTER_PATH = "_scroll_id,hits.hits._id,hits.hits._source"
+    MSEARCH_FILTER_PATH = (
+        "responses.error,responses.hits.hits._id,responses.hits.hits._source"
+    )
+    # Random sampling orders documents by a seeded random score
+    RANDOM_SORT = [{"_score": "desc"}]
+    # Identifies a mapping: recreated indices get a new uuid
+    MAPPING_VERSION_FILTER_PATH = (
+        "metadata.indices.*.mapping_version,metadata.indices.*.settings.index.uuid"
+    )
+    # Reducer distance for a vector field's knn_vector space_type or
+    # dense_vector similarity; None is the reducers' euclidean default
+    SPACE_TYPE_METRICS = {
+        "l2": None,
+        "l2_norm": None,
+        "l1": "manhattan",
+        "linf": "chebyshev",
+        "cosinesimil": "cosine",
+        "cosine": "cosine",
+        # Inner products rank like cosine on the normalized vectors they
+        # are meant for, and are not a distance themselves
+        "innerproduct": "cosine",
+        "dot_product": "cosine",
+        "max_inner_product": "cosine",
+        "hamming": "hamming",
+    }
+    FIELD_ANALYSIS_CACHE_SIZE = 128
+
+    # Field analyses shared by all clients, keyed by (cluster, index,
+    # mapping version)
+    _field_analysis_cache: Dict[Tuple, Dict] = {}
+    _field_analysis_lock = threading.Lock()
+
     def __init__(self):
         self.client: Optional[OpenSearch] = None
         self.connection_info: Optional[Dict[str, Any]] = None
+        self._connection_key: Optional[Tuple] = None
 
     def connect(
         self,
@@ -23,6 +172,9 @@ class OpenSearchClient:
         """
         Connect to OpenSearch instance.
 
+        Connecting again with the same settings keeps the existing client
+        and its pooled connections, and only checks that the cluster answers.
+
         Returns:
             Tuple of (success: bool, message: str)
         """
@@ -40,8 +192,23 @@ class OpenSearchClient:
             elif api_key:
                 auth_config["api_key"] = api_key
 
-            # Create client
-            self.client = OpenSearch([host], verify_certs=verify_certs, **auth_config)
+            # Create client, unless one with the same settings is open
+            connection_key = (host, username, password, api_key, verify_certs)
+            if self.client is None or connection_key != self._connection_key:
+                self.disconnect()
+                self.client = OpenSearch(
+                    [host],
+                    verify_certs=verify_certs,
+                    transport_class=BackoffTransport,
+                    timeout=AppSettings.OPENSEARCH_CONNECTION_TIMEOUT,
+                    pool_maxsize=AppSettings.OPENSEARCH_POOL_SIZE,
+                    max_retries=AppSettings.OPENSEARCH_MAX_RETRIES,
+                    retry_on_timeout=True,
+                    retry_on_status=(429, 502, 503, 504),
+                    backoff_factor=AppSettings.OPENSEARCH_RETRY_BACKOFF,
+                    **auth_config,
+                )
+                self._connection_key = connection_key
 
             # Test connection
             info = self.client.info()
@@ -58,9 +225,11 @@ class OpenSearchClient:
 
         except OpenSearchException as e:
             logger.error(f"OpenSearch connection error: {e}")
+            self.disconnect()
             return False, f"Connection failed: {str(e)}"
         except Exception as e:
             logger.error(f"Unexpected error connecting to OpenSearch: {e}")
+            self.disconnect()
             return False, f"Unexpected error: {str(e)}"
 
     def get_index_mapping(self, index_name: str) -> Tuple[bool, Optional[Dict], str]:
@@ -84,54 +253,145 @@ class OpenSearchClient:
         """
         Analyze index fields to detect potential embedding and text fields.
 
+        Fields inside object mappings are reported by their dotted paths.
+        Vector fields (``knn_vector`` and ``dense_vector``) come with their
+        dimension, space type and the matching reducer metric. Analyses are
+        cached per cluster, index and mapping version, so they are only
+        redone after the mapping changes; treat them as read-only.
+
         Returns:
             Tuple of (success: bool, analysis: Dict or None, message: str)
         """
+        if not self.client:
+            return False, None, "Not connected to OpenSearch"
+
+        version = self._mapping_version(index_name)
+        cache_key = None
+        if version and self.connection_info:
+            cache_key = (self.connection_info["url"], index_name, version)
+            with self._field_analysis_lock:
+                cached = self._field_analysis_cache.get(cache_key)
+            if cached is not None:
+                return True, cached, "Field analysis completed"
+
         success, mapping, message = self.get_index_mapping(index_name)
-        if not success:
+        if not success or mapping is None:
             return False, None, message
 
         try:
             # Extract field information from mapping
             index_mapping = mapping[index_name]["mappings"]["properties"]
 
-            analysis = {
+            analysis: Dict[str, List] = {
                 "vector_fields": [],
                 "text_fields": [],
                 "keyword_fields": [],
                 "numeric_fields": [],
                 "all_fields": [],
             }
-
-            for field_name, field_info in index_mapping.items():
-                field_type = field_info.get("type", "unknown")
-                analysis["all_fields"].append(field_name)
-
-                if field_type == "dense_vector":
-                    analysis["vector_fields"].append(
-                        {
-                            "name": field_name,
-                            "dimension": field_info.get("dimension", "unknown"),
-                        }
-                    )
-                elif field_type == "text":
-                    analysis["text_fields"].append(field_name)
-                elif field_type == "keyword":
-                    analysis["keyword_fields"].append(field_name)
-                elif field_type in ["integer", "long", "float", "double"]:
-                    analysis["numeric_fields"].append(field_name)
-
-            return True, analysis, "Field analysis completed"
+            self._analyze_properties(index_mapping, analysis)
 
         except Exception as e:
             logger.error(f"Error analyzing fields: {e}")
             return False, None, f"Field analysis failed: {str(e)}"
 
+        if cache_key:
+            with self._field_analysis_lock:
+                cache = self._field_analysis_cache
+                while len(cache) >= self.FIELD_ANALYSIS_CACHE_SIZE:
+                    cache.pop(next(iter(cache)))
+                cache[cache_key] = analysis
+        return True, analysis, "Field analysis completed"
+
+    def _analyze_properties(
+        self, properties: Dict[str, Dict], analysis: Dict[str, List], prefix: str = ""
+    ) -> None:
+        for field_name, field_info in properties.items():
+            path = f"{prefix}{field_name}"
+            # Object fields only list their properties
+            field_type = field_info.get(
+                "type", "object" if "properties" in field_info else "unknown"
+            )
+            if field_type == "object":
+                self._analyze_properties(
+                    field_info.get("properties", {}), analysis, f"{path}."
+                )
+                continue
+
+            # Nested fields hold arrays of objects, so their properties have
+            # no single value per document and are not walked
+            analysis["all_fields"].append(path)
+
+            if field_type in ("knn_vector", "dense_vector"):
+                analysis["vector_fields"].append(self._vector_field(path, field_info))
+            elif field_type == "text":
+                analysis["text_fields"].append(path)
+            elif field_type == "keyword":
+                analysis["keyword_fields"].append(path)
+            elif field_type in ["integer", "long", "float", "double"]:
+                analysis["numeric_fields"].append(path)
+
+    def _vector_field(self, path: str, field_info: Dict) -> Dict[str, Any]:
+        if field_info["type"] == "knn_vector":
+            dimension = field_info.get("dimension")
+            # Newer mappings set the space type on the field, older ones in
+            # the method; either way it defaults to l2
+            space_type = (
+                field_info.get("space_type")
+                or field_info.get("method", {}).get("space_type")
+                or "l2"
+            )
+        else:
+            dimension = field_info.get("dims", field_info.get("dimension"))
+            space_type = field_info.get("similarity")
+
+        return {
+            "name": path,
+            "type": field_info["type"],
+            # Vectors of trained knn models take their dimension from the model
+            "dimension": dimension if dimension is not None else "unknown",
+            "space_type": space_type,
+            "metric": self.SPACE_TYPE_METRICS.get(space_type),
+        }
+
+    def _mapping_version(self, index_name: str) -> Optional[Tuple]:
+        """Version of the index mappings, or None if it cannot be read (for
+        instance without cluster monitor privileges)."""
+        try:
+            response = self._require_client().cluster.state(
+                metric="metadata",
+                index=index_name,
+                filter_path=self.MAPPING_VERSION_FILTER_PATH,
+            )
+            indices = response["metadata"]["indices"]
+            return tuple(
+                sorted(
+                    (name, meta["settings"]["index"]["uuid"], meta["mapping_version"])
+                    for name, meta in indices.items()
+                )
+            )
+        except Exception as e:
+            logger.debug(f"Could not read mapping version of {index_name}: {e}")
+            return None
+
+    def vector_field(self, index_name: str, field: str) -> Optional[Dict[str, Any]]:
+        """Analysis of ``field`` if the mapping declares it a vector field."""
+        success, analysis, _ = self.analyze_fields(index_name)
+        if not success or analysis is None:
+            return None
+        return next(
+            (vf for vf in analysis["vector_fields"] if vf["name"] == field), None
+        )
+
     def fetch_sample_data(
-        self, index_name: str, size: int = 5
+        self,
+        index_name: str,
+        size: int = 5,
+        source_fields: Optional[List[str]] = None,
     ) -> Tuple[bool, List[Dict], str]:
         """
-        Fetch sample documents from the index.
+        Fetch sample documents from the index, limited to ``source_fields``
+        when given.
 
         Returns:
             Tuple of (success: bool, documents: List[Dict], message: str)
@@ -140,11 +400,14 @@ class OpenSearchClient:
             return False, [], "Not connected to OpenSearch"
 
         try:
+            body: Dict[str, Any] = {"query": {"match_all": {}}, "size": size}
+            if source_fields:
+                body["_source"] = list(source_fields)
             response = self.client.search(
-                index=index_name, body={"query": {"match_all": {}}, "size": size}
+                index=index_name, body=body, filter_path=self.SAMPLE_FILTER_PATH
             )
 
-            documents = [hit["_source"] for hit in response["hits"]["hits"]]
+            documents = self._sources(response)
             return True, documents, f"Retrieved {len(documents)} sample documents"
 
         except OpenSearchException as e:
@@ -152,10 +415,14 @@ class OpenSearchClient:
             return False, [], f"Failed to fetch sample data: {str(e)}"
 
     def fetch_data(
-        self, index_name: str, size: int = 100
+        self,
+        index_name: str,
+        size: int = 100,
+        source_fields: Optional[List[str]] = None,
     ) -> Tuple[bool, List[Dict], str]:
         """
-        Fetch documents from the index.
+        Fetch up to ``size`` documents from the index, page by page, limited
+        to ``source_fields`` when given.
 
         Returns:
             Tuple of (success: bool, documents: List[Dict], message: str)
@@ -164,25 +431,484 @@ class OpenSearchClient:
             return False, [], "Not connected to OpenSearch"
 
         try:
-            response = self.client.search(
-                index=index_name, body={"query": {"match_all": {}}, "size": size}
+            documents: List[Dict] = []
+            page_size = min(size, AppSettings.OPENSEARCH_PAGE_SIZE)
+            pages = self.iter_pages(
+                index_name, page_size=page_size, source_fields=source_fields
             )
+            for page in pages:
+                documents.extend(page[: size - len(documents)])
+                if len(documents) >= size:
+                    break
 
-            documents = [hit["_source"] for hit in response["hits"]["hits"]]
-            total_hits = response["hits"]["total"]["value"]
-
-            message = f"Retrieved {len(documents)} documents from {total_hits} total"
-            return True, documents, message
+            return True, documents, f"Retrieved {len(documents)} documents"
 
         except OpenSearchException as e:
             logger.error(f"Error fetching data: {e}")
             return False, [], f"Failed to fetch data: {str(e)}"
 
+    def count_documents(
+        self, index_name: str, query: Optional[Dict[str, Any]] = None
+    ) -> Optional[int]:
+        """Number of documents in the index (matching ``query``), or None if
+        they cannot be counted."""
+        if not self.client:
+            return None
+        try:
+            if query:
+                return self.client.count(index=index_name, body={"query": query})[
+                    "count"
+                ]
+            return self.client.count(index=index_name)["count"]
+        except OpenSearchException as e:
+            logger.warning(f"Error counting documents in {index_name}: {e}")
+            return None
+
+    def index_state(
+        self, index_name: str, timestamp_field: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cheap summary of an index's contents, for telling whether it changed.
+
+        Index UUIDs change when an index is recreated, the primary shards'
+        sequence numbers grow with every write, and the latest value of
+        ``timestamp_field`` (a date field) tells new documents apart.
+        Returns None if the stats cannot be read.
+        """
+        if not self.client:
+            return None
+        try:
+            stats = self.client.indices.stats(index=index_name, level="shards")
+            indices = stats["indices"]
+            state: Dict[str, Any] = {
+                "uuids": sorted(
+                    index.get("uuid", name) for name, index in indices.items()
+                ),
+                "doc_count": stats["_all"]["primaries"]["docs"]["count"],
+                "max_seq_no": sum(
+                    copy["seq_no"]["max_seq_no"]
+                    for index in indices.values()
+                    for copies in index["shards"].values()
+                    for copy in copies
+                    if copy["routing"]["primary"]
+                ),
+                "max_timestamp": None,
+            }
+            if timestamp_field:
+                response = self.client.search(
+                    index=index_name,
+                    body={
+                        "size": 0,
+                        "aggs": {"latest": {"max": {"field": timestamp_field}}},
+                    },
+                )
+                state["max_timestamp"] = response["aggregations"]["latest"]["value"]
+            return state
+        except (OpenSearchException, KeyError, TypeError) as e:
+            logger.warning(f"Error reading index state for {index_name}: {e}")
+            return None
+
+    def get_shard_count(self, index_name: str) -> int:
+        """Number of primary shards behind an index, alias or pattern (>= 1)."""
+        if not self.client:
+            return 1
+        try:
+            settings = self.client.indices.get_settings(index=index_name)
+            shards = sum(
+                int(index["settings"]["index"]["number_of_shards"])
+                for index in settings.values()
+            )
+            return max(shards, 1)
+        except (OpenSearchException, KeyError, ValueError) as e:
+            logger.warning(f"Error reading shard count for {index_name}: {e}")
+            return 1
+
+    def iter_pages(
+        self,
+        index_name: str,
+        page_size: Optional[int] = None,
+        slice_id: Optional[int] = None,
+        max_slices: Optional[int] = None,
+        source_fields: Optional[List[str]] = None,
+        query: Optional[Dict[str, Any]] = None,
+        sort: Optional[List] = None,
+    ) -> Generator[List[Dict], None, None]:
+        """
+        Yield the ``_source`` of every document in the index (or matching
+        ``query``, in ``sort`` order), one page at a time.
+
+        Pages come from a point-in-time with ``search_after``; clusters
+        without point-in-time support fall back to a scroll. The cursor is
+        released when the iterator is exhausted or closed early, so callers
+        can stop as soon as they have enough documents. With ``slice_id``
+        and ``max_slices`` only that slice of the index is read, and with
+        ``source_fields`` only those fields of each document.
+
+        Raises:
+            OpenSearchException: If a page cannot be fetched.
+        """
+        if not self.client:
+            raise RuntimeError("Not connected to OpenSearch")
+
+        body: Dict[str, Any] = {
+            "size": page_size or AppSettings.OPENSEARCH_PAGE_SIZE,
+            "query": query or {"match_all": {}},
+        }
+        if sort:
+            body["sort"] = list(sort)
+        if max_slices and max_slices > 1:
+            body["slice"] = {"id": slice_id, "max": max_slices}
+        if source_fields:
+            body["_source"] = list(source_fields)
+
+        pit_pages = self._iter_pit_pages(index_name, body)
+        try:
+            first_page = next(pit_pages, None)
+        except OpenSearchException as e:
+            logger.info(f"Point-in-time paging unavailable, using scroll: {e}")
+            yield from self._iter_scroll_pages(index_name, body)
+            return
+
+        if first_page is not None:
+            yield first_page
+            yield from pit_pages
+
+    def iter_pages_parallel(
+        self,
+        index_name: str,
+        n_slices: Optional[int] = None,
+        page_size: Optional[int] = None,
+        source_fields: Optional[List[str]] = None,
+        query: Optional[Dict[str, Any]] = None,
+        sort: Optional[List] = None,
+    ) -> Iterator[List[Dict]]:
+        """
+        Like ``iter_pages``, but read ``n_slices`` slices of the index
+        concurrently, ahead of the consumer (see ``read_ahead``).
+
+        The slice count defaults to the index's shard count, capped at
+        ``AppSettings.OPENSEARCH_MAX_SLICES``. Pages arrive in no particular
+        order. Closing the iterator stops all slices and releases their
+        cursors.
+
+        Raises:
+            OpenSearchException: If a page cannot be fetched.
+        """
+        if n_slices is None:
+            n_slices = min(
+                self.get_shard_count(index_name), AppSettings.OPENSEARCH_MAX_SLICES
+            )
+        slices: List[Tuple[Optional[int], Optional[int]]]
+        if n_slices <= 1:
+            slices = [(None, None)]
+        else:
+            slices = [(slice_id, n_slices) for slice_id in range(n_slices)]
+        readers = [
+            partial(
+                self.iter_pages,
+                index_name,
+                page_size,
+                slice_id,
+                max_slices,
+                source_fields=source_fields,
+                query=query,
+                sort=sort,
+            )
+            for slice_id, max_slices in slices
+        ]
+        return read_ahead(readers)
+
+    def iter_random_pages(
+        self,
+        index_name: str,
+        seed: int,
+        page_size: Optional[int] = None,
+        source_fields: Optional[List[str]] = None,
+        query: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[List[Dict]]:
+        """
+        Like ``iter_pages_parallel``, but in a random order fixed by ``seed``,
+        so the first N documents are a uniform random sample of the index.
+        """
+        return self.iter_pages_parallel(
+            index_name,
+            page_size=page_size,
+            source_fields=source_fields,
+            query=self.random_query(seed, query),
+            sort=self.RANDOM_SORT,
+        )
+
+    def iter_stratified_pages(
+        self,
+        index_name: str,
+        field: str,
+        size: int,
+        seed: int,
+        page_size: Optional[int] = None,
+        source_fields: Optional[List[str]] = None,
+        query: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[List[Dict]]:
+        """
+        Yield a random sample of ``size`` documents, stratified by ``field``.
+
+        A terms aggregation counts the documents per value (the values past
+        ``AppSettings.OPENSEARCH_MAX_STRATA`` and documents without the
+        field form one last stratum). Each stratum gets a proportional share
+        of the sample, at least one document, and is sampled with its own
+        seeded random query.
+
+        Raises:
+            OpenSearchException: If the field cannot be aggregated or a page
+            cannot be fetched.
+        """
+        strata = self._strata(index_name, field, query)
+        shares = self._allocate(size, [count for _, count in strata])
+        for (stratum, _), share in zip(strata, shares):
+            if not share:
+                continue
+            filters = [stratum] + ([query] if query else [])
+            pages = self.iter_pages(
+                index_name,
+                page_size=min(share, page_size or AppSettings.OPENSEARCH_PAGE_SIZE),
+                source_fields=source_fields,
+                query=self.random_query(seed, {"bool": {"filter": filters}}),
+                sort=self.RANDOM_SORT,
+            )
+            yield from self._take(pages, share)
+
+    def iter_knn_pages(
+        self,
+        index_name: str,
+        vector_field: str,
+        vectors: List[List[float]],
+        k: int,
+        source_fields: Optional[List[str]] = None,
+        query: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[List[Dict]]:
+        """
+        Yield the ``k`` approximate nearest neighbours of each vector.
+
+        Searches are batched into ``_msearch`` requests of
+        ``AppSettings.OPENSEARCH_MSEARCH_BATCH`` vectors, one page per batch.
+        Documents that neighbour several vectors are yielded once. With
+        ``query`` only matching documents are considered.
+
+        Raises:
+            OpenSearchException: If a search fails.
+        """
+        client = self._require_client()
+        batch_size = AppSettings.OPENSEARCH_MSEARCH_BATCH
+        seen = set()
+        for start in range(0, len(vectors), batch_size):
+            searches: List[Dict[str, Any]] = []
+            for vector in vectors[start : start + batch_size]:
+                knn: Dict[str, Any] = {"vector": list(vector), "k": k}
+                if query:
+                    knn["filter"] = query
+                search: Dict[str, Any] = {
+                    "size": k,
+                    "query": {"knn": {vector_field: knn}},
+                }
+                if source_fields:
+                    search["_source"] = list(source_fields)
+                searches.extend([{"index": index_name}, search])
+
+            response = client.msearch(
+                body=searches, filter_path=self.MSEARCH_FILTER_PATH
+            )
+            page = []
+            for result in response.get("responses", []):
+                if "error" in result:
+                    raise OpenSearchException(f"kNN search failed: {result['error']}")
+                for hit in result.get("hits", {}).get("hits", []):
+                    if hit["_id"] not in seen:
+                        seen.add(hit["_id"])
+                        page.append(hit.get("_source", {}))
+            if page:
+                yield page
+
+    @staticmethod
+    def random_query(
+        seed: int, query: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Score the documents matching ``query`` by a random number per seed."""
+        return {
+            "function_score": {
+                "query": query or {"match_all": {}},
+                # A seed needs a per-document field; _seq_no is always there
+                "random_score": {"seed": seed, "field": "_seq_no"},
+                "boost_mode": "replace",
+            }
+        }
+
+    def _strata(
+        self, index_name: str, field: str, query: Optional[Dict[str, Any]]
+    ) -> List[Tuple[Dict[str, Any], int]]:
+        """(filter, document count) per value of ``field``, plus the rest."""
+        client = self._require_client()
+        body: Dict[str, Any] = {
+            "size": 0,
+            "track_total_hits": True,
+            "query": query or {"match_all": {}},
+            "aggs": {
+                "strata": {
+                    "terms": {
+                        "field": field,
+                        "size": AppSettings.OPENSEARCH_MAX_STRATA,
+                    }
+                }
+            },
+        }
+        try:
+            response = client.search(index=index_name, body=body)
+        except TransportError:
+            # Text fields can usually be aggregated through a keyword subfield
+            field = f"{field}.keyword"
+            body["aggs"]["strata"]["terms"]["field"] = field
+            response = client.search(index=index_name, body=body)
+
+        buckets = response["aggregations"]["strata"]["buckets"]
+        strata = [
+            ({"term": {field: bucket["key"]}}, bucket["doc_count"])
+            for bucket in buckets
+        ]
+        rest = response["hits"]["total"]["value"] - sum(c for _, c in strata)
+        if rest > 0:
+            keys = [bucket["key"] for bucket in buckets]
+            strata.append(({"bool": {"must_not": [{"terms": {field: keys}}]}}, rest))
+        return strata
+
+    @staticmethod
+    def _allocate(size: int, counts: List[int]) -> List[int]:
+        """Split ``size`` over strata in proportion to their counts.
+
+        Every non-empty stratum gets at least one document where ``size``
+        allows; rounding leftovers go to the largest remainders.
+        """
+        total = sum(counts)
+        if total <= size:
+            return list(counts)
+
+        exact = [size * count / total for count in counts]
+        shares = [min(count, max(int(e), 1)) for e, count in zip(exact, counts)]
+        leftover = size - sum(shares)
+        by_remainder = sorted(
+            range(len(counts)), key=lambda i: exact[i] - int(exact[i]), reverse=True
+        )
+        for i in by_remainder:
+            if leftover <= 0:
+                break
+            if shares[i] < counts[i]:
+                shares[i] += 1
+                leftover -= 1
+        # The one-document minimum can overshoot; take it from the largest
+        while leftover < 0:
+            largest = max(range(len(shares)), key=shares.__getitem__)
+            shares[largest] -= 1
+            leftover += 1
+        return shares
+
+    @staticmethod
+    def _take(
+        pages: Generator[List[Dict], None, None], n: int
+    ) -> Generator[List[Dict], None, None]:
+        """Yield the first ``n`` documents of ``pages``, then close them."""
+        try:
+            for page in pages:
+                yield page[:n]
+                n -= len(page)
+                if n <= 0:
+                    return
+        finally:
+            pages.close()
+
+    def _iter_pit_pages(
+        self, index_name: str, base_body: Dict[str, Any]
+    ) -> Generator[List[Dict], None, None]:
+        client = self._require_client()
+        keep_alive = AppSettings.OPENSEARCH_KEEP_ALIVE
+        page_size = base_body["size"]
+        pit_id = client.create_pit(index=index_name, keep_alive=keep_alive)["pit_id"]
+        try:
+            search_after = None
+            while True:
+                body = dict(
+                    base_body,
+                    pit={"id": pit_id, "keep_alive": keep_alive},
+                    # _shard_doc is the cheapest unique tiebreaker
+                    sort=base_body.get("sort", []) + [{"_shard_doc": "asc"}],
+                )
+                if search_after is not None:
+                    body["search_after"] = search_after
+
+                response = client.search(body=body, filter_path=self.PIT_FILTER_PATH)
+                hits = response.get("hits", {}).get("hits", [])
+                if not hits:
+                    return
+                yield self._sources(response)
+                if len(hits) < page_size:
+                    return
+                search_after = hits[-1]["sort"]
+        finally:
+            self._release(client.delete_pit, body={"pit_id": [pit_id]})
+
+    def _iter_scroll_pages(
+        self, index_name: str, base_body: Dict[str, Any]
+    ) -> Generator[List[Dict], None, None]:
+        client = self._require_client()
+        keep_alive = AppSettings.OPENSEARCH_KEEP_ALIVE
+        page_size = base_body["size"]
+        response = client.search(
+            index=index_name,
+            body=dict(base_body, sort=base_body.get("sort", ["_doc"])),
+            scroll=keep_alive,
+            filter_path=self.SCROLL_FILTER_PATH,
+        )
+        scroll_id = response.get("_scroll_id")
+        try:
+            while True:
+                hits = response.get("hits", {}).get("hits", [])
+                if not hits:
+                    return
+                yield self._sources(response)
+                if len(hits) < page_size:
+                    return
+                response = client.scroll(
+                    scroll_id=scroll_id,
+                    scroll=keep_alive,
+                    filter_path=self.SCROLL_FILTER_PATH,
+                )
+                scroll_id = response.get("_scroll_id", scroll_id)
+        finally:
+            if scroll_id:
+                self._release(client.clear_scroll, scroll_id=scroll_id)
+
+    def _require_client(self) -> OpenSearch:
+        if self.client is None:
+            raise RuntimeError("Not connected to OpenSearch")
+        return self.client
+
+    @staticmethod
+    def _sources(response: Dict) -> List[Dict]:
+        # filter_path drops empty objects, including responses without hits
+        hits = response.get("hits", {}).get("hits", [])
+        return [hit.get("_source", {}) for hit in hits]
+
+    @staticmethod
+    def _release(release, **kwargs):
+        """Free a server-side cursor; it expires on its own if this fails."""
+        try:
+            release(**kwargs)
+        except OpenSearchException as e:
+            logger.warning(f"Error releasing OpenSearch cursor: {e}")
+
     def disconnect(self):
-        """Disconnect from OpenSearch."""
+        """Disconnect from OpenSearch, closing pooled connections."""
         if self.client:
+            self._release(self.client.close)
             self.client = None
             self.connection_info = None
+            self._connection_key = None
 
     def is_connected(self) -> bool:
         """Check if connected to OpenSearch."""
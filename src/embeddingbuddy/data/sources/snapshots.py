@@ -0,0 +1,141 @@
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import numpy as np
+from ...models.schemas import Document, ProcessedData
+
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """Local on-disk snapshots of datasets loaded from OpenSearch.
+
+    Each snapshot is stored in columns: the embedding matrix as a ``.npy``
+    file, and the document fields plus the index state seen at load time as
+    JSON. Before a snapshot is reused, that state is compared with the
+    index's current stats (see ``OpenSearchClient.index_state``), so a
+    changed index is never served from a stale copy.
+    """
+
+    FORMAT_VERSION = 1
+    COLUMNS = ("id", "text", "category", "subcategory", "tags")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @classmethod
+    def from_settings(cls) -> Optional["SnapshotStore"]:
+        """Return the configured store, or None when snapshots are disabled."""
+        from ...config.settings import AppSettings
+
+        if not AppSettings.OPENSEARCH_SNAPSHOT_DIR:
+            return None
+        return cls(AppSettings.OPENSEARCH_SNAPSHOT_DIR)
+
+    @classmethod
+    def make_key(cls, **parts: Any) -> str:
+        """Key for a load, from its cluster, index, mapping, query and
+        sampling parameters."""
+        payload = json.dumps(
+            [cls.FORMAT_VERSION, parts], sort_keys=True, default=str
+        ).encode()
+        return hashlib.sha1(payload).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def save(self, key: str, data: ProcessedData, state: Dict[str, Any]) -> None:
+        """Atomically write a snapshot of ``data`` taken at index ``state``."""
+        os.makedirs(self.directory, exist_ok=True)
+        columns = {
+            column: [getattr(doc, column) for doc in data.documents]
+            for column in self.COLUMNS
+        }
+        # The JSON file is written last, so it only names complete matrices
+        self._write(key, ".npy", lambda f: np.save(f, np.asarray(data.embeddings)))
+        self._write(
+            key,
+            ".json",
+            lambda f: f.write(
+                json.dumps({"state": state, "columns": columns}).encode()
+            ),
+        )
+
+    def _write(self, key: str, suffix: str, write) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, self._path(key, suffix))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, key: str) -> Optional[Tuple[ProcessedData, Dict[str, Any]]]:
+        """Load a snapshot and its index state, or None if missing or unreadable."""
+        json_path = self._path(key, ".json")
+        if not os.path.exists(json_path):
+            return None
+
+        try:
+            with open(json_path, "rb") as f:
+                snapshot = json.load(f)
+            embeddings = np.load(self._path(key, ".npy"))
+            columns = snapshot["columns"]
+            # Vectors stay in the matrix, as in a fresh load
+            documents = [
+                Document(
+                    embedding=[],
+                    **{column: columns[column][i] for column in self.COLUMNS},
+                )
+                for i in range(len(embeddings))
+            ]
+            if len(documents) != len(columns["id"]):
+                raise ValueError("embedding and document counts differ")
+            return (
+                ProcessedData(documents=documents, embeddings=embeddings),
+                snapshot["state"],
+            )
+        except Exception as e:
+            logger.warning(f"Discarding unreadable snapshot {json_path}: {e}")
+            return None
+
+    def clear(self) -> int:
+        """Remove every snapshot and return how many were deleted."""
+        if not os.path.isdir(self.directory):
+            return 0
+
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.endswith((".json", ".npy")):
+                os.remove(os.path.join(self.directory, name))
+                removed += name.endswith(".json")
+        return removed
+
+    @staticmethod
+    def is_current(stored: Dict[str, Any], current: Dict[str, Any]) -> bool:
+        """Whether the index has not changed since the snapshot was taken."""
+        return all(
+            stored.get(field) == current.get(field)
+            for field in ("uuids", "doc_count", "max_seq_no")
+        )
+
+    @staticmethod
+    def can_top_up(stored: Dict[str, Any], current: Dict[str, Any]) -> bool:
+        """Whether documents may have only been added since the snapshot.
+
+        That needs a snapshot of every matching document and a timestamp to
+        tell new documents apart. Whether the added documents account for
+        the whole change is checked against the cluster by the caller.
+        """
+        return bool(
+            stored.get("complete")
+            and stored.get("max_timestamp") is not None
+            and stored.get("uuids") == current.get("uuids")
+            and current.get("doc_count", 0) > stored.get("doc_count", 0)
+        )
@@ -0,0 +1,498 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import Callable, Dict, Optional, Tuple
+import threading
+import time
+import uuid
+import numpy as np
+from .reducers import ReducerFactory, dataset_fingerprint
+from .schemas import ReducedData
+from .store import ModelStore
+
+
+class ReductionQueueFullError(RuntimeError):
+    """Raised when the executor already holds its maximum number of jobs."""
+
+
+def run_reduction(
+    embeddings: np.ndarray,
+    method: str,
+    n_components: int,
+    random_state: int,
+    on_progress: Optional[Callable[[int, np.ndarray], None]] = None,
+    every: Optional[int] = None,
+    metric: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> ReducedData:
+    """Fit a reducer, going through the model store when one is configured.
+
+    When ``on_progress`` is given the reducer is fitted progressively and
+    reports intermediate layouts to it. ``fingerprint`` is the embeddings'
+    dataset_fingerprint, computed here when not given.
+    """
+    reducer = ReducerFactory.create_reducer(
+        method, n_components=n_components, random_state=random_state, metric=metric
+    )
+    reducer.fingerprint = fingerprint = fingerprint or dataset_fingerprint(embeddings)
+    fit: Optional[Callable[[np.ndarray], ReducedData]] = None
+    if on_progress is not None:
+
+        def fit_progressive(data):
+            return reducer.fit_transform_progressive(data, on_progress, every)
+
+        fit = fit_progressive
+
+    model_store = ModelStore.from_settings()
+    if model_store:
+        _, reduced_data = model_store.fit_transform(
+            reducer,
+            embeddings,
+            fit=fit,
+            progressive=fit is not None,
+            fingerprint=fingerprint,
+        )
+        return reduced_data
+    return (fit or reducer.fit_transform)(embeddings)
+
+
+def _read_shared(shm_name: str, shape: Tuple[int, ...], dtype: str) -> np.ndarray:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # Copy out of the segment: cached reducer state keeps references to
+        # the input, and the parent unlinks the segment once we return
+        return np.array(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+    finally:
+        shm.close()
+
+
+def _plain_result(reduced_data: ReducedData) -> ReducedData:
+    # Only plain arrays go back over the pipe, not library-specific subclasses
+    reduced_data.reduced_embeddings = np.asarray(reduced_data.reduced_embeddings)
+    return reduced_data
+
+
+def _reduce_shared(
+    shm_name: str,
+    shape: Tuple[int, ...],
+    dtype: str,
+    method: str,
+    n_components: int,
+    random_state: int,
+    metric: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> ReducedData:
+    """Worker entry point: read the dataset from shared memory and reduce it."""
+    embeddings = _read_shared(shm_name, shape, dtype)
+    return _plain_result(
+        run_reduction(
+            embeddings,
+            method,
+            n_components,
+            random_state,
+            metric=metric,
+            fingerprint=fingerprint,
+        )
+    )
+
+
+def _reduce_progressive(
+    shm_name: str,
+    shape: Tuple[int, ...],
+    dtype: str,
+    progress_name: str,
+    method: str,
+    n_components: int,
+    random_state: int,
+    every: Optional[int],
+    metric: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> ReducedData:
+    """Worker entry point that publishes intermediate layouts as it goes."""
+    embeddings = _read_shared(shm_name, shape, dtype)
+    progress = shared_memory.SharedMemory(name=progress_name)
+
+    def publish(current_step: int, current: np.ndarray):
+        # Short-lived views, so no buffer export outlives the segment
+        step, coordinates = ProgressiveJob.views(progress, shape[0], n_components)
+        coordinates[...] = current
+        step[0] = current_step
+
+    try:
+        # Give the browser the PCA layout to show while the optimizer spins up
+        pca = ReducerFactory.create_reducer(
+            "pca", n_components=n_components, random_state=random_state
+        )
+        pca.fingerprint = fingerprint
+        publish(0, pca.fit_transform(embeddings).reduced_embeddings)
+        return _plain_result(
+            run_reduction(
+                embeddings,
+                method,
+                n_components,
+                random_state,
+                publish,
+                every,
+                metric,
+                fingerprint,
+            )
+        )
+    finally:
+        progress.close()
+
+
+class ProgressiveJob:
+    """A running reduction whose latest layout can be read at any time.
+
+    The worker writes each intermediate layout into a shared-memory block
+    laid out as one int64 step counter followed by the float64 coordinates.
+    """
+
+    def __init__(self, n_points: int, n_components: int):
+        self.job_id = uuid.uuid4().hex
+        self.n_points = n_points
+        self.n_components = n_components
+        self.future: Future = Future()
+        self.finished_at: Optional[float] = None
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=8 * (1 + n_points * n_components)
+        )
+        step, _ = self.views(self._shm, n_points, n_components)
+        step[0] = -1
+
+    @staticmethod
+    def views(
+        shm: shared_memory.SharedMemory, n_points: int, n_components: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        step = np.ndarray((1,), dtype=np.int64, buffer=shm.buf)
+        coordinates = np.ndarray(
+            (n_points, n_components), dtype=np.float64, buffer=shm.buf, offset=8
+        )
+        return step, coordinates
+
+    @property
+    def shm_name(self) -> str:
+        return self._shm.name
+
+    def snapshot(self) -> Tuple[int, Optional[np.ndarray]]:
+        """Return the latest (step, coordinates), or (-1, None) before the
+        first layout has been published."""
+        step, coordinates = self.views(self._shm, self.n_points, self.n_components)
+        current_step = int(step[0])
+        if current_step < 0:
+            return current_step, None
+        return current_step, coordinates.copy()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> ReducedData:
+        return self.future.result(timeout)
+
+    def release(self):
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ReductionExecutor:
+    """Bounded process pool that runs reductions away from request threads.
+
+    Datasets are handed to workers through shared memory instead of being
+    pickled, identical in-flight requests share a single job, and at most
+    ``max_workers + queue_depth`` jobs are accepted at once. With
+    ``max_workers=0`` reductions run inline in the calling thread.
+    """
+
+    # Finished progressive jobs nobody collected are released after this long
+    JOB_TTL_SECONDS = 300
+
+    def __init__(self, max_workers: int = 2, queue_depth: int = 8):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max(1, max_workers + queue_depth))
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._in_flight_jobs: Dict[Tuple, ProgressiveJob] = {}
+        self._jobs: Dict[str, ProgressiveJob] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "ReductionExecutor":
+        from ..config.settings import AppSettings
+
+        return cls(
+            max_workers=AppSettings.REDUCTION_MAX_WORKERS,
+            queue_depth=AppSettings.REDUCTION_QUEUE_DEPTH,
+        )
+
+    @property
+    def supports_progress(self) -> bool:
+        """Progressive jobs need a worker process to run alongside requests."""
+        return self.max_workers > 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers avoid inheriting server threads and locks
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=get_context("spawn")
+            )
+        return self._pool
+
+    @staticmethod
+    def _make_key(
+        fingerprint: str,
+        method: str,
+        n_components: int,
+        random_state: int,
+        metric: Optional[str] = None,
+    ) -> Tuple:
+        return (
+            fingerprint,
+            method.lower(),
+            n_components,
+            random_state,
+            metric,
+        )
+
+    def _acquire_slot(self):
+        if not self._slots.acquire(blocking=False):
+            raise ReductionQueueFullError(
+                "Too many reductions are running; please try again shortly"
+            )
+
+    def submit(
+        self,
+        embeddings: np.ndarray,
+        method: str,
+        n_components: int,
+        random_state: int = 42,
+        metric: Optional[str] = None,
+    ) -> Future:
+        """Queue a reduction and return a future resolving to ReducedData."""
+        embeddings = np.ascontiguousarray(embeddings)
+        # Hashed once here; the key, model store and reducer state cache all
+        # reuse it
+        fingerprint = dataset_fingerprint(embeddings)
+        key = self._make_key(fingerprint, method, n_components, random_state, metric)
+
+        with self._lock:
+            if key in self._in_flight:
+                return self._in_flight[key]
+
+            self._acquire_slot()
+            future: Future = Future()
+            self._in_flight[key] = future
+
+        try:
+            self._start(
+                key,
+                future,
+                embeddings,
+                method,
+                n_components,
+                random_state,
+                metric=metric,
+                fingerprint=fingerprint,
+            )
+        except Exception as e:
+            self._settle(key, future, exception=e)
+        return future
+
+    def submit_progressive(
+        self,
+        embeddings: np.ndarray,
+        method: str,
+        n_components: int,
+        random_state: int = 42,
+        every: Optional[int] = None,
+        metric: Optional[str] = None,
+    ) -> ProgressiveJob:
+        """Queue a reduction that publishes intermediate layouts.
+
+        Poll the returned job's ``snapshot()`` (or look it up again later
+        with ``get_job``) and call ``discard_job`` once the final result has
+        been read.
+        """
+        if not self.supports_progress:
+            raise ValueError("Progressive reductions need at least one worker")
+
+        embeddings = np.ascontiguousarray(embeddings)
+        fingerprint = dataset_fingerprint(embeddings)
+        key = self._make_key(
+            fingerprint, method, n_components, random_state, metric
+        ) + ("progressive",)
+        self._prune_jobs()
+
+        with self._lock:
+            if key in self._in_flight_jobs:
+                return self._in_flight_jobs[key]
+
+            self._acquire_slot()
+            try:
+                job = ProgressiveJob(embeddings.shape[0], n_components)
+            except Exception:
+                self._slots.release()
+                raise
+            self._in_flight_jobs[key] = job
+            self._jobs[job.job_id] = job
+
+        try:
+            self._start(
+                key,
+                job.future,
+                embeddings,
+                method,
+                n_components,
+                random_state,
+                progress_name=job.shm_name,
+                every=every,
+                metric=metric,
+                fingerprint=fingerprint,
+            )
+        except Exception as e:
+            self._settle(key, job.future, exception=e)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ProgressiveJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def discard_job(self, job_id: str):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job.release()
+
+    def _prune_jobs(self):
+        cutoff = time.monotonic() - self.JOB_TTL_SECONDS
+        with self._lock:
+            stale = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+        for job_id in stale:
+            self.discard_job(job_id)
+
+    def _start(
+        self,
+        key: Tuple,
+        future: Future,
+        embeddings: np.ndarray,
+        method: str,
+        n_components: int,
+        random_state: int,
+        progress_name: Optional[str] = None,
+        every: Optional[int] = None,
+        metric: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+    ):
+        if self.max_workers <= 0:
+            self._settle(
+                key,
+                future,
+                result=run_reduction(
+                    embeddings,
+                    method,
+                    n_components,
+                    random_state,
+                    metric=metric,
+                    fingerprint=fingerprint,
+                ),
+            )
+            return
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, embeddings.nbytes))
+        try:
+            np.ndarray(embeddings.shape, dtype=embeddings.dtype, buffer=shm.buf)[
+                ...
+            ] = embeddings
+            args = (shm.name, embeddings.shape, embeddings.dtype.str)
+            if progress_name is None:
+                pool_future = self._get_pool().submit(
+                    _reduce_shared,
+                    *args,
+                    method,
+                    n_components,
+                    random_state,
+                    metric,
+                    fingerprint,
+                )
+            else:
+                pool_future = self._get_pool().submit(
+                    _reduce_progressive,
+                    *args,
+                    progress_name,
+                    method,
+                    n_components,
+                    random_state,
+                    every,
+                    metric,
+                    fingerprint,
+                )
+        except Exception:
+            self._release_shared(shm)
+            raise
+
+        def relay(done: Future):
+            self._release_shared(shm)
+            if done.exception() is not None:
+                self._settle(key, future, exception=done.exception())
+            else:
+                self._settle(key, future, result=done.result())
+
+        pool_future.add_done_callback(relay)
+
+    @staticmethod
+    def _release_shared(shm: shared_memory.SharedMemory):
+        try:
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _settle(
+        self,
+        key: Tuple,
+        future: Future,
+        result: Optional[ReducedData] = None,
+        exception: Optional[BaseException] = None,
+    ):
+        # Free the slot before waking waiters so a finished job never counts
+        # against the queue limit
+        with self._lock:
+            released = self._in_flight.pop(key, None) is not None
+            job = self._in_flight_jobs.pop(key, None)
+            if job is not None:
+                job.finished_at = time.monotonic()
+            if released or job is not None:
+                self._slots.release()
+
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def reduce(
+        self,
+        embeddings: np.ndarray,
+        method: str,
+        n_components: int,
+        random_state: int = 42,
+        metric: Optional[str] = None,
+    ) -> ReducedData:
+        """Run a reduction on the pool and block until its coordinates are ready."""
+        return self.submit(
+            embeddings, method, n_components, random_state, metric=metric
+        ).result()
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self.discard_job(job_id)
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Any, Tuple
 import logging
+from .schemas import Document
 
 
 logger = logging.getLogger(__name__)
@@ -17,6 +19,18 @@ class FieldMapping:
     subcategory_field: Optional[str] = None
     tags_field: Optional[str] = None
 
+    def source_fields(self) -> List[str]:
+        """Document fields the mapping reads, for ``_source`` filtering."""
+        fields = [
+            self.embedding_field,
+            self.text_field,
+            self.id_field,
+            self.category_field,
+            self.subcategory_field,
+            self.tags_field,
+        ]
+        return list(dict.fromkeys(field for field in fields if field))
+
 
 class FieldMapper:
     """Handles field mapping and data transformation from OpenSearch to standard format."""
@@ -183,6 +197,19 @@ class FieldMapper:
             List of transformed documents in standard format
         """
         transformed = []
+        get_embedding = FieldMapper.accessor(mapping.embedding_field)
+        get_text = FieldMapper.accessor(mapping.text_field)
+        optional_fields: List[Tuple[str, Optional[str], Callable[[Any], Any]]] = [
+            ("id", mapping.id_field, str),
+            ("category", mapping.category_field, str),
+            ("subcategory", mapping.subcategory_field, str),
+            ("tags", mapping.tags_field, FieldMapper._tags),
+        ]
+        optional_getters = [
+            (key, FieldMapper.accessor(field), convert)
+            for key, field, convert in optional_fields
+            if field
+        ]
 
         for doc in documents:
             try:
@@ -190,16 +217,18 @@ class FieldMapper:
                 standard_doc = {}
 
                 # Required fields
-                if mapping.embedding_field in doc:
-                    standard_doc["embedding"] = doc[mapping.embedding_field]
+                embedding = get_embedding(doc)
+                if embedding is not None:
+                    standard_doc["embedding"] = embedding
                 else:
                     logger.warning(
                         f"Missing embedding field '{mapping.embedding_field}' in document"
                     )
                     continue
 
-                if mapping.text_field in doc:
-                    standard_doc["text"] = str(doc[mapping.text_field])
+                text = get_text(doc)
+                if text is not None:
+                    standard_doc["text"] = str(text)
                 else:
                     logger.warning(
                         f"Missing text field '{mapping.text_field}' in document"
@@ -207,22 +236,10 @@ class FieldMapper:
                     continue
 
                 # Optional fields
-                if mapping.id_field and mapping.id_field in doc:
-                    standard_doc["id"] = str(doc[mapping.id_field])
-
-                if mapping.category_field and mapping.category_field in doc:
-                    standard_doc["category"] = str(doc[mapping.category_field])
-
-                if mapping.subcategory_field and mapping.subcategory_field in doc:
-                    standard_doc["subcategory"] = str(doc[mapping.subcategory_field])
-
-                if mapping.tags_field and mapping.tags_field in doc:
-                    tags = doc[mapping.tags_field]
-                    # Handle both string and list tags
-                    if isinstance(tags, list):
-                        standard_doc["tags"] = [str(tag) for tag in tags]
-                    else:
-                        standard_doc["tags"] = [str(tags)]
+                for key, get, convert in optional_getters:
+                    value = get(doc)
+                    if value is not None:
+                        standard_doc[key] = convert(value)
 
                 transformed.append(standard_doc)
 
@@ -233,6 +250,96 @@ class FieldMapper:
         logger.info(f"Transformed {len(transformed)} documents out of {len(documents)}")
         return transformed
 
+    @staticmethod
+    def to_document(
+        doc: Dict[str, Any], mapping: FieldMapping, default_id: str = ""
+    ) -> Optional[Document]:
+        """
+        Build a Document straight from a raw OpenSearch document.
+
+        Unlike ``transform_documents`` no intermediate dict is built, and the
+        embedding list is referenced rather than copied. Returns None if a
+        required field is missing. Use ``document_builder`` when converting
+        many documents with the same mapping.
+        """
+        return FieldMapper.document_builder(mapping)(doc, default_id)
+
+    @staticmethod
+    def document_builder(
+        mapping: FieldMapping,
+    ) -> Callable[..., Optional[Document]]:
+        """Compile ``to_document`` for one mapping.
+
+        Field accessors are resolved once, so each document only pays for
+        the lookups themselves.
+        """
+        get_embedding = FieldMapper.accessor(mapping.embedding_field)
+        get_text = FieldMapper.accessor(mapping.text_field)
+        get_id, get_category, get_subcategory, get_tags = (
+            FieldMapper.accessor(field) if field else None
+            for field in (
+                mapping.id_field,
+                mapping.category_field,
+                mapping.subcategory_field,
+                mapping.tags_field,
+            )
+        )
+
+        def optional(get, doc):
+            value = get(doc) if get else None
+            return None if value is None else str(value)
+
+        def build(doc: Dict[str, Any], default_id: str = "") -> Optional[Document]:
+            embedding = get_embedding(doc)
+            text = get_text(doc)
+            if embedding is None or text is None:
+                return None
+
+            tags = get_tags(doc) if get_tags else None
+            return Document(
+                id=optional(get_id, doc) or default_id,
+                text=str(text),
+                embedding=embedding,
+                category=optional(get_category, doc),
+                subcategory=optional(get_subcategory, doc),
+                tags=None if tags is None else FieldMapper._tags(tags),
+            )
+
+        return build
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def accessor(path: str) -> Callable[[Dict[str, Any]], Any]:
+        """Getter for a field of a raw document, or None when it is missing.
+
+        Dotted paths (fields inside object mappings) walk the nested
+        ``_source``; a literal dotted key, as written by some indexers,
+        takes precedence.
+        """
+        if "." not in path:
+            return lambda doc: doc.get(path)
+
+        parts = path.split(".")
+
+        def get(doc: Dict[str, Any]) -> Any:
+            if path in doc:
+                return doc[path]
+            value: Any = doc
+            for part in parts:
+                if not isinstance(value, dict):
+                    return None
+                value = value.get(part)
+            return value
+
+        return get
+
+    @staticmethod
+    def _tags(tags: Any) -> List[str]:
+        # Handle both string and list tags
+        if isinstance(tags, list):
+            return [str(tag) for tag in tags]
+        return [str(tags)]
+
     @staticmethod
     def create_mapping_from_dict(mapping_dict: Dict[str, str]) -> FieldMapping:
         """
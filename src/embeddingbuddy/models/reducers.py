@@ -1,16 +1,131 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+import copy
+import hashlib
+import threading
 import numpy as np
-from sklearn.decomposition import PCA
+import scipy.sparse as sp
+from sklearn.decomposition import PCA, TruncatedSVD
+from sklearn.random_projection import (
+    GaussianRandomProjection,
+    SparseRandomProjection,
+)
+from sklearn.utils import check_random_state
 import umap
-from openTSNE import TSNE
+
+# Private layout internals: umap-learn is pinned to the 0.5 series they were
+# tested against
+from umap.layouts import _get_optimize_layout_euclidean_single_epoch_fn
+from umap.umap_ import make_epochs_per_sample
+from openTSNE import TSNE, affinity
 from .schemas import ReducedData
 
 
+# Rows of a dense matrix are hashed in blocks of about this many bytes
+FINGERPRINT_BLOCK_BYTES = 64 << 20
+
+
+def dataset_fingerprint(embeddings: Any) -> str:
+    """Return a stable content hash identifying an embedding matrix.
+
+    Dense (including memory-mapped) matrices are hashed in row blocks, so
+    only one block is ever copied into memory.
+    """
+    if sp.issparse(embeddings):
+        csr = embeddings.tocsr()
+        digest = hashlib.sha1(f"csr{csr.dtype.str}{csr.shape}".encode())
+        for part in (csr.data, csr.indices, csr.indptr):
+            digest.update(np.ascontiguousarray(part).data)
+        return digest.hexdigest()
+
+    data = np.asanyarray(embeddings)
+    digest = hashlib.sha1(f"{data.dtype.str}{data.shape}".encode())
+    row_bytes = max(1, data.itemsize * int(np.prod(data.shape[1:])))
+    block_rows = max(1, FINGERPRINT_BLOCK_BYTES // row_bytes)
+    for start in range(0, max(1, data.shape[0]), block_rows):
+        # Contiguous row slices are hashed in place
+        block = np.ascontiguousarray(data[start : start + block_rows])
+        digest.update(block.data.cast("B"))
+    return digest.hexdigest()
+
+
+def transform_in_chunks(
+    transform: Callable[[Any], np.ndarray], embeddings: Any, chunk_size: int
+) -> np.ndarray:
+    """Apply a fitted transform over row blocks of a (possibly memory-mapped
+    or sparse) matrix so only one block is materialized at a time."""
+    n_samples = embeddings.shape[0]
+    if n_samples <= chunk_size:
+        return transform(embeddings)
+
+    chunks = [
+        transform(embeddings[start : start + chunk_size])
+        for start in range(0, n_samples, chunk_size)
+    ]
+    return np.vstack(chunks)
+
+
+class ReducerStateCache:
+    """Small LRU cache for dimension-independent reducer state.
+
+    Entries are keyed by reducer method, dataset fingerprint and any
+    parameters the state depends on, so switching between 2D and 3D on the
+    same dataset reuses the expensive part of the fit.
+    """
+
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = build()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+state_cache = ReducerStateCache()
+
+
 class DimensionalityReducer(ABC):
-    def __init__(self, n_components: int = 3, random_state: int = 42):
+    # Whether fit_transform_progressive ends in the layout fit_transform
+    # gives; stored models of the two are kept apart when it does not
+    PROGRESSIVE_MATCHES_FIT = True
+
+    def __init__(
+        self,
+        n_components: int = 3,
+        random_state: int = 42,
+        metric: Optional[str] = None,
+    ):
         self.n_components = n_components
         self.random_state = random_state
-        self._reducer = None
+        # Input-space distance for neighbour-based reducers; None keeps the
+        # library default (euclidean)
+        self.metric = metric
+        # The fitted library estimator (or embedding) behind the last fit
+        self._reducer: Any = None
+        # dataset_fingerprint of the data about to be fitted, when the caller
+        # has already computed it
+        self.fingerprint: Optional[str] = None
 
     @abstractmethod
     def fit_transform(self, embeddings: np.ndarray) -> ReducedData:
@@ -20,12 +135,59 @@ class DimensionalityReducer(ABC):
     def get_method_name(self) -> str:
         pass
 
+    def fit_transform_progressive(
+        self,
+        embeddings: np.ndarray,
+        on_progress: Callable[[int, np.ndarray], None],
+        every: Optional[int] = None,
+    ) -> ReducedData:
+        """Fit like fit_transform, reporting intermediate layouts.
+
+        ``on_progress(step, coordinates)`` is called as the optimization
+        advances. Reducers without an iterative optimizer only report the
+        final layout.
+        """
+        reduced_data = self.fit_transform(embeddings)
+        on_progress(1, reduced_data.reduced_embeddings)
+        return reduced_data
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        """Project new points into the fitted layout."""
+        if self._reducer is None:
+            raise ValueError(f"{self.get_method_name()} reducer has not been fitted")
+        # Cached PCA/SVD fits may carry more components than requested
+        return np.asarray(self._reducer.transform(embeddings))[:, : self.n_components]
+
+    def _get_cached_state(
+        self, embeddings: np.ndarray, build: Callable[[], Any], *params: Hashable
+    ) -> Any:
+        key = (
+            self.get_method_name(),
+            self.fingerprint or dataset_fingerprint(embeddings),
+            self.random_state,
+            self.metric,
+        ) + params
+        return state_cache.get_or_create(key, build)
+
 
 class PCAReducer(DimensionalityReducer):
+    # A single fit with this many components serves both the 2D and 3D views
+    MAX_CACHED_COMPONENTS = 3
+
     def fit_transform(self, embeddings: np.ndarray) -> ReducedData:
-        self._reducer = PCA(n_components=self.n_components)
-        reduced = self._reducer.fit_transform(embeddings)
-        variance_explained = self._reducer.explained_variance_ratio_
+        n_fit = max(
+            self.n_components, min(self.MAX_CACHED_COMPONENTS, *embeddings.shape)
+        )
+
+        def build():
+            pca = PCA(n_components=n_fit)
+            return pca, pca.fit_transform(embeddings)
+
+        self._reducer, transformed = self._get_cached_state(embeddings, build, n_fit)
+        reduced = transformed[:, : self.n_components]
+        variance_explained = self._reducer.explained_variance_ratio_[
+            : self.n_components
+        ]
 
         return ReducedData(
             reduced_embeddings=reduced,
@@ -39,11 +201,56 @@ class PCAReducer(DimensionalityReducer):
 
 
 class TSNEReducer(DimensionalityReducer):
+    PERPLEXITY = 30
+    PROGRESS_EVERY_ITERS = 25
+
     def fit_transform(self, embeddings: np.ndarray) -> ReducedData:
-        self._reducer = TSNE(
-            n_components=self.n_components, random_state=self.random_state
+        return self._fit(embeddings)
+
+    def fit_transform_progressive(
+        self,
+        embeddings: np.ndarray,
+        on_progress: Callable[[int, np.ndarray], None],
+        every: Optional[int] = None,
+    ) -> ReducedData:
+        every = every or self.PROGRESS_EVERY_ITERS
+        iterations = 0
+
+        def callback(iteration, error, embedding):
+            # openTSNE restarts its counter for each optimization phase
+            nonlocal iterations
+            iterations += every
+            on_progress(iterations, np.asarray(embedding))
+
+        reduced_data = self._fit(
+            embeddings, callbacks=callback, callbacks_every_iters=every
         )
-        reduced = self._reducer.fit(embeddings)
+        # Later transforms must not report progress, and the embedding has
+        # to stay picklable for the model store
+        self._reducer.gradient_descent_params["callbacks"] = None
+        return reduced_data
+
+    def _fit(self, embeddings: np.ndarray, **tsne_params) -> ReducedData:
+        # The P matrix does not depend on the output dimension
+        affinities = self._get_cached_state(
+            embeddings,
+            lambda: affinity.PerplexityBasedNN(
+                embeddings,
+                perplexity=self.PERPLEXITY,
+                metric=self.metric or "euclidean",
+                random_state=self.random_state,
+            ),
+            self.PERPLEXITY,
+        )
+
+        # Keep the TSNEEmbedding rather than the estimator: it carries the
+        # affinities needed to transform new points
+        self._reducer = TSNE(
+            n_components=self.n_components,
+            random_state=self.random_state,
+            **tsne_params,
+        ).fit(embeddings, affinities=affinities)
+        reduced = np.asarray(self._reducer)
 
         return ReducedData(
             reduced_embeddings=reduced,
@@ -57,12 +264,130 @@ class TSNEReducer(DimensionalityReducer):
 
 
 class UMAPReducer(DimensionalityReducer):
+    PROGRESS_EVERY_EPOCHS = 20
+    PROGRESSIVE_MATCHES_FIT = False
+
     def fit_transform(self, embeddings: np.ndarray) -> ReducedData:
-        self._reducer = umap.UMAP(
-            n_components=self.n_components, random_state=self.random_state
+        self._reducer = self._create_layout_model(embeddings)
+        reduced, _ = self._reducer._fit_embed_data(
+            self._reducer._raw_data,
+            self._reducer.n_epochs,
+            self._reducer.init,
+            check_random_state(self.random_state),
+        )
+        self._reducer.embedding_ = reduced
+        return self._reduced_data(reduced)
+
+    def fit_transform_progressive(
+        self,
+        embeddings: np.ndarray,
+        on_progress: Callable[[int, np.ndarray], None],
+        every: Optional[int] = None,
+    ) -> ReducedData:
+        """Optimize the layout epoch by epoch from a PCA start, reporting it
+        every ``every`` epochs.
+
+        The epochs run UMAP's own single-epoch SGD kernel with one linearly
+        decaying learning rate and edge sampling schedule, exactly as its
+        one-shot layout does. Only the start differs: the cached PCA layout
+        instead of the spectral embedding, so the final layout is not the
+        one ``fit_transform`` produces (see ``PROGRESSIVE_MATCHES_FIT``).
+        """
+        every = every or self.PROGRESS_EVERY_EPOCHS
+        self._reducer = model = self._create_layout_model(embeddings)
+        random_state = check_random_state(self.random_state)
+
+        graph = model.graph_.tocoo()
+        graph.sum_duplicates()
+        n_epochs = model.n_epochs or (500 if graph.shape[0] <= 10000 else 200)
+        graph.data[graph.data < (graph.data.max() / float(n_epochs))] = 0.0
+        graph.eliminate_zeros()
+        epochs_per_sample = make_epochs_per_sample(graph.data, n_epochs)
+
+        # Start from the (cached) PCA layout scaled into UMAP's usual box
+        pca = PCAReducer(n_components=self.n_components, random_state=self.random_state)
+        pca.fingerprint = self.fingerprint
+        embedding = pca.fit_transform(embeddings).reduced_embeddings
+        span = np.ptp(embedding, axis=0)
+        span[span == 0] = 1.0
+        embedding = np.ascontiguousarray(
+            10.0 * (embedding - embedding.min(axis=0)) / span, dtype=np.float32
+        )
+        on_progress(0, embedding)
+
+        # The sampling state lives across all epochs, as in
+        # umap.layouts.optimize_layout_euclidean
+        epochs_per_negative_sample = epochs_per_sample / model.negative_sample_rate
+        epoch_of_next_negative_sample = epochs_per_negative_sample.copy()
+        epoch_of_next_sample = epochs_per_sample.copy()
+        int32 = np.iinfo(np.int32)
+        rng_state = random_state.randint(int32.min, int32.max, 3).astype(np.int64)
+        rng_state_per_sample = np.full(
+            (embedding.shape[0], len(rng_state)), rng_state, dtype=np.int64
+        ) + embedding[:, 0].astype(np.float64).view(np.int64).reshape(-1, 1)
+        # densMAP is off; its buffers only need the kernel's types
+        unused = np.zeros(1, dtype=np.float32)
+        optimize_epoch = _get_optimize_layout_euclidean_single_epoch_fn(False)
+
+        alpha = model._initial_alpha
+        for epoch in range(n_epochs):
+            optimize_epoch(
+                embedding,
+                embedding,
+                graph.row,
+                graph.col,
+                graph.shape[1],
+                epochs_per_sample,
+                model._a,
+                model._b,
+                rng_state_per_sample,
+                model.repulsion_strength,
+                self.n_components,
+                True,
+                alpha,
+                epochs_per_negative_sample,
+                epoch_of_next_negative_sample,
+                epoch_of_next_sample,
+                epoch,
+                False,
+                unused,
+                unused,
+                0,
+                0,
+                0,
+                0,
+                unused,
+                unused,
+                0,
+            )
+            alpha = model._initial_alpha * (1.0 - float(epoch) / float(n_epochs))
+            if (epoch + 1) % every == 0 or epoch + 1 == n_epochs:
+                on_progress(epoch + 1, embedding)
+
+        model.embedding_ = embedding
+        return self._reduced_data(embedding)
+
+    def _create_layout_model(self, embeddings: np.ndarray) -> umap.UMAP:
+        # Fitting in "graph" mode builds only the fuzzy simplicial set, which
+        # does not depend on the output dimension
+        graph_model = self._get_cached_state(
+            embeddings,
+            lambda: umap.UMAP(
+                metric=self.metric or "euclidean",
+                random_state=self.random_state,
+                transform_mode="graph",
+            ).fit(embeddings),
         )
-        reduced = self._reducer.fit_transform(embeddings)
 
+        model = copy.copy(graph_model)
+        # The layout step prunes weak edges in place, so never touch the
+        # cached graph
+        model.graph_ = graph_model.graph_.copy()
+        model.n_components = self.n_components
+        model.transform_mode = "embedding"
+        return model
+
+    def _reduced_data(self, reduced: np.ndarray) -> ReducedData:
         return ReducedData(
             reduced_embeddings=reduced,
             variance_explained=None,
@@ -74,22 +399,163 @@ class UMAPReducer(DimensionalityReducer):
         return "UMAP"
 
 
+class RandomProjectionReducer(DimensionalityReducer):
+    """Gaussian random projection.
+
+    Fitting only draws the projection matrix from the input dimensionality,
+    so the cost is a single streaming pass over the rows.
+    """
+
+    CHUNK_SIZE = 65536
+
+    def _create_projection(self):
+        return GaussianRandomProjection(
+            n_components=self.n_components, random_state=self.random_state
+        )
+
+    def fit_transform(self, embeddings: np.ndarray) -> ReducedData:
+        self._reducer = self._create_projection()
+        # Fitting only needs the feature count, so use a single row
+        self._reducer.fit(embeddings[:1])
+        # Both projections give dense output, also for sparse input
+        reduced = transform_in_chunks(
+            self._reducer.transform, embeddings, self.CHUNK_SIZE
+        )
+
+        return ReducedData(
+            reduced_embeddings=reduced,
+            variance_explained=None,
+            method=self.get_method_name(),
+            n_components=self.n_components,
+        )
+
+    def get_method_name(self) -> str:
+        return "Random Projection"
+
+
+class SparseRandomProjectionReducer(RandomProjectionReducer):
+    """Sparse (Achlioptas/Li) random projection for very high-dimensional
+    or sparse inputs such as SPLADE vectors."""
+
+    def _create_projection(self):
+        return SparseRandomProjection(
+            n_components=self.n_components,
+            dense_output=True,
+            random_state=self.random_state,
+        )
+
+    def get_method_name(self) -> str:
+        return "Sparse Random Projection"
+
+
+class TruncatedSVDReducer(DimensionalityReducer):
+    """Randomized truncated SVD; accepts sparse and memory-mapped input.
+
+    Inputs with more than ``FIT_SAMPLE_SIZE`` rows are fitted on a seeded
+    random sample of rows, and every row is then projected in chunks, so
+    memory use does not grow with the number of rows.
+    """
+
+    MAX_CACHED_COMPONENTS = 3
+    CHUNK_SIZE = 65536
+    FIT_SAMPLE_SIZE = 100000
+
+    def fit_transform(self, embeddings: np.ndarray) -> ReducedData:
+        n_features = embeddings.shape[1]
+        if n_features <= self.n_components:
+            # TruncatedSVD needs strictly fewer components than features
+            return self._fit_pca(embeddings)
+
+        n_fit = max(self.n_components, min(self.MAX_CACHED_COMPONENTS, n_features - 1))
+
+        def build():
+            svd = TruncatedSVD(n_components=n_fit, random_state=self.random_state)
+            svd.fit(self._fit_sample(embeddings))
+            return svd, transform_in_chunks(svd.transform, embeddings, self.CHUNK_SIZE)
+
+        self._reducer, transformed = self._get_cached_state(embeddings, build, n_fit)
+        reduced = transformed[:, : self.n_components]
+        variance_explained = self._reducer.explained_variance_ratio_[
+            : self.n_components
+        ]
+
+        return ReducedData(
+            reduced_embeddings=reduced,
+            variance_explained=variance_explained,
+            method=self.get_method_name(),
+            n_components=self.n_components,
+        )
+
+    def _fit_sample(self, embeddings: Any) -> Any:
+        n_samples = embeddings.shape[0]
+        if n_samples <= self.FIT_SAMPLE_SIZE:
+            return embeddings
+        rows = check_random_state(self.random_state).choice(
+            n_samples, self.FIT_SAMPLE_SIZE, replace=False
+        )
+        # Sorted rows read memory-mapped input sequentially
+        return embeddings[np.sort(rows)]
+
+    def _fit_pca(self, embeddings: Any) -> ReducedData:
+        # Too few features to truncate: project onto all of them with PCA
+        if sp.issparse(embeddings):
+            embeddings = embeddings.toarray()
+        pca = PCAReducer(n_components=self.n_components, random_state=self.random_state)
+        reduced_data = pca.fit_transform(embeddings)
+        self._reducer = pca._reducer
+        return reduced_data
+
+    def get_method_name(self) -> str:
+        return "Truncated SVD"
+
+
 class ReducerFactory:
     @staticmethod
     def create_reducer(
-        method: str, n_components: int = 3, random_state: int = 42
+        method: str,
+        n_components: int = 3,
+        random_state: int = 42,
+        metric: Optional[str] = None,
     ) -> DimensionalityReducer:
+        """Create a reducer by name.
+
+        ``metric`` only applies to the neighbour-based methods (t-SNE and
+        UMAP); the linear projections ignore it.
+        """
         method_lower = method.lower()
 
         if method_lower == "pca":
             return PCAReducer(n_components=n_components, random_state=random_state)
         elif method_lower == "tsne":
-            return TSNEReducer(n_components=n_components, random_state=random_state)
+            return TSNEReducer(
+                n_components=n_components, random_state=random_state, metric=metric
+            )
         elif method_lower == "umap":
-            return UMAPReducer(n_components=n_components, random_state=random_state)
+            return UMAPReducer(
+                n_components=n_components, random_state=random_state, metric=metric
+            )
+        elif method_lower == "random_projection":
+            return RandomProjectionReducer(
+                n_components=n_components, random_state=random_state
+            )
+        elif method_lower == "sparse_random_projection":
+            return SparseRandomProjectionReducer(
+                n_components=n_components, random_state=random_state
+            )
+        elif method_lower == "truncated_svd":
+            return TruncatedSVDReducer(
+                n_components=n_components, random_state=random_state
+            )
         else:
             raise ValueError(f"Unknown reduction method: {method}")
 
     @staticmethod
     def get_available_methods() -> list:
-        return ["pca", "tsne", "umap"]
+        return [
+            "pca",
+            "tsne",
+            "umap",
+            "random_projection",
+            "sparse_random_projection",
+            "truncated_svd",
+        ]
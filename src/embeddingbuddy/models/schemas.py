@@ -26,6 +26,8 @@ class ProcessedData:
     documents: List[Document]
     embeddings: np.ndarray
     error: Optional[str] = None
+    # Set when a load stopped at its document or memory limit
+    truncated: bool = False
 
     def __post_init__(self):
         if self.embeddings is not None and not isinstance(self.embeddings, np.ndarray):
@@ -50,6 +52,10 @@ class PlotData:
     coordinates: np.ndarray
     prompts: Optional[List[Document]] = None
     prompt_coordinates: Optional[np.ndarray] = None
+    # Hover label per document and per prompt (PlotFactory.hover_text);
+    # built on first render when not given
+    hover_text: Optional[np.ndarray] = None
+    prompt_hover_text: Optional[np.ndarray] = None
 
     def __post_init__(self):
         if not isinstance(self.coordinates, np.ndarray):
@@ -0,0 +1,143 @@
+from typing import Callable, Optional, Tuple
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import numpy as np
+import openTSNE
+import sklearn
+import umap
+from .reducers import DimensionalityReducer, dataset_fingerprint
+from .schemas import ReducedData
+
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStore:
+    """Local on-disk store of fitted reducers and their layouts.
+
+    Entries are keyed by dataset fingerprint and reducer parameters so any
+    worker (or a restarted server) can reproduce a layout or transform new
+    points without refitting. Files are pickles, so the directory must only
+    be writable by trusted processes.
+    """
+
+    FORMAT_VERSION = 1
+    FILE_SUFFIX = ".pkl"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @classmethod
+    def from_settings(cls) -> Optional["ModelStore"]:
+        """Return the configured store, or None when persistence is disabled."""
+        from ..config.settings import AppSettings
+
+        if not AppSettings.MODEL_STORE_DIR:
+            return None
+        return cls(AppSettings.MODEL_STORE_DIR)
+
+    @classmethod
+    def make_key(
+        cls,
+        reducer: DimensionalityReducer,
+        fingerprint: str,
+        progressive: bool = False,
+    ) -> str:
+        # Library versions are part of the key so upgrades never unpickle
+        # incompatible models
+        parts = [
+            str(cls.FORMAT_VERSION),
+            reducer.get_method_name(),
+            fingerprint,
+            str(reducer.n_components),
+            str(reducer.random_state),
+            sklearn.__version__,
+            umap.__version__,
+            openTSNE.__version__,
+        ]
+        if reducer.metric:
+            # Appended only when set, so existing default-metric models keep
+            # their keys
+            parts.append(reducer.metric)
+        if progressive and not reducer.PROGRESSIVE_MATCHES_FIT:
+            parts.append("progressive")
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.FILE_SUFFIX}")
+
+    def save(
+        self, key: str, reducer: DimensionalityReducer, reduced_data: ReducedData
+    ) -> None:
+        """Atomically write a fitted reducer and its layout to the store."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((reducer, reduced_data), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, key: str) -> Optional[Tuple[DimensionalityReducer, ReducedData]]:
+        """Load a stored reducer and layout, or None if missing or unreadable."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable model store entry {path}: {e}")
+            return None
+
+    def fit_transform(
+        self,
+        reducer: DimensionalityReducer,
+        embeddings: np.ndarray,
+        fit: Optional[Callable[[np.ndarray], ReducedData]] = None,
+        progressive: bool = False,
+        fingerprint: Optional[str] = None,
+    ) -> Tuple[DimensionalityReducer, ReducedData]:
+        """Reuse a stored fit for these embeddings, fitting and saving on a miss.
+
+        ``fit`` overrides how ``reducer`` is fitted on a miss; pass
+        ``progressive=True`` when it is the reducer's progressive fit.
+        Returns the fitted reducer (which may be the stored instance rather
+        than ``reducer``) together with its layout. Pass ``fingerprint`` when
+        the caller already has the embeddings' dataset_fingerprint.
+        """
+        key = self.make_key(
+            reducer,
+            fingerprint or dataset_fingerprint(embeddings),
+            progressive=progressive,
+        )
+
+        stored = self.load(key)
+        if stored is not None:
+            return stored
+
+        reduced_data = (fit or reducer.fit_transform)(embeddings)
+        try:
+            self.save(key, reducer, reduced_data)
+        except Exception as e:
+            logger.warning(f"Could not persist fitted reducer: {e}")
+        return reducer, reduced_data
+
+    def clear(self) -> int:
+        """Remove every stored entry and return how many were deleted."""
+        if not os.path.isdir(self.directory):
+            return 0
+
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(self.FILE_SUFFIX):
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        return removed
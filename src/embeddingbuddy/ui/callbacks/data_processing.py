@@ -1,15 +1,31 @@
-from dash import callback, Input, Output, State, no_update, html
+from dataclasses import asdict
+from functools import partial
+import hashlib
+import json
+import logging
+import numpy as np
+from dash import callback, clientside_callback, Input, Output, State, no_update, html
 from ...data.processor import DataProcessor
-from ...data.sources.opensearch import OpenSearchClient
+from ...data.sources.connections import OpenSearchConnectionManager
+from ...data.sources.opensearch import read_ahead
+from ...data.sources.snapshots import SnapshotStore
+from ...models.reducers import dataset_fingerprint
 from ...models.field_mapper import FieldMapper
+from ...models.schemas import ProcessedData
 from ...config.settings import AppSettings
 
 
+logger = logging.getLogger(__name__)
+
+
 class DataProcessingCallbacks:
     def __init__(self):
         self.processor = DataProcessor()
-        self.opensearch_client_data = OpenSearchClient()  # For data/documents
-        self.opensearch_client_prompts = OpenSearchClient()  # For prompts
+        # OpenSearch clients per browser session, URL and credentials
+        self.opensearch_connections = OpenSearchConnectionManager()
+        self.snapshot_store = SnapshotStore.from_settings()
+        # Running OpenSearch loads: token -> (documents loaded, expected total)
+        self._load_progress = {}
         self._register_callbacks()
 
     def _register_callbacks(self):
@@ -40,12 +56,7 @@ class DataProcessingCallbacks:
                 )
 
             return (
-                {
-                    "documents": [
-                        self._document_to_dict(doc) for doc in processed_data.documents
-                    ],
-                    "embeddings": processed_data.embeddings.tolist(),
-                },
+                self._stored_data("documents", processed_data),
                 "",
                 False,  # Hide error alert
             )
@@ -65,12 +76,7 @@ class DataProcessingCallbacks:
             if processed_data.error:
                 return {"error": processed_data.error}
 
-            return {
-                "prompts": [
-                    self._document_to_dict(doc) for doc in processed_data.documents
-                ],
-                "embeddings": processed_data.embeddings.tolist(),
-            }
+            return self._stored_data("prompts", processed_data)
 
         # OpenSearch callbacks
         @callback(
@@ -95,10 +101,9 @@ class DataProcessingCallbacks:
 
         # Register callbacks for both data and prompts sections (only if OpenSearch is enabled)
         if AppSettings.OPENSEARCH_ENABLED:
-            self._register_opensearch_callbacks("data", self.opensearch_client_data)
-            self._register_opensearch_callbacks(
-                "prompts", self.opensearch_client_prompts
-            )
+            self._register_session_callback()
+            self._register_opensearch_callbacks("data")
+            self._register_opensearch_callbacks("prompts")
 
         # Register collapsible section callbacks
         self._register_collapse_callbacks()
@@ -106,8 +111,25 @@ class DataProcessingCallbacks:
         # Register text input callbacks
         self._register_text_input_callbacks()
 
-    def _register_opensearch_callbacks(self, section_type, opensearch_client):
+    def _register_session_callback(self):
+        """Give each browser session an id to keep its OpenSearch clients under."""
+        clientside_callback(
+            """
+            function(modified, sessionId) {
+                if (sessionId) {
+                    return window.dash_clientside.no_update;
+                }
+                return Date.now().toString(36) + Math.random().toString(36).slice(2);
+            }
+            """,
+            Output("session-id", "data"),
+            Input("session-id", "modified_timestamp"),
+            State("session-id", "data"),
+        )
+
+    def _register_opensearch_callbacks(self, section_type):
         """Register callbacks for a specific section (data or prompts)."""
+        connections = self.opensearch_connections
 
         @callback(
             Output(f"{section_type}-auth-collapse", "is_open"),
@@ -149,11 +171,12 @@ class DataProcessingCallbacks:
                 State(f"{section_type}-opensearch-username", "value"),
                 State(f"{section_type}-opensearch-password", "value"),
                 State(f"{section_type}-opensearch-api-key", "value"),
+                State("session-id", "data"),
             ],
             prevent_initial_call=True,
         )
         def test_opensearch_connection(
-            n_clicks, url, index_name, username, password, api_key
+            n_clicks, url, index_name, username, password, api_key, session_id
         ):
             if not n_clicks or not url or not index_name:
                 return (
@@ -170,14 +193,26 @@ class DataProcessingCallbacks:
                     no_update,
                 )
 
-            # Test connection
-            success, message = opensearch_client.connect(
-                url=url,
-                username=username,
-                password=password,
-                api_key=api_key,
-                verify_certs=AppSettings.OPENSEARCH_VERIFY_CERTS,
+            opensearch_client = connections.acquire(
+                session_id, url, username, password, api_key
             )
+            try:
+                # Test connection
+                success, message = opensearch_client.connect(
+                    url=url,
+                    username=username,
+                    password=password,
+                    api_key=api_key,
+                    verify_certs=AppSettings.OPENSEARCH_VERIFY_CERTS,
+                )
+
+                # Analyze fields
+                if success:
+                    analyzed, field_analysis, analysis_message = (
+                        opensearch_client.analyze_fields(index_name)
+                    )
+            finally:
+                connections.release(opensearch_client)
 
             if not success:
                 return (
@@ -194,12 +229,7 @@ class DataProcessingCallbacks:
                     [],
                 )
 
-            # Analyze fields
-            success, field_analysis, analysis_message = (
-                opensearch_client.analyze_fields(index_name)
-            )
-
-            if not success:
+            if not analyzed:
                 return (
                     self._create_status_alert(f"❌ {analysis_message}", "danger"),
                     [],
@@ -261,6 +291,38 @@ class DataProcessingCallbacks:
             "processed-data" if section_type == "data" else "processed-prompts"
         )
 
+        # A token per load click lets the progress poll find this load
+        clientside_callback(
+            """
+            function(nClicks) {
+                if (!nClicks) {
+                    const noUpdate = window.dash_clientside.no_update;
+                    return [noUpdate, noUpdate];
+                }
+                return [Date.now().toString(36) + Math.random().toString(36).slice(2), false];
+            }
+            """,
+            [
+                Output(f"{section_type}-load-token", "data"),
+                Output(f"{section_type}-load-progress-interval", "disabled"),
+            ],
+            Input(f"{section_type}-load-opensearch-data-btn", "n_clicks"),
+            prevent_initial_call=True,
+        )
+
+        @callback(
+            Output(f"{section_type}-load-progress", "children"),
+            Input(f"{section_type}-load-progress-interval", "n_intervals"),
+            State(f"{section_type}-load-token", "data"),
+            prevent_initial_call=True,
+        )
+        def update_load_progress(n_intervals, token):
+            # Loads running in another server process are not visible here
+            progress = self._load_progress.get(token)
+            if progress is None:
+                return no_update
+            return self._create_load_progress(*progress)
+
         @callback(
             [
                 Output(output_target, "data", allow_duplicate=True),
@@ -268,40 +330,76 @@ class DataProcessingCallbacks:
                 Output("opensearch-success-alert", "is_open", allow_duplicate=True),
                 Output("opensearch-error-alert", "children", allow_duplicate=True),
                 Output("opensearch-error-alert", "is_open", allow_duplicate=True),
+                Output(
+                    f"{section_type}-load-progress-interval",
+                    "disabled",
+                    allow_duplicate=True,
+                ),
+                Output(
+                    f"{section_type}-load-progress", "children", allow_duplicate=True
+                ),
             ],
-            [Input(f"{section_type}-load-opensearch-data-btn", "n_clicks")],
+            [Input(f"{section_type}-load-token", "data")],
             [
                 State(f"{section_type}-opensearch-index", "value"),
                 State(f"{section_type}-opensearch-query-size", "value"),
+                State(f"{section_type}-opensearch-sampling", "value"),
+                State(f"{section_type}-opensearch-query", "value"),
+                State("processed-prompts", "data"),
                 State(f"{section_type}-embedding-field-dropdown-ui", "value"),
                 State(f"{section_type}-text-field-dropdown-ui", "value"),
                 State(f"{section_type}-id-field-dropdown-ui", "value"),
                 State(f"{section_type}-category-field-dropdown-ui", "value"),
                 State(f"{section_type}-subcategory-field-dropdown-ui", "value"),
                 State(f"{section_type}-tags-field-dropdown-ui", "value"),
+                State(f"{section_type}-opensearch-url", "value"),
+                State(f"{section_type}-opensearch-username", "value"),
+                State(f"{section_type}-opensearch-password", "value"),
+                State(f"{section_type}-opensearch-api-key", "value"),
+                State("session-id", "data"),
             ],
             prevent_initial_call=True,
         )
         def load_opensearch_data(
-            n_clicks,
+            token,
             index_name,
             query_size,
+            sampling,
+            query_text,
+            prompts_data,
             embedding_field,
             text_field,
             id_field,
             category_field,
             subcategory_field,
             tags_field,
+            url,
+            username,
+            password,
+            api_key,
+            session_id,
         ):
-            if not n_clicks or not index_name or not embedding_field or not text_field:
-                return no_update, no_update, no_update, no_update, no_update
+            if not token or not index_name or not embedding_field or not text_field:
+                return (no_update,) * 5 + (True, no_update)
 
+            opensearch_client = connections.acquire(
+                session_id, url, username, password, api_key
+            )
             try:
-                # Validate and set query size
-                if not query_size or query_size < 1:
-                    query_size = AppSettings.OPENSEARCH_DEFAULT_SIZE
-                elif query_size > 1000:
-                    query_size = 1000  # Cap at reasonable maximum
+                # Reconnect if the client was closed while idle
+                if not opensearch_client.is_connected():
+                    success, message = opensearch_client.connect(
+                        url=url,
+                        username=username,
+                        password=password,
+                        api_key=api_key,
+                        verify_certs=AppSettings.OPENSEARCH_VERIFY_CERTS,
+                    )
+                    if not success:
+                        return (no_update, "", False, f"❌ {message}", True, True, "")
+
+                # No size means as many documents as the memory budget allows
+                max_documents = query_size if query_size and query_size > 0 else None
 
                 # Create field mapping
                 field_mapping = FieldMapper.create_mapping_from_dict(
@@ -315,23 +413,50 @@ class DataProcessingCallbacks:
                     }
                 )
 
-                # Fetch data from OpenSearch
-                success, raw_documents, message = opensearch_client.fetch_data(
-                    index_name, size=query_size
+                problem = None
+                try:
+                    query = self._parse_query(query_text)
+                except ValueError as e:
+                    problem = f"Invalid query: {e}"
+                prompt_vectors = (prompts_data or {}).get("embeddings") or []
+                if sampling == "stratified" and not category_field:
+                    problem = "Stratified sampling needs a category field"
+                elif sampling == "knn" and not prompt_vectors:
+                    problem = "Load prompts first to find their nearest neighbours"
+                if problem:
+                    return (no_update, "", False, f"❌ {problem}", True, True, "")
+
+                if sampling == "knn":
+                    total = len(prompt_vectors) * AppSettings.OPENSEARCH_KNN_K
+                else:
+                    total = opensearch_client.count_documents(index_name, query)
+                if total is not None and max_documents:
+                    total = min(total, max_documents)
+                self._load_progress[token] = (0, total)
+
+                def report(loaded):
+                    self._load_progress[token] = (loaded, total)
+
+                # A mapped vector field fixes the matrix width up front and
+                # the distance the reducers should use
+                vector_field = (
+                    opensearch_client.vector_field(index_name, embedding_field) or {}
                 )
-
-                if not success:
-                    return (
-                        no_update,
-                        "",
-                        False,
-                        f"❌ Failed to fetch {section_type}: {message}",
-                        True,
-                    )
-
-                # Process the data
-                processed_data = self.processor.process_opensearch_data(
-                    raw_documents, field_mapping
+                dimension = vector_field.get("dimension")
+                if not isinstance(dimension, int):
+                    dimension = None
+
+                # Fetch and process the data page by page
+                processed_data, source_note = self._load_opensearch_documents(
+                    opensearch_client,
+                    index_name,
+                    field_mapping,
+                    sampling,
+                    max_documents,
+                    query,
+                    prompt_vectors,
+                    report,
+                    dimension,
                 )
 
                 if processed_data.error:
@@ -341,42 +466,43 @@ class DataProcessingCallbacks:
                         False,
                         f"❌ {section_type.title()} processing error: {processed_data.error}",
                         True,
+                        True,
+                        "",
                     )
 
                 success_message = f"✅ Successfully loaded {len(processed_data.documents)} {section_type} from OpenSearch"
+                if total and len(processed_data.documents) < total:
+                    success_message += f" (of {total:,} available)"
+                success_message += source_note
 
                 # Format for appropriate target (data vs prompts)
-                if section_type == "data":
-                    return (
-                        {
-                            "documents": [
-                                self._document_to_dict(doc)
-                                for doc in processed_data.documents
-                            ],
-                            "embeddings": processed_data.embeddings.tolist(),
-                        },
-                        success_message,
-                        True,
-                        "",
-                        False,
-                    )
-                else:  # prompts
-                    return (
-                        {
-                            "prompts": [
-                                self._document_to_dict(doc)
-                                for doc in processed_data.documents
-                            ],
-                            "embeddings": processed_data.embeddings.tolist(),
-                        },
-                        success_message,
-                        True,
-                        "",
-                        False,
-                    )
+                key = "documents" if section_type == "data" else "prompts"
+                result = self._stored_data(key, processed_data)
+                if vector_field.get("metric"):
+                    result["metric"] = vector_field["metric"]
+                return (
+                    result,
+                    success_message,
+                    True,
+                    "",
+                    False,
+                    True,
+                    "",
+                )
 
             except Exception as e:
-                return (no_update, "", False, f"❌ Unexpected error: {str(e)}", True)
+                return (
+                    no_update,
+                    "",
+                    False,
+                    f"❌ Unexpected error: {str(e)}",
+                    True,
+                    True,
+                    "",
+                )
+            finally:
+                connections.release(opensearch_client)
+                self._load_progress.pop(token, None)
 
         # Sync callbacks to update hidden dropdowns from UI dropdowns
         @callback(
@@ -643,12 +769,7 @@ class DataProcessingCallbacks:
                 )
 
             return (
-                {
-                    "documents": [
-                        self._document_to_dict(doc) for doc in processed_data.documents
-                    ],
-                    "embeddings": processed_data.embeddings.tolist(),
-                },
+                self._stored_data("documents", processed_data),
                 f"✅ Generated embeddings for {len(processed_data.documents)} text chunks",
                 "success",
                 {"display": "block"},
@@ -694,12 +815,38 @@ Let the bread dough rise for at least an hour in a warm, draft-free spot."""
             # Return a simple fallback if there's any error
             return "This is sample text for testing embedding generation. You can replace this with your own text."
 
+    @classmethod
+    def _stored_data(cls, key: str, processed_data: ProcessedData) -> dict:
+        """Store payload of loaded documents (``key``) and their embeddings.
+
+        The embeddings are shipped once, as a matrix in ``embeddings``; the
+        per-document dicts only carry the fields the plots display.
+
+        ``digest`` identifies the dataset: the plot callbacks key rendered
+        figures on it instead of hashing every document on each update.
+        """
+        documents = [cls._document_to_dict(doc) for doc in processed_data.documents]
+        digest = hashlib.sha1(dataset_fingerprint(processed_data.embeddings).encode())
+        for doc in documents:
+            fields = (
+                doc["id"],
+                doc["text"],
+                doc["category"],
+                doc["subcategory"],
+                doc["tags"],
+            )
+            digest.update(repr(fields).encode())
+        return {
+            key: documents,
+            "embeddings": processed_data.embeddings.tolist(),
+            "digest": digest.hexdigest(),
+        }
+
     @staticmethod
     def _document_to_dict(doc):
         return {
             "id": doc.id,
             "text": doc.text,
-            "embedding": doc.embedding,
             "category": doc.category,
             "subcategory": doc.subcategory,
             "tags": doc.tags,
@@ -746,6 +893,239 @@ Let the bread dough rise for at least an hour in a warm, draft-free spot."""
                 "Please check that your file is valid NDJSON with required 'text' and 'embedding' fields."
             )
 
+    def _load_opensearch_documents(
+        self,
+        opensearch_client,
+        index_name,
+        field_mapping,
+        sampling,
+        max_documents,
+        query,
+        prompt_vectors,
+        on_progress,
+        dimension=None,
+    ):
+        """Load documents from OpenSearch, reusing a local snapshot when the
+        index has not changed (or has only had documents added) since.
+
+        Returns the processed data and a note on where it came from.
+        """
+
+        def fetch(query, id_offset=0):
+            pages = self._opensearch_pages(
+                opensearch_client,
+                index_name,
+                field_mapping,
+                sampling,
+                max_documents,
+                query,
+                prompt_vectors,
+            )
+            return self.processor.process_opensearch_pages(
+                pages,
+                field_mapping,
+                max_documents=max_documents,
+                max_bytes=AppSettings.OPENSEARCH_MAX_LOAD_BYTES,
+                on_progress=on_progress,
+                id_offset=id_offset,
+                dimension=dimension,
+            )
+
+        store = self.snapshot_store
+        timestamp_field = AppSettings.OPENSEARCH_TIMESTAMP_FIELD or None
+        state = store and opensearch_client.index_state(index_name, timestamp_field)
+        if not state:
+            return fetch(query), ""
+
+        key = store.make_key(
+            cluster=opensearch_client.connection_info,
+            index=index_name,
+            mapping=asdict(field_mapping),
+            query=query,
+            sampling=sampling,
+            max_documents=max_documents,
+            max_bytes=AppSettings.OPENSEARCH_MAX_LOAD_BYTES,
+            seed=AppSettings.OPENSEARCH_SAMPLE_SEED,
+            knn=(
+                [
+                    dataset_fingerprint(np.asarray(prompt_vectors)),
+                    AppSettings.OPENSEARCH_KNN_K,
+                ]
+                if sampling == "knn"
+                else None
+            ),
+        )
+        snapshot = store.load(key)
+        if snapshot:
+            stored, stored_state = snapshot
+            if store.is_current(stored_state, state):
+                return stored, " (from local snapshot)"
+            if store.can_top_up(stored_state, state):
+                added = self._top_up(
+                    opensearch_client,
+                    index_name,
+                    query,
+                    timestamp_field,
+                    stored,
+                    stored_state,
+                    state,
+                    fetch,
+                )
+                if added is not None:
+                    data = ProcessedData(
+                        documents=stored.documents + added.documents,
+                        embeddings=(
+                            np.vstack([stored.embeddings, added.embeddings])
+                            if added.documents
+                            else stored.embeddings
+                        ),
+                        truncated=added.truncated,
+                    )
+                    self._save_snapshot(
+                        store, key, data, state, sampling, max_documents
+                    )
+                    return data, (
+                        f" (local snapshot plus {len(added.documents):,} new)"
+                    )
+
+        data = fetch(query)
+        if not data.error:
+            self._save_snapshot(store, key, data, state, sampling, max_documents)
+        return data, ""
+
+    @staticmethod
+    def _top_up(
+        opensearch_client,
+        index_name,
+        query,
+        timestamp_field,
+        stored,
+        stored_state,
+        state,
+        fetch,
+    ):
+        """Documents added since a snapshot, or None if the index changed in
+        other ways too (or they could not be fetched)."""
+        since = {
+            "range": {
+                timestamp_field: {
+                    "gt": stored_state["max_timestamp"],
+                    "format": "epoch_millis",
+                }
+            }
+        }
+        # Every new document must be newer than the snapshot, or some were
+        # also updated or deleted
+        added_count = state["doc_count"] - stored_state["doc_count"]
+        if opensearch_client.count_documents(index_name, since) != added_count:
+            return None
+
+        new_query = {"bool": {"filter": [since] + ([query] if query else [])}}
+        if opensearch_client.count_documents(index_name, new_query) == 0:
+            return ProcessedData(documents=[], embeddings=np.array([]))
+        added = fetch(new_query, id_offset=len(stored.documents))
+        return None if added.error else added
+
+    @staticmethod
+    def _save_snapshot(store, key, data, state, sampling, max_documents):
+        # Only a snapshot of every matching document can be topped up later
+        complete = sampling == "first" and not max_documents and not data.truncated
+        try:
+            store.save(key, data, dict(state, complete=complete))
+        except Exception as e:
+            logger.warning(f"Could not save OpenSearch snapshot: {e}")
+
+    @staticmethod
+    def _opensearch_pages(
+        opensearch_client,
+        index_name,
+        field_mapping,
+        sampling,
+        max_documents,
+        query=None,
+        prompt_vectors=None,
+    ):
+        """Pages of raw documents for the chosen sampling mode and query."""
+        source_fields = field_mapping.source_fields()
+        page_size = None
+        if max_documents:
+            page_size = min(max_documents, AppSettings.OPENSEARCH_PAGE_SIZE)
+
+        # Sliced and random loads read ahead already; the others are wrapped
+        if sampling == "knn":
+            return read_ahead(
+                [
+                    partial(
+                        opensearch_client.iter_knn_pages,
+                        index_name,
+                        field_mapping.embedding_field,
+                        prompt_vectors,
+                        AppSettings.OPENSEARCH_KNN_K,
+                        source_fields=source_fields,
+                        query=query,
+                    )
+                ]
+            )
+
+        # Strata need a sample size; without one, load a random sample that
+        # fills the memory budget
+        if sampling == "stratified" and max_documents:
+            return read_ahead(
+                [
+                    partial(
+                        opensearch_client.iter_stratified_pages,
+                        index_name,
+                        field_mapping.category_field,
+                        max_documents,
+                        seed=AppSettings.OPENSEARCH_SAMPLE_SEED,
+                        page_size=page_size,
+                        source_fields=source_fields,
+                        query=query,
+                    )
+                ]
+            )
+        if sampling in ("random", "stratified"):
+            return opensearch_client.iter_random_pages(
+                index_name,
+                seed=AppSettings.OPENSEARCH_SAMPLE_SEED,
+                page_size=page_size,
+                source_fields=source_fields,
+                query=query,
+            )
+        return opensearch_client.iter_pages_parallel(
+            index_name, page_size=page_size, source_fields=source_fields, query=query
+        )
+
+    @staticmethod
+    def _parse_query(query_text):
+        """Query DSL typed in the load section, or None when left empty.
+
+        Accepts either a bare query or a search body with a "query" key.
+
+        Raises:
+            ValueError: If the text is not a JSON object.
+        """
+        if not query_text or not query_text.strip():
+            return None
+        query = json.loads(query_text)
+        if not isinstance(query, dict):
+            raise ValueError("expected a JSON object")
+        return query.get("query", query)
+
+    @staticmethod
+    def _create_load_progress(loaded: int, total=None):
+        """Progress bar for a running OpenSearch load."""
+        import dash_bootstrap_components as dbc
+
+        if not total:
+            return html.Small(f"Loaded {loaded:,} documents...", className="text-muted")
+        return dbc.Progress(
+            value=min(100, 100 * loaded / total),
+            label=f"{loaded:,} / {total:,}",
+            striped=True,
+            animated=True,
+        )
+
     @staticmethod
     def _create_status_alert(message: str, color: str):
         """Create a status alert component."""
@@ -1,107 +1,554 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import uuid
 import numpy as np
-from dash import callback, Input, Output
+from dash import callback, ctx, Input, Output, Patch, State, no_update
 import plotly.graph_objects as go
+from ...config.settings import AppSettings
+from ...models.executor import ReductionExecutor
 from ...models.reducers import ReducerFactory
 from ...models.schemas import Document, PlotData
+from ...visualization.cache import FigureCache
 from ...visualization.plots import PlotFactory
+from ...visualization.raster import DensityRasterizer
 
 
 class VisualizationCallbacks:
+    """Server-side plot callbacks.
+
+    The server renders a figure whenever the projection changes. Color,
+    category filter and prompt visibility are applied in the browser by the
+    ``plot.restyle`` clientside callback from the styles in ``plot-styles``;
+    only level-of-detail plots, whose overview image depends on them, come
+    back to the server through ``plot-restyle-request``.
+
+    Final (non-progressive, non-LOD) figures are kept in a ``FigureCache``
+    so revisiting a projection is served from memory.
+    """
+
+    # Level-of-detail plots whose data is kept for viewport updates
+    LOD_VIEWS_CACHED = 4
+    # Loaded datasets whose documents and hover labels are kept, by digest
+    LAYERS_CACHED = 4
+
     def __init__(self):
         self.plot_factory = PlotFactory()
+        self.executor = ReductionExecutor.from_settings()
+        self.figure_cache = FigureCache(AppSettings.FIGURE_CACHE_MAX_BYTES)
+        self._lod_views: OrderedDict = OrderedDict()
+        self._layers: OrderedDict = OrderedDict()
         self._register_callbacks()
 
     def _register_callbacks(self):
         @callback(
-            Output("embedding-plot", "figure"),
+            [
+                Output("embedding-plot", "figure"),
+                Output("reduction-progress", "data"),
+                Output("reduction-progress-interval", "disabled"),
+                Output("plot-state", "data"),
+                Output("plot-styles", "data"),
+            ],
             [
                 Input("processed-data", "data"),
                 Input("processed-prompts", "data"),
                 Input("method-dropdown", "value"),
-                Input("color-dropdown", "value"),
                 Input("dimension-toggle", "value"),
-                Input("show-prompts-toggle", "value"),
+                Input("density-toggle", "value"),
+                Input("plot-restyle-request", "data"),
+            ],
+            [
+                State("color-dropdown", "value"),
+                State("show-prompts-toggle", "value"),
+                State("category-filter", "value"),
+                State("plot-state", "data"),
             ],
         )
-        def update_plot(data, prompts_data, method, color_by, dimensions, show_prompts):
+        def update_plot(
+            data,
+            prompts_data,
+            method,
+            dimensions,
+            density_mode,
+            restyle_request,
+            color_by,
+            show_prompts,
+            hidden,
+            plot_state,
+        ):
             if not data or "error" in data:
-                return go.Figure().add_annotation(
-                    text="Upload a valid NDJSON file to see visualization",
-                    xref="paper",
-                    yref="paper",
-                    x=0.5,
-                    y=0.5,
-                    xanchor="center",
-                    yanchor="middle",
-                    showarrow=False,
-                    font=dict(size=16),
+                return (
+                    self._message_figure(
+                        "Upload a valid NDJSON file to see visualization"
+                    ),
+                    None,
+                    True,
+                    None,
+                    None,
                 )
 
+            density = "density" in (density_mode or [])
             try:
-                doc_embeddings = np.array(data["embeddings"])
-                all_embeddings = doc_embeddings
-                has_prompts = (
-                    prompts_data
-                    and "error" not in prompts_data
-                    and prompts_data.get("prompts")
-                )
+                if ctx.triggered_id == "plot-restyle-request":
+                    if not plot_state or not plot_state["view_id"]:
+                        # Regular plots are restyled in the browser
+                        return no_update, no_update, no_update, no_update, no_update
 
-                if has_prompts:
-                    prompt_embeddings = np.array(prompts_data["embeddings"])
-                    all_embeddings = np.vstack([doc_embeddings, prompt_embeddings])
+                    entry = self._lod_entry(plot_state)
+                    if entry is not None:
+                        entry.update(
+                            color_by=restyle_request["color_by"],
+                            show_prompts=restyle_request["show_prompts"],
+                            hidden=restyle_request["hidden"],
+                        )
+                        figure = self._patch_lod_style(entry, plot_state["view"])
+                        return figure, no_update, no_update, no_update, no_update
+                    # The plot data lives in another server process: rebuild
 
+                cache_key = self._figure_cache_key(
+                    data, prompts_data, method, dimensions, show_prompts, density
+                )
+                cached = cache_key and self.figure_cache.get(cache_key)
+                if cached:
+                    figure, styles = cached
+                    return figure, None, True, {"view_id": None, "view": None}, styles
+
+                all_embeddings = self._combine_embeddings(data, prompts_data)
                 n_components = 3 if dimensions == "3d" else 2
 
-                reducer = ReducerFactory.create_reducer(
-                    method, n_components=n_components
+                if self._is_progressive(method):
+                    job = self.executor.submit_progressive(
+                        all_embeddings,
+                        method,
+                        n_components,
+                        random_state=AppSettings.DEFAULT_RANDOM_STATE,
+                        metric=data.get("metric"),
+                    )
+                    step, coordinates = job.snapshot()
+                    if coordinates is None:
+                        # The worker publishes its PCA starting layout shortly;
+                        # the progress poll picks it up
+                        return (
+                            self._message_figure(self._optimizing_label(method)),
+                            {"job_id": job.job_id, "step": step},
+                            False,
+                            {"view_id": None, "view": None},
+                            None,
+                        )
+                    figure, plot_state, styles = self._build_figure(
+                        data,
+                        prompts_data,
+                        coordinates,
+                        self._optimizing_label(method),
+                        dimensions,
+                        color_by,
+                        show_prompts,
+                        hidden,
+                        density=density,
+                    )
+                    return (
+                        figure,
+                        {"job_id": job.job_id, "step": step},
+                        False,
+                        plot_state,
+                        styles,
+                    )
+
+                reduced_data = self.executor.reduce(
+                    all_embeddings,
+                    method,
+                    n_components,
+                    random_state=AppSettings.DEFAULT_RANDOM_STATE,
+                    metric=data.get("metric"),
                 )
-                reduced_data = reducer.fit_transform(all_embeddings)
-
-                doc_reduced = reduced_data.reduced_embeddings[: len(doc_embeddings)]
-                prompt_reduced = None
-                if has_prompts:
-                    prompt_reduced = reduced_data.reduced_embeddings[
-                        len(doc_embeddings) :
-                    ]
-
-                documents = [self._dict_to_document(doc) for doc in data["documents"]]
-                prompts = None
-                if has_prompts:
-                    prompts = [
-                        self._dict_to_document(prompt)
-                        for prompt in prompts_data["prompts"]
-                    ]
-
-                plot_data = PlotData(
-                    documents=documents,
-                    coordinates=doc_reduced,
-                    prompts=prompts,
-                    prompt_coordinates=prompt_reduced,
+                figure, plot_state, styles = self._build_figure(
+                    data,
+                    prompts_data,
+                    reduced_data.reduced_embeddings,
+                    reduced_data.method,
+                    dimensions,
+                    color_by,
+                    show_prompts,
+                    hidden,
+                    density=density,
+                    cache_key=cache_key,
                 )
+                return figure, None, True, plot_state, styles
 
-                return self.plot_factory.create_plot(
-                    plot_data, dimensions, color_by, reduced_data.method, show_prompts
+            except Exception as e:
+                return (
+                    self._message_figure(f"Error creating visualization: {str(e)}"),
+                    None,
+                    True,
+                    None,
+                    None,
                 )
 
+        @callback(
+            [
+                Output("embedding-plot", "figure", allow_duplicate=True),
+                Output("reduction-progress", "data", allow_duplicate=True),
+                Output("reduction-progress-interval", "disabled", allow_duplicate=True),
+                Output("plot-state", "data", allow_duplicate=True),
+                Output("plot-styles", "data", allow_duplicate=True),
+            ],
+            Input("reduction-progress-interval", "n_intervals"),
+            [
+                State("reduction-progress", "data"),
+                State("plot-state", "data"),
+                State("processed-data", "data"),
+                State("processed-prompts", "data"),
+                State("method-dropdown", "value"),
+                State("color-dropdown", "value"),
+                State("dimension-toggle", "value"),
+                State("show-prompts-toggle", "value"),
+                State("category-filter", "value"),
+                State("density-toggle", "value"),
+            ],
+            prevent_initial_call=True,
+        )
+        def update_progressive_plot(
+            n_intervals,
+            progress,
+            plot_state,
+            data,
+            prompts_data,
+            method,
+            color_by,
+            dimensions,
+            show_prompts,
+            hidden,
+            density_mode,
+        ):
+            if not progress or not data or "error" in data:
+                return no_update, None, True, no_update, no_update
+
+            # Keep the user's zoom while the layout converges
+            view = plot_state["view"] if plot_state else None
+            density = "density" in (density_mode or [])
+
+            try:
+                all_embeddings = self._combine_embeddings(data, prompts_data)
+                job = self.executor.get_job(progress["job_id"])
+                if job is None:
+                    # Started by another server process (or already collected):
+                    # finish with a regular reduction
+                    reduced_data = self.executor.reduce(
+                        all_embeddings,
+                        method,
+                        3 if dimensions == "3d" else 2,
+                        random_state=AppSettings.DEFAULT_RANDOM_STATE,
+                        metric=data.get("metric"),
+                    )
+                elif job.done():
+                    reduced_data = job.result()
+                    self.executor.discard_job(job.job_id)
+                else:
+                    step, coordinates = job.snapshot()
+                    if coordinates is None or step <= progress["step"]:
+                        return no_update, no_update, no_update, no_update, no_update
+
+                    figure, plot_state, styles = self._build_figure(
+                        data,
+                        prompts_data,
+                        coordinates,
+                        self._optimizing_label(method),
+                        dimensions,
+                        color_by,
+                        show_prompts,
+                        hidden,
+                        view,
+                        density=density,
+                    )
+                    return (
+                        figure,
+                        {"job_id": job.job_id, "step": step},
+                        no_update,
+                        plot_state,
+                        styles,
+                    )
+
+                figure, plot_state, styles = self._build_figure(
+                    data,
+                    prompts_data,
+                    reduced_data.reduced_embeddings,
+                    reduced_data.method,
+                    dimensions,
+                    color_by,
+                    show_prompts,
+                    hidden,
+                    view,
+                    density=density,
+                    cache_key=self._figure_cache_key(
+                        data, prompts_data, method, dimensions, show_prompts, density
+                    ),
+                )
+                return figure, None, True, plot_state, styles
+
             except Exception as e:
-                return go.Figure().add_annotation(
-                    text=f"Error creating visualization: {str(e)}",
-                    xref="paper",
-                    yref="paper",
-                    x=0.5,
-                    y=0.5,
-                    xanchor="center",
-                    yanchor="middle",
-                    showarrow=False,
-                    font=dict(size=16),
+                return (
+                    self._message_figure(f"Error creating visualization: {str(e)}"),
+                    None,
+                    True,
+                    None,
+                    None,
                 )
 
+        @callback(
+            [
+                Output("embedding-plot", "figure", allow_duplicate=True),
+                Output("plot-state", "data", allow_duplicate=True),
+            ],
+            Input("embedding-plot", "relayoutData"),
+            State("plot-state", "data"),
+            prevent_initial_call=True,
+        )
+        def update_viewport(relayout_data, plot_state):
+            # Only level-of-detail plots fetch points per viewport; the
+            # browser already holds every point of regular plots
+            entry = self._lod_entry(plot_state)
+            if not relayout_data or entry is None:
+                return no_update, no_update
+
+            extent = DensityRasterizer.extent(entry["plot_data"].coordinates)
+            view = self._relayout_view(relayout_data, plot_state["view"], extent)
+            if view is None:
+                return no_update, no_update
+
+            return self._patch_lod_view(entry, view), dict(plot_state, view=view)
+
+    def _is_progressive(self, method: str) -> bool:
+        return (
+            AppSettings.PROGRESSIVE_RENDERING
+            and self.executor.supports_progress
+            and method in AppSettings.PROGRESSIVE_METHODS
+        )
+
+    @staticmethod
+    def _optimizing_label(method: str) -> str:
+        method_name = ReducerFactory.create_reducer(method).get_method_name()
+        return f"{method_name} (optimizing...)"
+
+    @staticmethod
+    def _combine_embeddings(data, prompts_data) -> np.ndarray:
+        doc_embeddings = np.array(data["embeddings"])
+        if VisualizationCallbacks._has_prompts(prompts_data):
+            prompt_embeddings = np.array(prompts_data["embeddings"])
+            return np.vstack([doc_embeddings, prompt_embeddings])
+        return doc_embeddings
+
+    @staticmethod
+    def _has_prompts(prompts_data) -> bool:
+        return bool(
+            prompts_data and "error" not in prompts_data and prompts_data.get("prompts")
+        )
+
+    def _build_figure(
+        self,
+        data,
+        prompts_data,
+        coordinates,
+        method_name,
+        dimensions,
+        color_by,
+        show_prompts,
+        hidden,
+        view=None,
+        density=False,
+        cache_key=None,
+    ) -> Tuple[go.Figure, Dict, Dict]:
+        """Build the figure, the plot-state describing it and its styles.
+
+        For level-of-detail plots the state points at data kept on the
+        server, so ``update_viewport`` can patch its view and LOD restyles
+        can re-render it. Other figures are stored in the figure cache under
+        ``cache_key``.
+        """
+        plot_data = self._plot_data(data, prompts_data, coordinates)
+        styles = self.plot_factory.create_styles(
+            plot_data, dimensions, method_name, density
+        )
+        plot_state = {"view_id": None, "view": view}
+
+        if not self.plot_factory.uses_lod(plot_data, dimensions, density):
+            figure = self.plot_factory.create_plot(
+                plot_data, dimensions, color_by, method_name, show_prompts
+            )
+            if cache_key is not None:
+                figure = self.figure_cache.put(cache_key, figure, styles)
+            return figure, plot_state, styles
+
+        view_id = uuid.uuid4().hex
+        entry = {
+            "plot_data": plot_data,
+            "method_name": method_name,
+            "color_by": color_by,
+            "show_prompts": show_prompts,
+            "hidden": hidden,
+            "density": density,
+        }
+        self._lod_views[view_id] = entry
+        while len(self._lod_views) > self.LOD_VIEWS_CACHED:
+            self._lod_views.popitem(last=False)
+        return self._render_lod(entry, view), dict(plot_state, view_id=view_id), styles
+
+    @staticmethod
+    def _figure_cache_key(
+        data, prompts_data, method, dimensions, show_prompts, density
+    ) -> Optional[Tuple]:
+        """Key a rendered figure by its projection and display options.
+
+        Datasets are identified by the digest computed when they were
+        loaded. Color is applied in the browser, so it is not part of the
+        key. Data without a digest gets no key and is not cached.
+        """
+        digests = [data.get("digest")]
+        if VisualizationCallbacks._has_prompts(prompts_data):
+            digests.append(prompts_data.get("digest"))
+        if not all(digests):
+            return None
+
+        return (
+            tuple(digests),
+            method,
+            data.get("metric"),
+            dimensions,
+            AppSettings.DEFAULT_RANDOM_STATE,
+            tuple(show_prompts or ()),
+            density,
+        )
+
+    def _lod_entry(self, plot_state) -> Optional[Dict]:
+        if not plot_state or not plot_state["view_id"]:
+            return None
+        return self._lod_views.get(plot_state["view_id"])
+
+    def _render_lod(self, entry: Dict, view) -> go.Figure:
+        return self.plot_factory.create_plot(
+            entry["plot_data"],
+            "2d",
+            entry["color_by"],
+            entry["method_name"],
+            entry["show_prompts"],
+            view,
+            entry["hidden"],
+            entry["density"],
+        )
+
+    def _patch_lod_style(self, entry: Dict, view) -> Patch:
+        """Restyle a level-of-detail plot in place.
+
+        Color, category filter and prompt visibility change the traces, the
+        title and the overview image; the axes and the rest of the layout
+        already in the browser are kept.
+        """
+        rendered = self._render_lod(entry, view).to_dict()
+        layout = rendered["layout"]
+        figure = Patch()
+        figure["data"] = rendered["data"]
+        figure["layout"]["title"]["text"] = layout["title"]["text"]
+        figure["layout"]["images"] = layout.get("images", [])
+        return figure
+
+    def _patch_lod_view(self, entry: Dict, view) -> Patch:
+        """Move a level-of-detail plot to ``view`` without re-sending it.
+
+        Only the document points and the title depend on the view; the
+        overview image, prompts and legend already in the browser are kept.
+        """
+        points, title = self.plot_factory.create_lod_view(
+            entry["plot_data"],
+            entry["color_by"],
+            entry["method_name"],
+            view,
+            entry["hidden"],
+            entry["density"],
+        )
+        figure = Patch()
+        figure["data"][0] = points
+        figure["layout"]["title"]["text"] = title
+        figure["layout"]["xaxis"]["range"] = view[:2]
+        figure["layout"]["yaxis"]["range"] = view[2:]
+        return figure
+
+    def _plot_data(self, data, prompts_data, coordinates) -> PlotData:
+        n_documents = len(data["documents"])
+        has_prompts = self._has_prompts(prompts_data)
+
+        documents, hover_text = self._layer(data, "documents")
+        prompts, prompt_hover_text = None, None
+        if has_prompts:
+            prompts, prompt_hover_text = self._layer(prompts_data, "prompts")
+
+        return PlotData(
+            documents=documents,
+            coordinates=coordinates[:n_documents],
+            prompts=prompts,
+            prompt_coordinates=coordinates[n_documents:] if has_prompts else None,
+            hover_text=hover_text,
+            prompt_hover_text=prompt_hover_text,
+        )
+
+    def _layer(self, stored, key: str) -> Tuple[List[Document], np.ndarray]:
+        """Documents of a stored dataset (``key``) and their hover labels.
+
+        Both are built once per dataset, identified by the digest computed
+        when it was loaded, rather than on every render.
+        """
+        digest = stored.get("digest")
+        if digest in self._layers:
+            self._layers.move_to_end(digest)
+            return self._layers[digest]
+
+        documents = [self._dict_to_document(doc) for doc in stored[key]]
+        layer = (documents, self.plot_factory.hover_text(documents))
+        if digest:
+            self._layers[digest] = layer
+            while len(self._layers) > self.LAYERS_CACHED:
+                self._layers.popitem(last=False)
+        return layer
+
+    @staticmethod
+    def _relayout_view(relayout_data, current, extent) -> Optional[List[float]]:
+        """Apply a plotly relayout event to the current (x0, x1, y0, y1) view.
+
+        Returns None when the event does not change the axis ranges.
+        """
+        view = list(current or extent)
+        changed = False
+        for axis, offset in (("xaxis", 0), ("yaxis", 2)):
+            if relayout_data.get(f"{axis}.autorange"):
+                view[offset : offset + 2] = extent[offset : offset + 2]
+            elif f"{axis}.range[0]" in relayout_data:
+                view[offset] = float(relayout_data[f"{axis}.range[0]"])
+                view[offset + 1] = float(relayout_data[f"{axis}.range[1]"])
+            elif f"{axis}.range" in relayout_data:
+                view[offset : offset + 2] = map(float, relayout_data[f"{axis}.range"])
+            else:
+                continue
+            changed = True
+        return view if changed else None
+
+    @staticmethod
+    def _message_figure(text: str) -> go.Figure:
+        return go.Figure().add_annotation(
+            text=text,
+            xref="paper",
+            yref="paper",
+            x=0.5,
+            y=0.5,
+            xanchor="center",
+            yanchor="middle",
+            showarrow=False,
+            font=dict(size=16),
+        )
+
     @staticmethod
     def _dict_to_document(doc_dict):
         return Document(
             id=doc_dict["id"],
             text=doc_dict["text"],
-            embedding=doc_dict["embedding"],
+            # Embeddings live in the store's matrix; plots never read them
+            embedding=[],
             category=doc_dict.get("category"),
             subcategory=doc_dict.get("subcategory"),
             tags=doc_dict.get("tags", []),
@@ -253,13 +253,13 @@ class DataSourceComponent:
                         dbc.Col(
                             [
                                 dbc.Label("Query Size:"),
+                                # Empty loads as much as the memory budget allows
                                 dbc.Input(
                                     id=f"{section_id}-opensearch-query-size",
                                     type="number",
                                     value=100,
                                     min=1,
-                                    max=1000,
-                                    placeholder="100",
+                                    placeholder="All",
                                     className="mb-2",
                                 ),
                             ],
@@ -340,6 +340,22 @@ class DataSourceComponent:
                 # Load data button (hidden initially)
                 html.Div(
                     [
+                        dbc.Label("Documents:"),
+                        dcc.Dropdown(
+                            id=f"{section_id}-opensearch-sampling",
+                            options=self._sampling_options(section_type),
+                            value="first",
+                            clearable=False,
+                            className="mb-2",
+                        ),
+                        dbc.Label("Query (optional):"),
+                        # Query DSL, e.g. {"term": {"category": "news"}}
+                        dbc.Textarea(
+                            id=f"{section_id}-opensearch-query",
+                            placeholder='{"term": {"category": "news"}}',
+                            rows=3,
+                            className="mb-2 font-monospace small",
+                        ),
                         dbc.Button(
                             f"Load {section_type.title()}",
                             id=f"{section_id}-load-opensearch-data-btn",
@@ -347,6 +363,14 @@ class DataSourceComponent:
                             className="mb-2",
                             disabled=True,
                         ),
+                        html.Div(id=f"{section_id}-load-progress", className="mb-2"),
+                        # Identifies a running load so its progress can be polled
+                        dcc.Store(id=f"{section_id}-load-token"),
+                        dcc.Interval(
+                            id=f"{section_id}-load-progress-interval",
+                            interval=AppSettings.OPENSEARCH_PROGRESS_POLL_INTERVAL_MS,
+                            disabled=True,
+                        ),
                     ],
                     id=f"{section_id}-load-data-section",
                     style={"display": "none"},
@@ -356,6 +380,19 @@ class DataSourceComponent:
             ]
         )
 
+    def _sampling_options(self, section_type):
+        """Ways to choose the documents of an OpenSearch load."""
+        options = [
+            {"label": "First documents", "value": "first"},
+            {"label": "Random sample", "value": "random"},
+            {"label": "Sample stratified by category", "value": "stratified"},
+        ]
+        if section_type == "data":
+            options.append(
+                {"label": "Nearest neighbours of loaded prompts", "value": "knn"}
+            )
+        return options
+
     def create_field_mapping_interface(self, field_suggestions, section_type="data"):
         """Create field mapping interface based on detected fields."""
         return html.Div(
@@ -33,12 +33,8 @@ class SidebarComponent:
             dbc.Label("Method:"),
             dcc.Dropdown(
                 id="method-dropdown",
-                options=[
-                    {"label": "PCA", "value": "pca"},
-                    {"label": "t-SNE", "value": "tsne"},
-                    {"label": "UMAP", "value": "umap"},
-                ],
-                value="pca",
+                options=AppSettings.REDUCTION_METHODS,
+                value=AppSettings.DEFAULT_METHOD,
                 style={"margin-bottom": "15px"},
             ),
         ]
@@ -58,6 +54,20 @@ class SidebarComponent:
             ),
         ]
 
+    def _create_category_filter(self):
+        # Options are filled in the browser from the plot's color labels
+        return [
+            dbc.Label("Hide:"),
+            dcc.Dropdown(
+                id="category-filter",
+                options=[],
+                value=[],
+                multi=True,
+                placeholder="Show all",
+                style={"margin-bottom": "15px"},
+            ),
+        ]
+
     def _create_dimension_toggle(self):
         return [
             dbc.Label("Dimensions:"),
@@ -83,6 +93,17 @@ class SidebarComponent:
             ),
         ]
 
+    def _create_density_toggle(self):
+        return [
+            dbc.Label("Density:"),
+            dcc.Checklist(
+                id="density-toggle",
+                options=[{"label": "Show 2D plots as density", "value": "density"}],
+                value=[],
+                style={"margin-bottom": "20px"},
+            ),
+        ]
+
     def _create_generate_embeddings_item(self):
         return dbc.AccordionItem(
             [
@@ -131,8 +152,10 @@ class SidebarComponent:
         return dbc.AccordionItem(
             self._create_method_dropdown()
             + self._create_color_dropdown()
+            + self._create_category_filter()
             + self._create_dimension_toggle()
-            + self._create_prompts_toggle(),
+            + self._create_prompts_toggle()
+            + self._create_density_toggle(),
             title=html.Span(
                 [
                     "Visualization Controls ",
@@ -1,5 +1,6 @@
 from dash import dcc, html
 import dash_bootstrap_components as dbc
+from ..config.settings import AppSettings
 from .components.sidebar import SidebarComponent
 from .components.about import AboutComponent
 
@@ -62,10 +63,29 @@ class AppLayout:
                     id="embedding-plot",
                     style={"height": "85vh", "width": "100%"},
                     config={"responsive": True, "displayModeBar": True},
+                    # Progressive layouts glide toward convergence
+                    animate=True,
+                    animation_options={
+                        "frame": {"redraw": True},
+                        "transition": {"duration": 300, "easing": "cubic-in-out"},
+                    },
                 )
             ],
             width=9,
         )
 
     def _create_stores(self):
-        return [dcc.Store(id="processed-data"), dcc.Store(id="processed-prompts")]
+        return [
+            dcc.Store(id="processed-data"),
+            dcc.Store(id="processed-prompts"),
+            dcc.Store(id="reduction-progress"),
+            dcc.Store(id="plot-state"),
+            dcc.Store(id="plot-styles"),
+            dcc.Store(id="plot-restyle-request"),
+            dcc.Store(id="session-id", storage_type="session"),
+            dcc.Interval(
+                id="reduction-progress-interval",
+                interval=AppSettings.PROGRESSIVE_POLL_INTERVAL_MS,
+                disabled=True,
+            ),
+        ]
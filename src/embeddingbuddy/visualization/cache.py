@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import threading
+import numpy as np
+import plotly.graph_objects as go
+
+
+def payload_bytes(obj: Any) -> int:
+    """Approximate length of ``obj`` once JSON-encoded, without encoding it.
+
+    Strings (including base64 typed arrays) count their length, numeric
+    arrays a few characters per value and other scalars a fixed width.
+    """
+    if isinstance(obj, dict):
+        return sum(len(key) + payload_bytes(value) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(payload_bytes(value) for value in obj)
+    if isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            return sum(len(str(value)) for value in obj.flat)
+        return 3 * obj.nbytes
+    if isinstance(obj, str):
+        return len(obj)
+    return 8
+
+
+class FigureCache:
+    """LRU cache of rendered figures, bounded by their encoded size.
+
+    Figures are stored in their dict form (with base64 typed arrays),
+    together with their restyle payload, so a hit skips building and
+    validating the figure. Nothing is JSON-encoded here: Dash encodes the
+    response once, and each entry is charged an estimate of its encoded
+    length (see ``payload_bytes``).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Dict, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[Dict, Any]]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            figure, styles, _ = self._entries[key]
+            return figure, styles
+
+    def put(self, key: Hashable, figure: go.Figure, styles: Any = None) -> Dict:
+        """Store a figure and return the dict form that was cached."""
+        figure_dict = figure.to_dict()
+        size = payload_bytes(figure_dict) + payload_bytes(styles)
+        if size > self.max_bytes:
+            return figure_dict
+
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[2]
+            self._entries[key] = (figure_dict, styles, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted
+        return figure_dict
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,9 +1,60 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
 import plotly.colors as pc
 from ..models.schemas import Document
 
 
+class TagIndex:
+    """Inverted index from each tag to the documents carrying it.
+
+    Built once from per-document tag lists; ``mask(tag)`` is then a slice
+    of the index scattered into a boolean array rather than a scan over
+    every document's tags.
+    """
+
+    def __init__(self, tag_lists: Sequence[Sequence[str]]):
+        self.n_documents = len(tag_lists)
+        lengths = np.fromiter(
+            (len(tags) for tags in tag_lists), dtype=np.int64, count=self.n_documents
+        )
+        flat_tags = pd.Series([tag for tags in tag_lists for tag in tags], dtype=object)
+        tag_codes, tags = pd.factorize(flat_tags)
+        self.tags = list(tags)
+
+        document_ids = np.repeat(np.arange(self.n_documents), lengths)
+        self._documents = document_ids[np.argsort(tag_codes, kind="stable")]
+        self.counts = np.bincount(tag_codes, minlength=len(self.tags))
+        self._offsets = np.concatenate([[0], np.cumsum(self.counts)])
+        self._positions = {tag: i for i, tag in enumerate(self.tags)}
+
+    def mask(self, tag: str) -> np.ndarray:
+        """Boolean mask of the documents that contain ``tag``."""
+        mask = np.zeros(self.n_documents, dtype=bool)
+        position = self._positions.get(tag)
+        if position is not None:
+            start, end = self._offsets[position], self._offsets[position + 1]
+            mask[self._documents[start:end]] = True
+        return mask
+
+    def top_tags(self, k: int) -> List[str]:
+        """The ``k`` most frequent tags, ties in order of first appearance."""
+        order = np.argsort(-self.counts, kind="stable")[:k]
+        return [self.tags[i] for i in order]
+
+
 class ColorMapper:
+    # Same default sequence plotly express uses for discrete colors
+    PALETTE = pc.qualitative.Plotly
+
+    # Bucket for values outside the top-K groups and for "contains tag" misses
+    OTHER_LABEL = "Other"
+    OTHER_COLOR = "#B6B6B6"
+
+    # Color options of the form "tag:<name>" color by whether a tag is present
+    TAG_PREFIX = "tag:"
+
     @staticmethod
     def create_color_mapping(documents: List[Document], color_by: str) -> List[str]:
         if color_by == "category":
@@ -12,25 +63,117 @@ class ColorMapper:
             return [doc.subcategory for doc in documents]
         elif color_by == "tags":
             return [", ".join(doc.tags) if doc.tags else "No tags" for doc in documents]
+        elif color_by.startswith(ColorMapper.TAG_PREFIX):
+            tag = color_by[len(ColorMapper.TAG_PREFIX) :]
+            mask = TagIndex([doc.tags or [] for doc in documents]).mask(tag)
+            return np.where(mask, tag, ColorMapper.OTHER_LABEL).tolist()
         else:
             return ["All"] * len(documents)
 
+    @classmethod
+    def encode(
+        cls, *value_lists: Sequence[str], top_k: Optional[int] = None
+    ) -> Tuple[List[np.ndarray], List[str]]:
+        """Map color values to integer codes shared across all given lists.
+
+        Labels are numbered in order of first appearance, so documents keep
+        the same colors whether or not prompts are shown. With ``top_k``, at
+        most that many labels are kept, most frequent first, and every other
+        value is coded as a trailing ``OTHER_LABEL``. Codes use the smallest
+        unsigned integer type that fits, which keeps their typed array
+        encoding in figure payloads small.
+        """
+        all_values = pd.Series(
+            [value for values in value_lists for value in values], dtype=object
+        )
+        all_codes, uniques = pd.factorize(all_values, use_na_sentinel=False)
+        labels = list(uniques)
+
+        if top_k is not None and len(labels) > top_k:
+            counts = np.bincount(all_codes, minlength=len(labels))
+            kept = np.argsort(-counts, kind="stable")[:top_k]
+            # Old code -> new code, with everything not kept in the last bucket
+            remap = np.full(len(labels), top_k, dtype=np.int64)
+            remap[kept] = np.arange(top_k)
+            all_codes = remap[all_codes]
+            labels = [labels[i] for i in kept] + [cls.OTHER_LABEL]
+
+        return cls._split_codes(all_codes, labels, value_lists), labels
+
+    @classmethod
+    def encode_contains(
+        cls, tag_index: TagIndex, tag: str, *lengths: int
+    ) -> Tuple[List[np.ndarray], List[str]]:
+        """Two-group coding for a "contains tag" option.
+
+        ``tag_index`` covers the concatenation of the lists whose sizes are
+        given by ``lengths``; documents with the tag get code 0 and the rest
+        are coded as ``OTHER_LABEL``.
+        """
+        all_codes = (~tag_index.mask(tag)).astype(np.uint8)
+        splits = np.cumsum(lengths)[:-1]
+        return np.split(all_codes, splits), [tag, cls.OTHER_LABEL]
+
+    @staticmethod
+    def _split_codes(
+        all_codes: np.ndarray, labels: List[str], value_lists: Sequence[Sequence]
+    ) -> List[np.ndarray]:
+        splits = np.cumsum([len(values) for values in value_lists])[:-1]
+        dtype = np.min_scalar_type(max(len(labels) - 1, 0))
+        return np.split(all_codes.astype(dtype), splits)
+
+    @classmethod
+    def label_colors(cls, labels: List[str], bucketed: bool = False) -> List[str]:
+        """Palette colors for ``labels``; a bucketed trailing "Other" is grey."""
+        colors = [cls.PALETTE[i % len(cls.PALETTE)] for i in range(len(labels))]
+        if bucketed and colors:
+            colors[-1] = cls.OTHER_COLOR
+        return colors
+
+    @staticmethod
+    def discrete_colorscale(colors: List[str]) -> List[List]:
+        """Build a stepped colorscale so code ``i`` renders exactly ``colors[i]``
+        when the marker color range is ``[-0.5, len(colors) - 0.5]``."""
+        if len(colors) == 1:
+            return [[0.0, colors[0]], [1.0, colors[0]]]
+
+        n_colors = len(colors)
+        colorscale = []
+        for i, color in enumerate(colors):
+            colorscale.append([i / n_colors, color])
+            colorscale.append([(i + 1) / n_colors, color])
+        return colorscale
+
     @staticmethod
     def to_grayscale_hex(color_str: str) -> str:
+        return ColorMapper.grayscale_palette((color_str,))[0]
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def grayscale_palette(colors: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Greyed-out variants of a whole palette, computed once per palette.
+
+        Each color is mixed 70/30 with its luma. Colors that cannot be parsed
+        map to mid grey.
+        """
+        rgb = np.array([ColorMapper._parse_rgb(color) for color in colors])
+        rgb = rgb.reshape(len(colors), 3)
+        valid = ~np.isnan(rgb).any(axis=1)
+
+        mixed = np.full((len(colors), 3), 128, dtype=np.int64)
+        luma = np.floor(rgb[valid] @ np.array([0.299, 0.587, 0.114]))
+        mixed[valid] = (luma[:, None] * 0.7 + rgb[valid] * 0.3).astype(np.int64)
+        return tuple(f"rgb({r},{g},{b})" for r, g, b in mixed.tolist())
+
+    @staticmethod
+    def _parse_rgb(color: str) -> Tuple[float, float, float]:
         try:
-            if color_str.startswith("#"):
-                rgb = tuple(int(color_str[i : i + 2], 16) for i in (1, 3, 5))
-            else:
-                rgb = pc.hex_to_rgb(
-                    pc.convert_colors_to_same_type([color_str], colortype="hex")[0][0]
-                )
-
-            gray_value = int(0.299 * rgb[0] + 0.587 * rgb[1] + 0.114 * rgb[2])
-            gray_rgb = (
-                gray_value * 0.7 + rgb[0] * 0.3,
-                gray_value * 0.7 + rgb[1] * 0.3,
-                gray_value * 0.7 + rgb[2] * 0.3,
-            )
-            return f"rgb({int(gray_rgb[0])},{int(gray_rgb[1])},{int(gray_rgb[2])})"
-        except:  # noqa: E722
-            return "rgb(128,128,128)"
+            if color.startswith("#"):
+                r, g, b = pc.hex_to_rgb(color)
+                return float(r), float(g), float(b)
+            if color.startswith("rgb"):
+                r, g, b = pc.unlabel_rgb(color)[:3]
+                return float(r), float(g), float(b)
+        except (AttributeError, ValueError):
+            pass
+        return (np.nan, np.nan, np.nan)
@@ -1,14 +1,96 @@
-import pandas as pd
-import plotly.express as px
+import base64
+import numpy as np
 import plotly.graph_objects as go
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import uuid
+from ..config.settings import AppSettings
 from ..models.schemas import Document, PlotData
-from .colors import ColorMapper
+from .colors import ColorMapper, TagIndex
+from .raster import DensityGrid, DensityRasterizer, Extent
+
+
+# dtype codes of the plotly.js typed array spec ({"dtype", "bdata", "shape"})
+TYPED_ARRAY_DTYPES = {
+    "int8": "i1",
+    "uint8": "u1",
+    "int16": "i2",
+    "uint16": "u2",
+    "int32": "i4",
+    "uint32": "u4",
+    "float32": "f4",
+    "float64": "f8",
+}
+
+
+def encode_typed_arrays(obj: Any) -> Any:
+    """Replace the numpy arrays nested in ``obj`` with base64 typed arrays.
+
+    Dicts and lists are updated in place. Arrays of dtypes plotly.js has no
+    typed array for are sent as plain lists.
+    """
+    items: Any = ()
+    if isinstance(obj, dict):
+        items = obj.items()
+    elif isinstance(obj, list):
+        items = enumerate(obj)
+    for key, value in list(items):
+        if isinstance(value, np.ndarray):
+            obj[key] = _typed_array(value)
+        else:
+            encode_typed_arrays(value)
+    return obj
+
+
+def _typed_array(values: np.ndarray) -> Any:
+    dtype = TYPED_ARRAY_DTYPES.get(values.dtype.name)
+    if dtype is None or values.size == 0:
+        return values.tolist()
+    values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+    spec = {"dtype": dtype, "bdata": base64.b64encode(values.tobytes()).decode()}
+    if values.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in values.shape)
+    return spec
 
 
 class PlotFactory:
+    """Builds embedding scatter plots.
+
+    Each layer (documents, prompts) is a single WebGL trace whose marker
+    colors are integer codes mapped through a discrete colorscale, so figure
+    size and render time grow with the number of points rather than the
+    number of distinct color values. The legend is drawn separately from
+    empty legend-only traces and capped at ``LEGEND_MAX_ENTRIES``.
+
+    Layer traces always come first in ``figure.data`` (documents, then
+    prompts when there are any, hidden unless shown), followed by the legend
+    traces. The clientside restyle callback (``assets/plot.js``) relies on
+    that order to restyle a figure in place from ``create_styles``.
+
+    Large 2D plots switch to level-of-detail rendering (see
+    ``_create_lod_plot``), as do 2D plots in density mode.
+    """
+
+    LEGEND_MAX_ENTRIES = 20
+
+    HOVER_FIELDS = ["id", "text_preview", "category", "subcategory", "tags_str"]
+
     def __init__(self):
         self.color_mapper = ColorMapper()
+        self.rasterizer = DensityRasterizer(
+            AppSettings.LOD_RASTER_SIZE, AppSettings.LOD_RASTER_SIZE
+        )
+        self.density_grid = DensityGrid(AppSettings.DENSITY_GRID_SIZE)
+
+    @staticmethod
+    def uses_lod(plot_data: PlotData, dimensions: str, density: bool = False) -> bool:
+        """Whether the plot is drawn as a density overview plus viewport points."""
+        return dimensions == "2d" and (
+            density or len(plot_data.documents) > AppSettings.LOD_POINT_THRESHOLD
+        )
+
+    @staticmethod
+    def count_layers(plot_data: PlotData) -> int:
+        return 2 if PlotFactory._has_prompt_layer(plot_data) else 1
 
     def create_plot(
         self,
@@ -17,162 +99,545 @@ class PlotFactory:
         color_by: str = "category",
         method: str = "PCA",
         show_prompts: Optional[List[str]] = None,
+        view: Optional[Extent] = None,
+        hidden: Optional[List[str]] = None,
+        density: bool = False,
     ) -> go.Figure:
-        if plot_data.prompts and show_prompts and "show" in show_prompts:
-            return self._create_dual_plot(plot_data, dimensions, color_by, method)
-        else:
-            return self._create_single_plot(plot_data, dimensions, color_by, method)
+        """Build the figure.
 
-    def _create_single_plot(
-        self, plot_data: PlotData, dimensions: str, color_by: str, method: str
-    ) -> go.Figure:
-        df = self._prepare_dataframe(
-            plot_data.documents, plot_data.coordinates, dimensions
+        ``view`` (the (x0, x1, y0, y1) viewport, full extent when omitted)
+        and ``hidden`` (color labels to leave out) only apply to
+        level-of-detail plots; regular plots are filtered in the browser.
+        ``density`` draws 2D plots as a density heatmap instead.
+        """
+        if self.uses_lod(plot_data, dimensions, density):
+            return self._create_lod_plot(
+                plot_data, color_by, method, show_prompts, view, hidden, density
+            )
+
+        doc_codes, prompt_codes, labels, colors = self._encode_colors(
+            plot_data, color_by
         )
-        color_values = self.color_mapper.create_color_mapping(
-            plot_data.documents, color_by
+        doc_marker, prompt_marker = self._layer_markers(
+            doc_codes, prompt_codes, colors, dimensions
         )
+        prompts_shown = self._prompts_shown(plot_data, show_prompts)
 
-        hover_fields = ["id", "text_preview", "category", "subcategory", "tags_str"]
+        traces = [
+            self._create_layer_trace(
+                self._layer_hover(plot_data)[0],
+                plot_data.coordinates,
+                doc_marker,
+                dimensions,
+                name="Documents",
+            )
+        ]
+        traces += self._prompt_layer(
+            plot_data, prompt_marker, dimensions, prompts_shown
+        )
+        traces += self._legend(
+            labels, colors, doc_codes, prompt_codes, dimensions, prompts_shown
+        )
 
-        if dimensions == "3d":
-            fig = px.scatter_3d(
-                df,
-                x="x",
-                y="y",
-                z="z",
-                color=color_values,
-                hover_data=hover_fields,
-                title=f"3D Embedding Visualization - {method} (colored by {color_by})",
+        return self._assemble_figure(traces, dimensions, color_by, method)
+
+    def create_styles(
+        self, plot_data: PlotData, dimensions: str, method: str, density: bool = False
+    ) -> Dict:
+        """Precompute every cosmetic variant of a figure for the browser.
+
+        For each color option this holds the layer markers (integer codes and
+        colorscale), the legend traces with and without prompts, and the
+        title, so the clientside restyle callback can recolor, filter and
+        toggle prompts on the current figure without a server round trip.
+        Level-of-detail plots are restyled on the server, so for them only
+        the labels (for the category filter) are included.
+
+        Besides the fixed color options, the most frequent tags each get a
+        "contains tag" option, listed in ``color_options`` for the dropdown.
+        """
+        lod = self.uses_lod(plot_data, dimensions, density)
+        tag_index = self._tag_index(plot_data)
+        color_options = AppSettings.COLOR_OPTIONS + [
+            {"label": f"Tag: {tag}", "value": ColorMapper.TAG_PREFIX + tag}
+            for tag in tag_index.top_tags(AppSettings.COLOR_TAG_OPTIONS)
+        ]
+        options: Dict[str, Dict[str, Any]] = {}
+        for option in color_options:
+            color_by = option["value"]
+            doc_codes, prompt_codes, labels, colors = self._encode_colors(
+                plot_data, color_by, tag_index
             )
-            fig.update_traces(marker=dict(size=5))
-        else:
-            fig = px.scatter(
-                df,
-                x="x",
-                y="y",
-                color=color_values,
-                hover_data=hover_fields,
-                title=f"2D Embedding Visualization - {method} (colored by {color_by})",
+            if lod:
+                options[color_by] = {"labels": [str(label) for label in labels]}
+                continue
+
+            doc_marker, prompt_marker = self._layer_markers(
+                doc_codes, prompt_codes, colors, dimensions
             )
-            fig.update_traces(marker=dict(size=8))
+            legends = {
+                key: [
+                    trace.to_plotly_json()
+                    for trace in self._legend(
+                        labels, colors, doc_codes, prompt_codes, dimensions, shown
+                    )
+                ]
+                for key, shown in (("documents", False), ("prompts", True))
+            }
+            options[color_by] = {
+                "labels": [str(label) for label in labels],
+                "markers": [doc_marker, prompt_marker],
+                "legend": legends,
+                "title": self._title(dimensions, color_by, method),
+            }
 
-        fig.update_layout(height=None, autosize=True, margin=dict(l=0, r=0, t=50, b=0))
-        return fig
+        styles = {
+            "revision": uuid.uuid4().hex,
+            "lod": lod,
+            "n_layers": self.count_layers(plot_data),
+            "color_options": color_options,
+            "options": options,
+        }
+        # Same base64 typed-array encoding plotly applies to figure arrays
+        return encode_typed_arrays(styles)
 
-    def _create_dual_plot(
-        self, plot_data: PlotData, dimensions: str, color_by: str, method: str
+    def _create_lod_plot(
+        self,
+        plot_data: PlotData,
+        color_by: str,
+        method: str,
+        show_prompts: Optional[List[str]],
+        view: Optional[Extent],
+        hidden: Optional[List[str]] = None,
+        density: bool = False,
     ) -> go.Figure:
-        fig = go.Figure()
+        """2D plot for large datasets.
+
+        The full dataset is drawn as a server-rendered density image behind
+        the axes; individual (hoverable) points are only sent for the current
+        ``view``, capped at ``AppSettings.LOD_MAX_POINTS_PER_VIEW``. Documents
+        whose color label is in ``hidden`` are left out of both.
 
-        doc_df = self._prepare_dataframe(
-            plot_data.documents, plot_data.coordinates, dimensions
+        In ``density`` mode the overview is a smoothed density heatmap
+        instead, and points are only sent once the view is zoomed in far
+        enough to hold at most ``AppSettings.DENSITY_MAX_POINTS`` of them.
+        """
+        coordinates = np.asarray(plot_data.coordinates)
+        doc_codes, prompt_codes, labels, colors = self._encode_colors(
+            plot_data, color_by
         )
-        doc_color_values = self.color_mapper.create_color_mapping(
-            plot_data.documents, color_by
+        doc_marker, prompt_marker = self._layer_markers(
+            doc_codes, prompt_codes, colors, "2d"
         )
+        prompts_shown = self._prompts_shown(plot_data, show_prompts)
+        shown = self._shown_documents(doc_codes, labels, hidden)
 
-        hover_fields = ["id", "text_preview", "category", "subcategory", "tags_str"]
+        extent = self.rasterizer.extent(coordinates)
+        view = view or extent
+        points, counts = self._lod_points(
+            plot_data, coordinates, doc_codes, doc_marker, shown, view, density
+        )
+        traces = [points]
+        traces += self._prompt_layer(plot_data, prompt_marker, "2d", prompts_shown)
+        traces += self._legend(
+            labels, colors, doc_codes, prompt_codes, "2d", prompts_shown, hidden
+        )
 
-        if dimensions == "3d":
-            doc_fig = px.scatter_3d(
-                doc_df,
-                x="x",
-                y="y",
-                z="z",
-                color=doc_color_values,
-                hover_data=hover_fields,
+        if density:
+            traces.append(self._density_trace(coordinates[shown], extent))
+        fig = self._assemble_figure(traces, "2d", color_by, method)
+        fig.update_layout(
+            title=f"{fig.layout.title.text} - {counts}",
+            xaxis=dict(range=[view[0], view[1]]),
+            yaxis=dict(range=[view[2], view[3]]),
+        )
+        if density:
+            return fig
+
+        overview = self.rasterizer.render(
+            coordinates[shown], doc_codes[shown], colors, extent
+        )
+        x0, x1, y0, y1 = extent
+        fig.update_layout(
+            images=[
+                dict(
+                    source=overview,
+                    xref="x",
+                    yref="y",
+                    x=x0,
+                    y=y1,
+                    sizex=x1 - x0,
+                    sizey=y1 - y0,
+                    sizing="stretch",
+                    layer="below",
+                )
+            ],
+        )
+        return fig
+
+    def create_lod_view(
+        self,
+        plot_data: PlotData,
+        color_by: str,
+        method: str,
+        view: Extent,
+        hidden: Optional[List[str]] = None,
+        density: bool = False,
+    ) -> Tuple[Dict, str]:
+        """Document layer and title of a level-of-detail plot panned to ``view``.
+
+        The overview image, prompts, legend and density heatmap of the plot
+        do not depend on the view, so a viewport change only replaces these
+        two. The trace comes back as plotly JSON with typed arrays, ready to
+        go into a ``dash.Patch``.
+        """
+        coordinates = np.asarray(plot_data.coordinates)
+        doc_codes, prompt_codes, labels, colors = self._encode_colors(
+            plot_data, color_by
+        )
+        doc_marker, _ = self._layer_markers(doc_codes, prompt_codes, colors, "2d")
+        shown = self._shown_documents(doc_codes, labels, hidden)
+        points, counts = self._lod_points(
+            plot_data, coordinates, doc_codes, doc_marker, shown, view, density
+        )
+        title = f"{self._title('2d', color_by, method)} - {counts}"
+        return encode_typed_arrays(points.to_plotly_json()), title
+
+    @staticmethod
+    def _shown_documents(
+        doc_codes: np.ndarray, labels: List[str], hidden: Optional[List[str]]
+    ) -> np.ndarray:
+        """Mask of the documents whose color label is not in ``hidden``."""
+        if not hidden:
+            return np.ones(len(doc_codes), dtype=bool)
+        hidden_codes = [i for i, label in enumerate(labels) if label in hidden]
+        return ~np.isin(doc_codes, hidden_codes)
+
+    def _lod_points(
+        self,
+        plot_data: PlotData,
+        coordinates: np.ndarray,
+        doc_codes: np.ndarray,
+        doc_marker: Dict,
+        shown: np.ndarray,
+        view: Extent,
+        density: bool,
+    ):
+        """Trace of the documents drawn as points in ``view``, and a title
+        suffix counting them."""
+        if density:
+            visible = self._points_in_view(coordinates, view, shown, cap=None)
+            if len(visible) > AppSettings.DENSITY_MAX_POINTS:
+                visible = visible[:0]
+            suffix = (
+                f"{len(visible):,} points in view"
+                if len(visible)
+                else "zoom in to see individual points"
             )
+            counts = f"density of {int(shown.sum()):,} points, {suffix}"
         else:
-            doc_fig = px.scatter(
-                doc_df,
-                x="x",
-                y="y",
-                color=doc_color_values,
-                hover_data=hover_fields,
+            visible = self._points_in_view(
+                coordinates, view, shown, cap=AppSettings.LOD_MAX_POINTS_PER_VIEW
             )
+            counts = f"{len(visible):,} of {int(shown.sum()):,} points in view"
 
-        for trace in doc_fig.data:
-            trace.name = f"Documents - {trace.name}"
-            if dimensions == "3d":
-                trace.marker.size = 5
-                trace.marker.symbol = "circle"
-            else:
-                trace.marker.size = 8
-                trace.marker.symbol = "circle"
-            trace.marker.opacity = 1.0
-            fig.add_trace(trace)
+        trace = self._create_layer_trace(
+            self._layer_hover(plot_data)[0][visible],
+            coordinates[visible],
+            dict(doc_marker, color=doc_codes[visible]),
+            "2d",
+            name="Documents",
+        )
+        return trace, counts
+
+    def _density_trace(self, coordinates: np.ndarray, extent: Extent) -> go.Heatmap:
+        x, y, density = self.density_grid.compute(coordinates, extent)
+        z = density.astype(np.float32)
+        # Empty cells stay transparent so the axes show through
+        z[z < z.max() * 0.01] = np.nan
+        return go.Heatmap(
+            x=x.astype(np.float32),
+            y=y.astype(np.float32),
+            z=z,
+            zsmooth="best",
+            colorscale="Blues",
+            showscale=False,
+            hoverinfo="skip",
+            name="Density",
+            showlegend=False,
+        )
+
+    @staticmethod
+    def _points_in_view(
+        coordinates: np.ndarray, view: Extent, shown: np.ndarray, cap: Optional[int]
+    ) -> np.ndarray:
+        """Indices of the shown points inside ``view``, subsampled to ``cap``."""
+        x0, x1, y0, y1 = view
+        inside = np.flatnonzero(
+            shown
+            & (coordinates[:, 0] >= x0)
+            & (coordinates[:, 0] <= x1)
+            & (coordinates[:, 1] >= y0)
+            & (coordinates[:, 1] <= y1)
+        )
+        if cap is not None and len(inside) > cap:
+            # Fixed seed: the same view always shows the same points
+            rng = np.random.default_rng(0)
+            inside = np.sort(rng.choice(inside, size=cap, replace=False))
+        return inside
+
+    @staticmethod
+    def _has_prompt_layer(plot_data: PlotData) -> bool:
+        return bool(PlotFactory._layer_prompts(plot_data))
 
+    @staticmethod
+    def _layer_prompts(plot_data: PlotData) -> List[Document]:
+        """The prompts drawn as a layer: none without prompt coordinates."""
         if plot_data.prompts and plot_data.prompt_coordinates is not None:
-            prompt_df = self._prepare_dataframe(
-                plot_data.prompts, plot_data.prompt_coordinates, dimensions
+            return plot_data.prompts
+        return []
+
+    def _prompt_layer(
+        self, plot_data: PlotData, marker: Dict, dimensions: str, visible: bool
+    ) -> list:
+        """The prompt layer trace, or nothing when there are no prompts."""
+        if not plot_data.prompts or plot_data.prompt_coordinates is None:
+            return []
+        return [
+            self._create_layer_trace(
+                self._layer_hover(plot_data)[1],
+                plot_data.prompt_coordinates,
+                marker,
+                dimensions,
+                name="Prompts",
+                visible=visible,
+            )
+        ]
+
+    @staticmethod
+    def _prompts_shown(plot_data: PlotData, show_prompts: Optional[List[str]]):
+        return bool(
+            PlotFactory._has_prompt_layer(plot_data)
+            and show_prompts
+            and "show" in show_prompts
+        )
+
+    def _tag_index(self, plot_data: PlotData) -> TagIndex:
+        """Tag index over the documents followed by the prompts, if any."""
+        documents = plot_data.documents + self._layer_prompts(plot_data)
+        return TagIndex([doc.tags or [] for doc in documents])
+
+    def _encode_colors(
+        self,
+        plot_data: PlotData,
+        color_by: str,
+        tag_index: Optional[TagIndex] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, List[str], List[str]]:
+        """Return document codes, prompt codes, labels and label colors."""
+        prompts = self._layer_prompts(plot_data)
+        n_prompts = len(prompts)
+        if color_by.startswith(ColorMapper.TAG_PREFIX):
+            (doc_codes, prompt_codes), labels = self.color_mapper.encode_contains(
+                tag_index or self._tag_index(plot_data),
+                color_by[len(ColorMapper.TAG_PREFIX) :],
+                len(plot_data.documents),
+                n_prompts,
+            )
+            colors = self.color_mapper.label_colors(labels, bucketed=True)
+            return doc_codes, prompt_codes, labels, colors
+
+        doc_values = self.color_mapper.create_color_mapping(
+            plot_data.documents, color_by
+        )
+        prompt_values = (
+            self.color_mapper.create_color_mapping(prompts, color_by)
+            if n_prompts
+            else []
+        )
+        top_k = AppSettings.COLOR_TOP_K
+        (doc_codes, prompt_codes), labels = self.color_mapper.encode(
+            doc_values, prompt_values, top_k=top_k
+        )
+        colors = self.color_mapper.label_colors(labels, bucketed=len(labels) > top_k)
+        return doc_codes, prompt_codes, labels, colors
+
+    def _layer_markers(
+        self,
+        doc_codes: np.ndarray,
+        prompt_codes: np.ndarray,
+        colors: List[str],
+        dimensions: str,
+    ) -> Tuple[Dict, Dict]:
+        prompt_colors = list(self.color_mapper.grayscale_palette(tuple(colors)))
+        return (
+            self._marker(doc_codes, colors, dimensions, is_prompt=False),
+            self._marker(prompt_codes, prompt_colors, dimensions, is_prompt=True),
+        )
+
+    def _marker(
+        self, codes: np.ndarray, colors: List[str], dimensions: str, is_prompt: bool
+    ) -> Dict:
+        return dict(
+            color=codes,
+            colorscale=self.color_mapper.discrete_colorscale(colors or ["#000000"]),
+            cmin=-0.5,
+            cmax=max(len(colors), 1) - 0.5,
+            showscale=False,
+            **AppSettings.get_plot_marker_config(dimensions, is_prompt),
+        )
+
+    def _create_layer_trace(
+        self,
+        hover_text: np.ndarray,
+        coordinates: np.ndarray,
+        marker: Dict,
+        dimensions: str,
+        name: str,
+        visible: bool = True,
+    ):
+        hover = dict(
+            customdata=hover_text,
+            hovertemplate="%{customdata}<extra>%{fullData.name}</extra>",
+            name=name,
+            mode="markers",
+            marker=marker,
+            showlegend=False,
+            visible=visible,
+        )
+
+        # Coordinate columns go to plotly as float32 numpy arrays, never
+        # per-point lists, so they are serialized as compact base64 typed arrays
+        coordinates = np.asarray(coordinates, dtype=np.float32)
+        if dimensions == "3d":
+            return go.Scatter3d(
+                x=coordinates[:, 0], y=coordinates[:, 1], z=coordinates[:, 2], **hover
             )
-            prompt_color_values = self.color_mapper.create_color_mapping(
-                plot_data.prompts, color_by
+        return go.Scattergl(x=coordinates[:, 0], y=coordinates[:, 1], **hover)
+
+    def _legend(
+        self,
+        labels: List[str],
+        colors: List[str],
+        doc_codes: np.ndarray,
+        prompt_codes: np.ndarray,
+        dimensions: str,
+        prompts_shown: bool,
+        hidden: Optional[List[str]] = None,
+    ) -> list:
+        used = np.flatnonzero(np.bincount(doc_codes, minlength=len(labels)))
+        traces = self._legend_traces(
+            [labels[code] for code in used],
+            [colors[code] for code in used],
+            dimensions,
+            symbol=AppSettings.DOCUMENT_MARKER_SYMBOL,
+            prefix="Documents" if prompts_shown else None,
+            hidden=hidden,
+        )
+        if prompts_shown:
+            used = np.unique(prompt_codes)
+            prompt_colors = self.color_mapper.grayscale_palette(tuple(colors))
+            traces += self._legend_traces(
+                [labels[code] for code in used],
+                [prompt_colors[code] for code in used],
+                dimensions,
+                symbol=AppSettings.PROMPT_MARKER_SYMBOL,
+                prefix="Prompts",
+                hidden=hidden,
             )
+        return traces
 
+    def _legend_traces(
+        self,
+        labels: List[str],
+        colors: List[str],
+        dimensions: str,
+        symbol: str,
+        prefix: Optional[str] = None,
+        hidden: Optional[List[str]] = None,
+    ) -> list:
+        """One empty legend-only trace per label, up to LEGEND_MAX_ENTRIES.
+
+        Each label's trace carries it in ``meta``, so legend clicks can be
+        turned into category filter changes (see assets/plot.js). Traces of
+        ``hidden`` labels are drawn greyed out.
+        """
+        shown = min(len(labels), self.LEGEND_MAX_ENTRIES)
+        entries = [(str(labels[i]), colors[i]) for i in range(shown)]
+        if len(labels) > shown:
+            entries.append((f"+{len(labels) - shown} more", "rgba(0,0,0,0)"))
+
+        traces = []
+        for i, (label, color) in enumerate(entries):
+            name = f"{prefix} - {label}" if prefix else label
+            marker = dict(color=color, symbol=symbol, size=10)
             if dimensions == "3d":
-                prompt_fig = px.scatter_3d(
-                    prompt_df,
-                    x="x",
-                    y="y",
-                    z="z",
-                    color=prompt_color_values,
-                    hover_data=hover_fields,
+                trace = go.Scatter3d(
+                    x=[None], y=[None], z=[None], mode="markers", marker=marker
                 )
             else:
-                prompt_fig = px.scatter(
-                    prompt_df,
-                    x="x",
-                    y="y",
-                    color=prompt_color_values,
-                    hover_data=hover_fields,
+                trace = go.Scattergl(x=[None], y=[None], mode="markers", marker=marker)
+            trace.update(name=name, hoverinfo="skip", showlegend=True)
+            if i < shown:
+                trace.update(
+                    meta=label,
+                    visible="legendonly" if hidden and label in hidden else True,
                 )
+            traces.append(trace)
+        return traces
 
-            for trace in prompt_fig.data:
-                if hasattr(trace.marker, "color") and isinstance(
-                    trace.marker.color, str
-                ):
-                    trace.marker.color = self.color_mapper.to_grayscale_hex(
-                        trace.marker.color
-                    )
+    @staticmethod
+    def _title(dimensions: str, color_by: str, method: str) -> str:
+        return f"{dimensions.upper()} Embedding Visualization - {method} (colored by {color_by})"
+
+    def _assemble_figure(
+        self, traces: list, dimensions: str, color_by: str, method: str
+    ) -> go.Figure:
+        # Build the figure in one go: every add_trace call re-validates and
+        # copies the traces already in the figure, including customdata
+        fig = go.Figure(data=traces)
 
-                trace.name = f"Prompts - {trace.name}"
-                if dimensions == "3d":
-                    trace.marker.size = 6
-                    trace.marker.symbol = "diamond"
-                else:
-                    trace.marker.size = 10
-                    trace.marker.symbol = "diamond"
-                trace.marker.opacity = 0.8
-                fig.add_trace(trace)
-
-        title = f"{dimensions.upper()} Embedding Visualization - {method} (colored by {color_by})"
         fig.update_layout(
-            title=title, height=None, autosize=True, margin=dict(l=0, r=0, t=50, b=0)
+            title=self._title(dimensions, color_by, method),
+            height=None,
+            autosize=True,
+            margin=dict(l=0, r=0, t=50, b=0),
         )
-
         return fig
 
-    def _prepare_dataframe(
-        self, documents: List[Document], coordinates, dimensions: str
-    ) -> pd.DataFrame:
-        df_data = []
-        for i, doc in enumerate(documents):
-            row = {
-                "id": doc.id,
-                "text": doc.text,
-                "text_preview": doc.text[:100] + "..."
-                if len(doc.text) > 100
-                else doc.text,
-                "category": doc.category,
-                "subcategory": doc.subcategory,
-                "tags_str": ", ".join(doc.tags) if doc.tags else "None",
-                "x": coordinates[i, 0],
-                "y": coordinates[i, 1],
-            }
-            if dimensions == "3d":
-                row["z"] = coordinates[i, 2]
-            df_data.append(row)
+    def _layer_hover(self, plot_data: PlotData) -> Tuple[np.ndarray, np.ndarray]:
+        """Hover labels of the documents and of the prompt layer.
+
+        They are built on first use and kept on ``plot_data``, so re-renders
+        of the same data (viewport and restyle updates) only index them.
+        """
+        if plot_data.hover_text is None:
+            plot_data.hover_text = self.hover_text(plot_data.documents)
+        if plot_data.prompt_hover_text is None:
+            plot_data.prompt_hover_text = self.hover_text(
+                self._layer_prompts(plot_data)
+            )
+        return plot_data.hover_text, plot_data.prompt_hover_text
+
+    def hover_text(self, documents: List[Document]) -> np.ndarray:
+        """Build the hover label of every point as one string per point.
 
-        return pd.DataFrame(df_data)
+        Each field is extracted into its own column in a single pass over
+        the documents, and the columns are then formatted together without
+        building a dict or DataFrame row per document. One string per point
+        (rather than a row of fields) also keeps plotly's per-element copying
+        of ``customdata`` cheap.
+        """
+        texts = [doc.text for doc in documents]
+        columns = [
+            [doc.id for doc in documents],
+            [text[:100] + "..." if len(text) > 100 else text for text in texts],
+            [doc.category for doc in documents],
+            [doc.subcategory for doc in documents],
+            [", ".join(doc.tags) if doc.tags else "None" for doc in documents],
+        ]
+        template = "<br>".join(f"{field}=%s" for field in self.HOVER_FIELDS)
+        return np.fromiter(
+            (template % row for row in zip(*columns)),
+            dtype=object,
+            count=len(documents),
+        )
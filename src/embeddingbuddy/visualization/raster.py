@@ -0,0 +1,167 @@
+from typing import List, Tuple
+import base64
+import struct
+import zlib
+import numpy as np
+import plotly.colors as pc
+from scipy.ndimage import gaussian_filter
+
+
+Extent = Tuple[float, float, float, float]
+
+
+class DensityRasterizer:
+    """Renders a point cloud as a density image on the server.
+
+    Each pixel's color is the average of the category colors of the points
+    that fall into it, weighted by count, and its opacity grows with the
+    log of the point density. The image is returned as a PNG data URI that
+    can be placed behind the plot as a layout image.
+    """
+
+    def __init__(self, width: int = 512, height: int = 512):
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def extent(coordinates: np.ndarray, padding: float = 0.02) -> Extent:
+        """Return the padded (x0, x1, y0, y1) bounds of 2D coordinates."""
+        x0, y0 = coordinates[:, :2].min(axis=0)
+        x1, y1 = coordinates[:, :2].max(axis=0)
+        pad_x = (x1 - x0) * padding or 1.0
+        pad_y = (y1 - y0) * padding or 1.0
+        return (
+            float(x0 - pad_x),
+            float(x1 + pad_x),
+            float(y0 - pad_y),
+            float(y1 + pad_y),
+        )
+
+    def render(
+        self,
+        coordinates: np.ndarray,
+        codes: np.ndarray,
+        colors: List[str],
+        extent: Extent,
+    ) -> str:
+        rgba = self.render_rgba(coordinates, codes, colors, extent)
+        png = self._encode_png(rgba)
+        return "data:image/png;base64," + base64.b64encode(png).decode()
+
+    def render_rgba(
+        self,
+        coordinates: np.ndarray,
+        codes: np.ndarray,
+        colors: List[str],
+        extent: Extent,
+    ) -> np.ndarray:
+        """Return a (height, width, 4) uint8 image, top row first."""
+        x0, x1, y0, y1 = extent
+        n_colors = len(colors)
+
+        col = ((coordinates[:, 0] - x0) / (x1 - x0) * self.width).astype(np.int64)
+        row = ((y1 - coordinates[:, 1]) / (y1 - y0) * self.height).astype(np.int64)
+        inside = (col >= 0) & (col < self.width) & (row >= 0) & (row < self.height)
+
+        # One histogram per color code in a single bincount
+        pixel = row[inside] * self.width + col[inside]
+        counts = np.bincount(
+            pixel * n_colors + codes[inside],
+            minlength=self.width * self.height * n_colors,
+        ).reshape(self.height * self.width, n_colors)
+
+        palette = np.array(
+            [pc.hex_to_rgb(self._to_hex(color)) for color in colors], dtype=np.float64
+        )
+        totals = counts.sum(axis=1)
+        occupied = totals > 0
+
+        rgb = np.zeros((self.height * self.width, 3))
+        rgb[occupied] = counts[occupied] @ palette / totals[occupied, None]
+
+        alpha = np.zeros(self.height * self.width)
+        if occupied.any():
+            density = np.log1p(totals[occupied])
+            alpha[occupied] = 0.35 + 0.65 * density / density.max()
+
+        image = np.empty((self.height * self.width, 4), dtype=np.uint8)
+        image[:, :3] = np.clip(rgb, 0, 255)
+        image[:, 3] = np.round(alpha * 255)
+        return image.reshape(self.height, self.width, 4)
+
+    @staticmethod
+    def _to_hex(color: str) -> str:
+        if color.startswith("#"):
+            return color
+        return pc.convert_colors_to_same_type([color], colortype="hex")[0][0]
+
+    @staticmethod
+    def _encode_png(rgba: np.ndarray) -> bytes:
+        """Minimal RGBA PNG encoder (no filtering) using only the stdlib."""
+        height, width, _ = rgba.shape
+        raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+        raw[:, 1:] = rgba.reshape(height, width * 4)
+
+        def chunk(tag: bytes, data: bytes) -> bytes:
+            body = tag + data
+            return (
+                struct.pack(">I", len(data))
+                + body
+                + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+            )
+
+        header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+        return (
+            b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+            + chunk(b"IEND", b"")
+        )
+
+
+class DensityGrid:
+    """Smoothed 2D point density on a regular grid.
+
+    Points are binned with a single bincount and the histogram is blurred
+    with a separable Gaussian kernel (a binned KDE), which is cheap for any
+    number of points and small enough to send as a heatmap or contour layer.
+    The density is normalized so it sums to the number of points binned,
+    less what the blur spreads past the grid edges.
+    """
+
+    # Gaussian kernel radius, in bandwidths
+    KERNEL_TRUNCATE = 3.0
+
+    def __init__(self, size: int = 128, bandwidth: float = 1.5):
+        self.size = size
+        self.bandwidth = bandwidth
+
+    def compute(
+        self, coordinates: np.ndarray, extent: Extent
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return bin centers along x and y and a (size, size) density grid.
+
+        Grid rows follow y from bottom to top, as plotly heatmaps expect.
+        """
+        x0, x1, y0, y1 = extent
+        col = ((coordinates[:, 0] - x0) / (x1 - x0) * self.size).astype(np.int64)
+        row = ((coordinates[:, 1] - y0) / (y1 - y0) * self.size).astype(np.int64)
+        inside = (col >= 0) & (col < self.size) & (row >= 0) & (row < self.size)
+
+        counts = np.bincount(
+            row[inside] * self.size + col[inside], minlength=self.size * self.size
+        ).reshape(self.size, self.size)
+
+        # Kernel truncated at KERNEL_TRUNCATE bandwidths: O(size^2 * bandwidth)
+        density = gaussian_filter(
+            counts.astype(np.float64),
+            sigma=self.bandwidth,
+            mode="constant",
+            truncate=self.KERNEL_TRUNCATE,
+        )
+
+        step_x = (x1 - x0) / self.size
+        step_y = (y1 - y0) / self.size
+        x = x0 + step_x * (np.arange(self.size) + 0.5)
+        y = y0 + step_y * (np.arange(self.size) + 0.5)
+        return x, y, density
@@ -1,5 +1,6 @@
 from unittest.mock import patch
-from src.embeddingbuddy.data.processor import DataProcessor
+import numpy as np
+from src.embeddingbuddy.data.processor import DataProcessor, EmbeddingMatrix
 from src.embeddingbuddy.models.field_mapper import FieldMapping
 
 
@@ -142,6 +143,85 @@ class TestDataProcessorOpenSearch:
         assert "Transformation failed" in processed_data.error
         assert len(processed_data.documents) == 0
 
+    def test_process_opensearch_pages_limits(self):
+        processor = DataProcessor()
+        field_mapping = FieldMapping(embedding_field="vector", text_field="content")
+        pages = [
+            [{"vector": [0.1, 0.2], "content": f"doc {i}"} for i in range(3)],
+            [{"vector": [0.3, 0.4], "content": f"doc {i}"} for i in range(3, 6)],
+        ]
+        progress = []
+
+        processed_data = processor.process_opensearch_pages(
+            iter(pages), field_mapping, max_documents=4, on_progress=progress.append
+        )
+
+        assert processed_data.error is None
+        assert processed_data.embeddings.shape == (4, 2)
+        assert processed_data.truncated
+        assert progress == [3, 4]
+
+        # Two values, the JSON overhead and 5-character ids and texts
+        per_document = (
+            2 * DataProcessor.STORED_FLOAT_BYTES
+            + DataProcessor.STORED_DOCUMENT_BYTES
+            + 5
+            + 5
+            + len("Unknown") * 2
+        )
+        processed_data = processor.process_opensearch_pages(
+            iter(pages), field_mapping, max_bytes=3 * per_document
+        )
+        assert len(processed_data.documents) == 3
+
+        processed_data = processor.process_opensearch_pages(
+            iter(pages), field_mapping, id_offset=10
+        )
+        assert not processed_data.truncated
+        assert processed_data.documents[0].id == "doc_10"
+
+    def test_process_opensearch_pages_fills_float32_matrix(self):
+        processor = DataProcessor()
+        field_mapping = FieldMapping(
+            embedding_field="vector", text_field="content", tags_field="tags"
+        )
+        pages = [
+            [
+                {"vector": [0.1, 0.2, 0.3], "content": "a", "tags": "x"},
+                {"vector": [0.1, 0.2], "content": "wrong dimension"},
+                {"vector": ["n/a", 0, 0], "content": "not numeric"},
+                {"content": "no vector"},
+            ],
+            [{"vector": [0.4, 0.5, 0.6], "content": 7, "tags": ["y", 2]}],
+        ]
+
+        processed_data = processor.process_opensearch_pages(
+            iter(pages), field_mapping, dimension=3
+        )
+
+        assert processed_data.embeddings.dtype == np.float32
+        assert processed_data.embeddings.shape == (2, 3)
+        assert np.allclose(processed_data.embeddings[1], [0.4, 0.5, 0.6])
+        assert [doc.text for doc in processed_data.documents] == ["a", "7"]
+        assert [doc.tags for doc in processed_data.documents] == [["x"], ["y", "2"]]
+        assert [doc.id for doc in processed_data.documents] == ["doc_0", "doc_1"]
+        # Vectors only live in the matrix
+        assert all(doc.embedding == [] for doc in processed_data.documents)
+
+        # Slots preallocated for documents that never came are given back
+        processed_data = processor.process_opensearch_pages(
+            iter(pages), field_mapping, max_documents=10
+        )
+        assert len(processed_data.documents) == 2
+        assert not processed_data.truncated
+
+    def test_embedding_matrix_grows(self):
+        matrix = EmbeddingMatrix(capacity=2)
+        assert matrix.extend([[0, 0], [1, 1], [2, 2]]) == [True] * 3
+        assert matrix.extend([[3, 3], [4, 4], [5]]) == [True, True, False]
+
+        assert matrix.result().tolist() == [[i, i] for i in range(5)]
+
     def test_process_opensearch_data_empty_input(self):
         processor = DataProcessor()
 
@@ -0,0 +1,99 @@
+from unittest.mock import patch
+import pytest
+import numpy as np
+from src.embeddingbuddy.models import executor as executor_module, reducers, store
+from src.embeddingbuddy.models.executor import (
+    ReductionExecutor,
+    ReductionQueueFullError,
+)
+
+
+class TestReductionExecutor:
+    def test_inline_reduce(self):
+        executor = ReductionExecutor(max_workers=0)
+        embeddings = np.random.rand(30, 8)
+
+        result = executor.reduce(embeddings, "pca", 2)
+
+        assert result.reduced_embeddings.shape == (30, 2)
+        assert result.method == "PCA"
+
+    def test_inline_reduce_fingerprints_once(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            "src.embeddingbuddy.config.settings.AppSettings.MODEL_STORE_DIR",
+            str(tmp_path),
+        )
+        executor = ReductionExecutor(max_workers=0)
+        fingerprint = reducers.dataset_fingerprint
+        with (
+            patch.object(
+                executor_module, "dataset_fingerprint", wraps=fingerprint
+            ) as in_executor,
+            patch.object(
+                reducers, "dataset_fingerprint", wraps=fingerprint
+            ) as in_cache,
+            patch.object(store, "dataset_fingerprint", wraps=fingerprint) as in_store,
+        ):
+            executor.reduce(np.random.rand(30, 8), "pca", 2)
+
+        assert in_executor.call_count == 1
+        assert in_cache.call_count == 0
+        assert in_store.call_count == 0
+
+    def test_inline_unknown_method(self):
+        executor = ReductionExecutor(max_workers=0)
+
+        with pytest.raises(ValueError, match="Unknown reduction method"):
+            executor.reduce(np.random.rand(10, 4), "invalid_method", 2)
+        # The failed job must not keep its slot
+        assert executor._in_flight == {}
+
+    def test_process_pool_dedup_and_queue_limit(self):
+        executor = ReductionExecutor(max_workers=1, queue_depth=0)
+        embeddings = np.random.rand(40, 8)
+        try:
+            first = executor.submit(embeddings, "pca", 2)
+            duplicate = executor.submit(embeddings.copy(), "PCA", 2)
+            assert duplicate is first
+
+            with pytest.raises(ReductionQueueFullError):
+                executor.submit(np.random.rand(40, 8), "pca", 2)
+
+            result = first.result(timeout=120)
+            assert result.reduced_embeddings.shape == (40, 2)
+            assert executor._in_flight == {}
+
+            # A slot is free again once the job has finished
+            second = executor.reduce(np.random.rand(20, 8), "pca", 3)
+            assert second.reduced_embeddings.shape == (20, 3)
+        finally:
+            executor.shutdown()
+
+    def test_progressive_needs_workers(self):
+        executor = ReductionExecutor(max_workers=0)
+
+        with pytest.raises(ValueError, match="at least one worker"):
+            executor.submit_progressive(np.random.rand(10, 4), "tsne", 2)
+
+    def test_progressive_job(self):
+        executor = ReductionExecutor(max_workers=1, queue_depth=1)
+        embeddings = np.random.rand(40, 8)
+        try:
+            job = executor.submit_progressive(embeddings, "umap", 2, every=50)
+            assert executor.submit_progressive(embeddings, "umap", 2) is job
+            assert executor.get_job(job.job_id) is job
+
+            result = job.result(timeout=300)
+            step, coordinates = job.snapshot()
+            assert step > 0
+            assert coordinates.shape == (40, 2)
+            assert result.reduced_embeddings.shape == (40, 2)
+
+            executor.discard_job(job.job_id)
+            assert executor.get_job(job.job_id) is None
+        finally:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
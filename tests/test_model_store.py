@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+from unittest.mock import patch
+from src.embeddingbuddy.models.reducers import (
+    PCAReducer,
+    TSNEReducer,
+    UMAPReducer,
+    state_cache,
+)
+from src.embeddingbuddy.models.store import ModelStore
+
+
+class TestModelStore:
+    def setup_method(self):
+        state_cache.clear()
+
+    def test_fit_transform_persists_and_reloads(self, tmp_path):
+        embeddings = np.random.rand(40, 8)
+        store = ModelStore(str(tmp_path))
+
+        _, first = store.fit_transform(PCAReducer(n_components=2), embeddings)
+        assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+        with patch.object(PCAReducer, "fit_transform") as mock_fit:
+            reducer, second = ModelStore(str(tmp_path)).fit_transform(
+                PCAReducer(n_components=2), embeddings
+            )
+            mock_fit.assert_not_called()
+
+        assert np.allclose(first.reduced_embeddings, second.reduced_embeddings)
+        assert reducer.transform(embeddings[:5]).shape == (5, 2)
+
+    def test_key_depends_on_parameters(self):
+        reducer_2d = PCAReducer(n_components=2)
+        reducer_3d = PCAReducer(n_components=3)
+
+        assert ModelStore.make_key(reducer_2d, "abc") != ModelStore.make_key(
+            reducer_3d, "abc"
+        )
+        assert ModelStore.make_key(reducer_2d, "abc") != ModelStore.make_key(
+            reducer_2d, "def"
+        )
+        assert ModelStore.make_key(UMAPReducer(), "abc") != ModelStore.make_key(
+            UMAPReducer(metric="cosine"), "abc"
+        )
+
+    def test_key_separates_progressive_umap_fits(self):
+        umap_reducer = UMAPReducer()
+        tsne_reducer = TSNEReducer()
+
+        assert ModelStore.make_key(umap_reducer, "abc") != ModelStore.make_key(
+            umap_reducer, "abc", progressive=True
+        )
+        # t-SNE reports progress without changing its result
+        assert ModelStore.make_key(tsne_reducer, "abc") == ModelStore.make_key(
+            tsne_reducer, "abc", progressive=True
+        )
+
+    def test_load_missing_or_corrupt(self, tmp_path):
+        store = ModelStore(str(tmp_path))
+        assert store.load("missing") is None
+
+        (tmp_path / "corrupt.pkl").write_bytes(b"not a pickle")
+        assert store.load("corrupt") is None
+
+    def test_clear(self, tmp_path):
+        store = ModelStore(str(tmp_path))
+        store.fit_transform(PCAReducer(n_components=2), np.random.rand(20, 4))
+
+        assert store.clear() == 1
+        assert list(tmp_path.glob("*.pkl")) == []
+
+    def test_transform_requires_fit(self):
+        with pytest.raises(ValueError, match="has not been fitted"):
+            PCAReducer().transform(np.random.rand(3, 4))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
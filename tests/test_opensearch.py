@@ -1,5 +1,14 @@
 from unittest.mock import Mock, patch
-from src.embeddingbuddy.data.sources.opensearch import OpenSearchClient
+import threading
+import pytest
+from opensearchpy.exceptions import OpenSearchException
+from src.embeddingbuddy.config.settings import AppSettings
+from src.embeddingbuddy.data.sources.connections import OpenSearchConnectionManager
+from src.embeddingbuddy.data.sources.opensearch import (
+    BackoffTransport,
+    OpenSearchClient,
+    read_ahead,
+)
 from src.embeddingbuddy.models.field_mapper import FieldMapper, FieldMapping
 
 
@@ -39,6 +48,25 @@ class TestOpenSearchClient:
         assert "Connection failed" in message
         assert client.client is None
 
+    @patch("src.embeddingbuddy.data.sources.opensearch.OpenSearch")
+    def test_connect_reuses_client_with_same_settings(self, mock_opensearch):
+        mock_opensearch.return_value.info.return_value = {"cluster_name": "c"}
+
+        client = OpenSearchClient()
+        client.connect("https://localhost:9200", username="u", password="p")
+        client.connect("https://localhost:9200", username="u", password="p")
+
+        assert mock_opensearch.call_count == 1
+        assert mock_opensearch.return_value.info.call_count == 2
+        kwargs = mock_opensearch.call_args.kwargs
+        assert kwargs["timeout"] == AppSettings.OPENSEARCH_CONNECTION_TIMEOUT
+        assert kwargs["transport_class"] is BackoffTransport
+
+        client.connect("https://localhost:9200", username="other", password="p")
+
+        assert mock_opensearch.call_count == 2
+        mock_opensearch.return_value.close.assert_called_once()
+
     def test_analyze_fields(self):
         client = OpenSearchClient()
         client.client = Mock()
@@ -69,6 +97,95 @@ class TestOpenSearchClient:
         assert "category" in analysis["keyword_fields"]
         assert "count" in analysis["numeric_fields"]
 
+    def test_analyze_nested_and_knn_fields(self):
+        client = OpenSearchClient()
+        client.client = Mock()
+        client.client.indices.get_mapping.return_value = {
+            "test-index": {
+                "mappings": {
+                    "properties": {
+                        "embedding": {
+                            "type": "knn_vector",
+                            "dimension": 384,
+                            "method": {"name": "hnsw", "space_type": "cosinesimil"},
+                        },
+                        "meta": {
+                            "properties": {
+                                "title": {"type": "text"},
+                                "vectors": {
+                                    "properties": {
+                                        "image": {"type": "knn_vector", "dimension": 8}
+                                    }
+                                },
+                            }
+                        },
+                        "passages": {
+                            "type": "nested",
+                            "properties": {"text": {"type": "text"}},
+                        },
+                    }
+                }
+            }
+        }
+
+        success, analysis, _ = client.analyze_fields("test-index")
+
+        assert success is True
+        assert analysis["all_fields"] == [
+            "embedding",
+            "meta.title",
+            "meta.vectors.image",
+            "passages",
+        ]
+        assert analysis["text_fields"] == ["meta.title"]
+        assert analysis["vector_fields"] == [
+            {
+                "name": "embedding",
+                "type": "knn_vector",
+                "dimension": 384,
+                "space_type": "cosinesimil",
+                "metric": "cosine",
+            },
+            {
+                "name": "meta.vectors.image",
+                "type": "knn_vector",
+                "dimension": 8,
+                "space_type": "l2",
+                "metric": None,
+            },
+        ]
+        assert client.vector_field("test-index", "embedding")["dimension"] == 384
+        assert client.vector_field("test-index", "meta.title") is None
+
+    def test_analyze_fields_cached_per_mapping_version(self):
+        client = OpenSearchClient()
+        client.client = Mock()
+        client.connection_info = {"url": "https://cache-test:9200"}
+        client.client.indices.get_mapping.return_value = {
+            "test-index": {"mappings": {"properties": {"text": {"type": "text"}}}}
+        }
+
+        def state(version):
+            return {
+                "metadata": {
+                    "indices": {
+                        "test-index": {
+                            "mapping_version": version,
+                            "settings": {"index": {"uuid": "u1"}},
+                        }
+                    }
+                }
+            }
+
+        client.client.cluster.state.return_value = state(1)
+        first = client.analyze_fields("test-index")
+        second = client.analyze_fields("test-index")
+        client.client.cluster.state.return_value = state(2)
+        third = client.analyze_fields("test-index")
+
+        assert first == second == third
+        assert client.client.indices.get_mapping.call_count == 2
+
     def test_fetch_sample_data(self):
         client = OpenSearchClient()
         client.client = Mock()
@@ -92,6 +209,322 @@ class TestOpenSearchClient:
         assert documents[1]["text"] == "doc2"
 
 
+def _hits(start, stop):
+    return [
+        {
+            "_id": f"id{i}",
+            "_source": {"text": f"doc{i}", "embedding": [float(i)]},
+            "sort": [i],
+        }
+        for i in range(start, stop)
+    ]
+
+
+class TestOpenSearchPagination:
+    def setup_method(self):
+        self.client = OpenSearchClient()
+        self.client.client = Mock()
+
+    def test_point_in_time_pages(self):
+        self.client.client.create_pit.return_value = {"pit_id": "pit-1"}
+        self.client.client.search.side_effect = [
+            {"hits": {"hits": _hits(0, 2)}},
+            {"hits": {"hits": _hits(2, 3)}},
+        ]
+
+        pages = list(self.client.iter_pages("test-index", page_size=2))
+
+        assert [[doc["text"] for doc in page] for page in pages] == [
+            ["doc0", "doc1"],
+            ["doc2"],
+        ]
+        second_body = self.client.client.search.call_args_list[1].kwargs["body"]
+        assert second_body["search_after"] == [1]
+        assert second_body["pit"]["id"] == "pit-1"
+        self.client.client.delete_pit.assert_called_once_with(
+            body={"pit_id": ["pit-1"]}
+        )
+
+    def test_scroll_fallback_without_point_in_time(self):
+        self.client.client.create_pit.side_effect = OpenSearchException("no PIT")
+        self.client.client.search.return_value = {
+            "_scroll_id": "scroll-1",
+            "hits": {"hits": _hits(0, 2)},
+        }
+        self.client.client.scroll.return_value = {
+            "_scroll_id": "scroll-1",
+            "hits": {"hits": []},
+        }
+
+        pages = list(self.client.iter_pages("test-index", page_size=2))
+
+        assert len(pages) == 1
+        self.client.client.scroll.assert_called_once()
+        self.client.client.clear_scroll.assert_called_once_with(scroll_id="scroll-1")
+
+    def test_fetch_data_stops_early_and_releases_cursor(self, monkeypatch):
+        monkeypatch.setattr(AppSettings, "OPENSEARCH_PAGE_SIZE", 2)
+        self.client.client.create_pit.return_value = {"pit_id": "pit-1"}
+        self.client.client.search.return_value = {"hits": {"hits": _hits(0, 2)}}
+
+        success, documents, message = self.client.fetch_data("test-index", size=3)
+
+        assert success is True
+        assert len(documents) == 3
+        assert self.client.client.search.call_count == 2
+        self.client.client.delete_pit.assert_called_once()
+
+    def test_only_mapped_fields_are_requested(self):
+        mapping = FieldMapping(
+            embedding_field="vector", text_field="content", tags_field="vector"
+        )
+        self.client.client.create_pit.return_value = {"pit_id": "pit-1"}
+        # filter_path leaves an empty response when there are no hits
+        self.client.client.search.return_value = {}
+
+        pages = list(
+            self.client.iter_pages("test-index", source_fields=mapping.source_fields())
+        )
+
+        assert pages == []
+        call = self.client.client.search.call_args
+        assert call.kwargs["body"]["_source"] == ["vector", "content"]
+        assert call.kwargs["filter_path"] == OpenSearchClient.PIT_FILTER_PATH
+
+    def test_random_pages_use_seeded_score(self):
+        self.client.client.create_pit.return_value = {"pit_id": "pit-1"}
+        self.client.client.search.return_value = {"hits": {"hits": _hits(0, 1)}}
+
+        self.client.client.indices.get_settings.return_value = {
+            "test-index": {"settings": {"index": {"number_of_shards": "1"}}}
+        }
+
+        list(self.client.iter_random_pages("test-index", seed=7))
+
+        body = self.client.client.search.call_args.kwargs["body"]
+        random_score = body["query"]["function_score"]["random_score"]
+        assert random_score["seed"] == 7
+        assert body["sort"] == [{"_score": "desc"}, {"_shard_doc": "asc"}]
+
+    def test_stratified_sample_is_proportional(self):
+        aggregation = {
+            "hits": {"total": {"value": 1000}},
+            "aggregations": {
+                "strata": {
+                    "buckets": [
+                        {"key": "news", "doc_count": 900},
+                        {"key": "blog", "doc_count": 95},
+                    ]
+                }
+            },
+        }
+        self.client.client.create_pit.return_value = {"pit_id": "pit-1"}
+        self.client.client.search.side_effect = [
+            aggregation,
+            {"hits": {"hits": _hits(0, 8)}},
+            {"hits": {"hits": _hits(8, 9)}},
+            {"hits": {"hits": _hits(9, 10)}},
+        ]
+
+        pages = list(
+            self.client.iter_stratified_pages("test-index", "category", 10, seed=1)
+        )
+
+        # Every stratum keeps a document, taken from the largest share
+        assert [len(page) for page in pages] == [8, 1, 1]
+        fetches = self.client.client.search.call_args_list[1:]
+        filters = [
+            call.kwargs["body"]["query"]["function_score"]["query"]["bool"]["filter"][0]
+            for call in fetches
+        ]
+        assert filters[0] == {"term": {"category": "news"}}
+        assert filters[1] == {"term": {"category": "blog"}}
+        # The 5 documents without a listed category form the last stratum
+        assert filters[2] == {
+            "bool": {"must_not": [{"terms": {"category": ["news", "blog"]}}]}
+        }
+
+    def test_knn_pages_batch_prompts_and_skip_repeats(self, monkeypatch):
+        monkeypatch.setattr(AppSettings, "OPENSEARCH_MSEARCH_BATCH", 2)
+        self.client.client.msearch.side_effect = [
+            {"responses": [{"hits": {"hits": _hits(0, 2)}}, {"hits": {"hits": []}}]},
+            {"responses": [{"hits": {"hits": _hits(1, 3)}}]},
+        ]
+        query = {"term": {"category": "news"}}
+
+        pages = list(
+            self.client.iter_knn_pages(
+                "test-index", "vector", [[0.1], [0.2], [0.3]], k=2, query=query
+            )
+        )
+
+        assert [[doc["text"] for doc in page] for page in pages] == [
+            ["doc0", "doc1"],
+            ["doc2"],
+        ]
+        searches = self.client.client.msearch.call_args_list[0].kwargs["body"]
+        assert len(searches) == 4
+        assert searches[1]["query"]["knn"]["vector"] == {
+            "vector": [0.1],
+            "k": 2,
+            "filter": query,
+        }
+
+    def test_knn_search_errors_are_raised(self):
+        self.client.client.msearch.return_value = {
+            "responses": [{"error": {"type": "illegal_argument_exception"}}]
+        }
+
+        with pytest.raises(OpenSearchException):
+            list(self.client.iter_knn_pages("test-index", "vector", [[0.1]], k=2))
+
+    def test_allocate_keeps_small_strata(self):
+        assert OpenSearchClient._allocate(10, [1000, 5, 0]) == [9, 1, 0]
+        assert OpenSearchClient._allocate(100, [30, 20]) == [30, 20]
+        assert sum(OpenSearchClient._allocate(3, [10, 1, 1, 1, 1])) == 3
+
+    def test_shard_count_from_index_settings(self):
+        self.client.client.indices.get_settings.return_value = {
+            "a": {"settings": {"index": {"number_of_shards": "3"}}},
+            "b": {"settings": {"index": {"number_of_shards": "2"}}},
+        }
+
+        assert self.client.get_shard_count("a,b") == 5
+
+    def test_parallel_slices_read_every_page(self):
+        def search(body, **kwargs):
+            # Each slice returns one short page holding its own document
+            slice_id = body["slice"]["id"]
+            return {"hits": {"hits": _hits(slice_id, slice_id + 1)}}
+
+        self.client.client.create_pit.return_value = {"pit_id": "pit-1"}
+        self.client.client.search.side_effect = search
+
+        pages = list(self.client.iter_pages_parallel("test-index", n_slices=3))
+
+        texts = sorted(doc["text"] for page in pages for doc in page)
+        assert texts == ["doc0", "doc1", "doc2"]
+        slices = [
+            call.kwargs["body"]["slice"]
+            for call in self.client.client.search.call_args_list
+        ]
+        assert sorted(s["id"] for s in slices) == [0, 1, 2]
+        assert all(s["max"] == 3 for s in slices)
+        assert self.client.client.delete_pit.call_count == 3
+
+    def test_parallel_slices_forward_errors(self):
+        self.client.client.create_pit.return_value = {"pit_id": "pit-1"}
+        self.client.client.search.side_effect = OpenSearchException("boom")
+
+        with pytest.raises(OpenSearchException):
+            list(self.client.iter_pages_parallel("test-index", n_slices=2))
+
+
+class TestReadAhead:
+    def test_next_page_is_fetched_while_current_is_processed(self):
+        fetched_second = threading.Event()
+
+        def reader():
+            yield [1]
+            yield [2]
+            fetched_second.set()
+            yield [3]
+
+        pages = read_ahead([reader], depth=2)
+
+        assert next(pages) == [1]
+        # Nothing else asked for the second page yet
+        assert fetched_second.wait(timeout=5)
+        assert list(pages) == [[2], [3]]
+
+    def test_closing_early_closes_readers(self):
+        closed = threading.Event()
+
+        def reader():
+            try:
+                for i in range(1000):
+                    yield [i]
+            finally:
+                closed.set()
+
+        pages = read_ahead([reader, reader], depth=1)
+        next(pages)
+        pages.close()
+
+        assert closed.wait(timeout=5)
+
+
+class TestBackoffTransport:
+    def test_retries_with_growing_waits(self, monkeypatch):
+        from opensearchpy.exceptions import ConnectionError, TransportError
+
+        sleeps = []
+        monkeypatch.setattr(
+            "src.embeddingbuddy.data.sources.opensearch.time.sleep", sleeps.append
+        )
+        transport = BackoffTransport(
+            [{"host": "localhost"}],
+            max_retries=3,
+            retry_on_timeout=True,
+            backoff_factor=0.5,
+        )
+        connection = Mock()
+        connection.perform_request.side_effect = [
+            ConnectionError("N/A", "refused", None),
+            TransportError(503, "unavailable"),
+            (200, {}, '{"ok": true}'),
+        ]
+        monkeypatch.setattr(transport, "get_connection", lambda: connection)
+
+        assert transport.perform_request("GET", "/") == {"ok": True}
+        assert sleeps == [0.5, 1.0]
+
+    def test_client_errors_are_not_retried(self, monkeypatch):
+        from opensearchpy.exceptions import TransportError
+
+        transport = BackoffTransport([{"host": "localhost"}], max_retries=3)
+        connection = Mock()
+        connection.perform_request.side_effect = TransportError(400, "bad")
+        monkeypatch.setattr(transport, "get_connection", lambda: connection)
+
+        with pytest.raises(TransportError):
+            transport.perform_request("GET", "/")
+        assert connection.perform_request.call_count == 1
+
+
+class TestOpenSearchConnectionManager:
+    def test_clients_are_kept_per_session_and_credentials(self):
+        manager = OpenSearchConnectionManager(idle_timeout=60)
+
+        first = manager.acquire("s1", "https://host", "u", "p")
+        manager.release(first)
+
+        assert manager.acquire("s1", "https://host", "u", "p") is first
+        assert manager.acquire("s2", "https://host", "u", "p") is not first
+        assert manager.acquire("s1", "https://host", "u", "other") is not first
+        assert len(manager) == 3
+
+    def test_idle_clients_are_evicted_unless_in_use(self, monkeypatch):
+        now = [0.0]
+        monkeypatch.setattr(
+            "src.embeddingbuddy.data.sources.connections.time.monotonic",
+            lambda: now[0],
+        )
+        manager = OpenSearchConnectionManager(idle_timeout=10)
+        idle = manager.acquire("s1", "https://host")
+        idle.disconnect = Mock()
+        manager.release(idle)
+        busy = manager.acquire("s2", "https://host")
+        busy.disconnect = Mock()
+
+        now[0] = 20.0
+        manager.acquire("s3", "https://host")
+
+        idle.disconnect.assert_called_once()
+        busy.disconnect.assert_not_called()
+        assert len(manager) == 2
+
+
 class TestFieldMapper:
     def test_suggest_mappings(self):
         field_analysis = {
@@ -266,6 +699,26 @@ class TestFieldMapper:
         assert transformed[0]["id"] == "doc1"
         assert transformed[0]["category"] == "news"
 
+    def test_transform_documents_dotted_paths(self):
+        mapping = FieldMapping(
+            embedding_field="meta.vector", text_field="body.text", id_field="doc.id"
+        )
+        raw_documents = [
+            {
+                "meta": {"vector": [0.1, 0.2]},
+                "body": {"text": "nested"},
+                "doc.id": "doc1",
+            },
+            {"meta": {"vector": [0.3, 0.4]}, "body": "not an object"},
+        ]
+
+        transformed = FieldMapper.transform_documents(raw_documents, mapping)
+
+        assert transformed == [
+            {"embedding": [0.1, 0.2], "text": "nested", "id": "doc1"}
+        ]
+        assert FieldMapper.to_document(raw_documents[0], mapping).id == "doc1"
+
     def test_transform_documents_missing_required(self):
         mapping = FieldMapping(embedding_field="vector", text_field="content")
 
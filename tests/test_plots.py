@@ -0,0 +1,421 @@
+from unittest.mock import patch
+import base64
+import pytest
+import numpy as np
+from src.embeddingbuddy.models.schemas import Document, PlotData
+from src.embeddingbuddy.visualization.cache import FigureCache
+from src.embeddingbuddy.visualization.colors import ColorMapper, TagIndex
+from src.embeddingbuddy.config.settings import AppSettings
+from src.embeddingbuddy.visualization.plots import PlotFactory, encode_typed_arrays
+from src.embeddingbuddy.visualization.raster import DensityGrid, DensityRasterizer
+
+
+def _documents(n, prefix="doc"):
+    return [
+        Document(
+            id=f"{prefix}{i}",
+            text=f"text {i}",
+            embedding=[0.0],
+            category=f"cat{i % 3}",
+            tags=[f"tag{i}"],
+        )
+        for i in range(n)
+    ]
+
+
+def _decode(typed_array):
+    dtypes = {"u1": np.uint8, "u2": np.uint16, "f4": np.float32}
+    return np.frombuffer(
+        base64.b64decode(typed_array["bdata"]), dtype=dtypes[typed_array["dtype"]]
+    )
+
+
+class TestColorMapper:
+    def test_encode_shares_codes_across_layers(self):
+        (doc_codes, prompt_codes), labels = ColorMapper.encode(
+            ["a", "b", "a"], ["c", "a"]
+        )
+
+        assert labels == ["a", "b", "c"]
+        assert doc_codes.tolist() == [0, 1, 0]
+        assert prompt_codes.tolist() == [2, 0]
+
+    def test_top_k_buckets_the_rest(self):
+        values = ["a", "b", "b", "c", "c", "c", "d"]
+
+        (codes,), labels = ColorMapper.encode(values, top_k=2)
+
+        assert labels == ["c", "b", "Other"]
+        assert codes.tolist() == [2, 1, 1, 0, 0, 0, 2]
+        assert ColorMapper.label_colors(labels, bucketed=True)[-1] == "#B6B6B6"
+
+    def test_contains_tag(self):
+        index = TagIndex([["x", "y"], [], ["y"], ["y", "y"], ["z"]])
+
+        assert index.mask("y").tolist() == [True, False, True, True, False]
+        assert not index.mask("missing").any()
+        assert index.top_tags(2) == ["y", "x"]
+
+        (doc_codes, prompt_codes), labels = ColorMapper.encode_contains(
+            index, "y", 3, 2
+        )
+        assert labels == ["y", "Other"]
+        assert doc_codes.tolist() == [0, 1, 0]
+        assert prompt_codes.tolist() == [0, 1]
+
+    def test_grayscale_palette(self):
+        palette = ("#636EFA", "rgb(255,0,0)", "not a color")
+
+        grays = ColorMapper.grayscale_palette(palette)
+
+        assert grays == ("rgb(115,118,160)", "rgb(129,53,53)", "rgb(128,128,128)")
+        assert ColorMapper.grayscale_palette(palette) is grays
+        assert ColorMapper.to_grayscale_hex("#636EFA") == grays[0]
+
+    def test_discrete_colorscale_steps(self):
+        colorscale = ColorMapper.discrete_colorscale(["red", "blue"])
+
+        assert colorscale == [[0.0, "red"], [0.5, "red"], [0.5, "blue"], [1.0, "blue"]]
+
+
+class TestPlotFactory:
+    @pytest.mark.parametrize("dimensions", ["2d", "3d"])
+    def test_one_data_trace_regardless_of_cardinality(self, dimensions, monkeypatch):
+        monkeypatch.setattr(AppSettings, "COLOR_TOP_K", 1000)
+        n = 100
+        plot_data = PlotData(documents=_documents(n), coordinates=np.random.rand(n, 3))
+        factory = PlotFactory()
+
+        fig = factory.create_plot(plot_data, dimensions, color_by="tags")
+
+        data_traces = [trace for trace in fig.data if not trace.showlegend]
+        assert len(data_traces) == 1
+        assert len(data_traces[0].x) == n
+        # Capped legend plus a "+N more" entry
+        legend_traces = [trace for trace in fig.data if trace.showlegend]
+        assert len(legend_traces) == factory.LEGEND_MAX_ENTRIES + 1
+        assert legend_traces[-1].name == f"+{n - factory.LEGEND_MAX_ENTRIES} more"
+
+    def test_tags_are_bucketed_to_top_k(self, monkeypatch):
+        monkeypatch.setattr(AppSettings, "COLOR_TOP_K", 5)
+        n = 100
+        plot_data = PlotData(documents=_documents(n), coordinates=np.random.rand(n, 2))
+
+        fig = PlotFactory().create_plot(plot_data, "2d", color_by="tags")
+
+        assert max(fig.data[0].marker.color) == 5
+        assert [trace.name for trace in fig.data[1:]] == [
+            "tag0",
+            "tag1",
+            "tag2",
+            "tag3",
+            "tag4",
+            "Other",
+        ]
+
+    def test_hover_text_is_columnar(self):
+        documents = _documents(2)
+        documents[1].text = "x" * 150
+        plot_data = PlotData(documents=documents, coordinates=np.random.rand(2, 2))
+
+        fig = PlotFactory().create_plot(plot_data, "2d")
+
+        hover = fig.data[0].customdata
+        assert hover.shape == (2,)
+        assert hover[0] == (
+            "id=doc0<br>text_preview=text 0<br>category=cat0"
+            "<br>subcategory=Unknown<br>tags_str=tag0"
+        )
+        assert "text_preview=" + "x" * 100 + "...<br>" in hover[1]
+
+    def test_hover_text_is_built_once(self):
+        plot_data = PlotData(documents=_documents(3), coordinates=np.random.rand(3, 2))
+        factory = PlotFactory()
+
+        factory.create_plot(plot_data, "2d")
+        hover = plot_data.hover_text
+        assert hover is not None and hover.shape == (3,)
+
+        with patch.object(factory, "hover_text") as hover_text:
+            fig = factory.create_plot(plot_data, "2d", color_by="subcategory")
+        hover_text.assert_not_called()
+        assert list(fig.data[0].customdata) == list(hover)
+
+    def test_dual_plot_layers(self):
+        plot_data = PlotData(
+            documents=_documents(10),
+            coordinates=np.random.rand(10, 2),
+            prompts=_documents(2, prefix="prompt"),
+            prompt_coordinates=np.random.rand(2, 2),
+        )
+
+        fig = PlotFactory().create_plot(
+            plot_data, "2d", color_by="category", show_prompts=["show"]
+        )
+
+        data_traces = [trace for trace in fig.data if not trace.showlegend]
+        assert [trace.name for trace in data_traces] == ["Documents", "Prompts"]
+        assert data_traces[0].type == "scattergl"
+        assert data_traces[1].marker.symbol == "diamond"
+
+    def test_typed_array_payload(self, monkeypatch):
+        monkeypatch.setattr(AppSettings, "COLOR_TOP_K", 1000)
+        n = 300
+        coordinates = np.random.rand(n, 2)
+        plot_data = PlotData(documents=_documents(n), coordinates=coordinates)
+
+        trace = PlotFactory().create_plot(plot_data, "2d", "tags").to_dict()["data"][0]
+
+        assert trace["x"]["dtype"] == "f4"
+        assert np.allclose(_decode(trace["x"]), coordinates[:, 0], atol=1e-6)
+        # 300 distinct tags no longer fit in a byte
+        assert trace["marker"]["color"]["dtype"] == "u2"
+        assert _decode(trace["marker"]["color"]).tolist() == list(range(n))
+
+    def test_encode_typed_arrays(self):
+        codes = np.array([1, 300, 2], dtype=np.uint16)
+        payload = {
+            "markers": [{"color": codes}],
+            "grid": np.zeros((2, 3), dtype=np.float32),
+            "ids": np.array([1, 2]),
+        }
+
+        encoded = encode_typed_arrays(payload)
+
+        assert encoded is payload
+        assert encoded["markers"][0]["color"]["dtype"] == "u2"
+        assert _decode(encoded["markers"][0]["color"]).tolist() == [1, 300, 2]
+        assert encoded["grid"]["shape"] == "2, 3"
+        # plotly.js has no 64-bit integer arrays
+        assert encoded["ids"] == [1, 2]
+
+    def test_hidden_prompt_layer_is_kept(self):
+        plot_data = PlotData(
+            documents=_documents(10),
+            coordinates=np.random.rand(10, 3),
+            prompts=_documents(2, prefix="prompt"),
+            prompt_coordinates=np.random.rand(2, 3),
+        )
+
+        fig = PlotFactory().create_plot(plot_data, "3d", show_prompts=[])
+
+        assert fig.data[1].name == "Prompts"
+        assert fig.data[1].visible is False
+        assert not any(trace.name.startswith("Prompts -") for trace in fig.data)
+
+
+class TestPlotStyles:
+    def setup_method(self):
+        self.plot_data = PlotData(
+            documents=_documents(30),
+            coordinates=np.random.rand(30, 2),
+            prompts=_documents(2, prefix="prompt"),
+            prompt_coordinates=np.random.rand(2, 2),
+        )
+        self.factory = PlotFactory()
+
+    def test_styles_match_rendered_figures(self):
+        styles = self.factory.create_styles(self.plot_data, "2d", "PCA")
+
+        assert styles["n_layers"] == 2
+        assert not styles["lod"]
+        assert [option["value"] for option in styles["color_options"]][3:] == [
+            f"tag:tag{i}" for i in range(AppSettings.COLOR_TAG_OPTIONS)
+        ]
+        for color_by in ("category", "subcategory", "tags", "tag:tag0"):
+            option = styles["options"][color_by]
+            for key, show_prompts in (("documents", []), ("prompts", ["show"])):
+                figure = self.factory.create_plot(
+                    self.plot_data, "2d", color_by, "PCA", show_prompts
+                )
+                assert _decode(option["markers"][0]["color"]).tolist() == list(
+                    figure.data[0].marker.color
+                )
+                assert [trace["name"] for trace in option["legend"][key]] == [
+                    trace.name for trace in figure.data[2:]
+                ]
+                assert option["title"] == figure.layout.title.text
+
+    def test_legend_entries_carry_their_labels(self):
+        figure = self.factory.create_plot(self.plot_data, "2d", "category", "PCA")
+
+        # Clicks reach the category filter through the entries' meta
+        assert figure.layout.legend.itemclick is None
+        assert [trace.meta for trace in figure.data[2:]] == ["cat0", "cat1", "cat2"]
+
+    def test_lod_styles_only_carry_labels(self, monkeypatch):
+        monkeypatch.setattr(AppSettings, "LOD_POINT_THRESHOLD", 10)
+
+        styles = self.factory.create_styles(self.plot_data, "2d", "PCA")
+
+        assert styles["lod"]
+        assert styles["options"]["category"] == {"labels": ["cat0", "cat1", "cat2"]}
+
+
+class TestDensityRasterizer:
+    def test_blends_category_colors(self):
+        coordinates = np.array([[0.1, 0.9], [0.1, 0.9], [0.9, 0.1]])
+        codes = np.array([0, 1, 0])
+        rasterizer = DensityRasterizer(width=2, height=2)
+
+        image = rasterizer.render_rgba(
+            coordinates, codes, ["#ff0000", "#0000ff"], (0.0, 1.0, 0.0, 1.0)
+        )
+
+        # Top-left pixel mixes one red and one blue point; bottom-right is red
+        assert image[0, 0].tolist()[:3] == [127, 0, 127]
+        assert image[1, 1].tolist()[:3] == [255, 0, 0]
+        assert image[0, 0, 3] > image[1, 1, 3] > 0
+        assert image[0, 1, 3] == 0
+
+    def test_png_data_uri(self):
+        uri = DensityRasterizer(8, 8).render(
+            np.random.rand(50, 2), np.zeros(50, dtype=int), ["#123456"], (0, 1, 0, 1)
+        )
+        assert uri.startswith("data:image/png;base64,iVBORw0KGgo")
+
+
+class TestDensityGrid:
+    def test_mass_lands_in_the_right_cell(self):
+        coordinates = np.array([[0.1, 0.9]] * 5)
+
+        x, y, density = DensityGrid(size=4, bandwidth=0.5).compute(
+            coordinates, (0.0, 1.0, 0.0, 1.0)
+        )
+
+        assert x.tolist() == [0.125, 0.375, 0.625, 0.875]
+        # Rows run bottom to top
+        assert np.unravel_index(density.argmax(), density.shape) == (3, 0)
+        assert density[0, 3] < density[3, 0] * 0.01
+
+    def test_blur_keeps_the_mass_away_from_edges(self):
+        coordinates = np.full((7, 2), 0.5)
+
+        _, _, density = DensityGrid(size=1024, bandwidth=4.0).compute(
+            coordinates, (0.0, 1.0, 0.0, 1.0)
+        )
+
+        assert density.sum() == pytest.approx(7, rel=1e-3)
+        # The kernel is cut off at three bandwidths
+        assert np.count_nonzero(density.sum(axis=0)) == 2 * 12 + 1
+
+
+class TestLevelOfDetail:
+    @pytest.fixture(autouse=True)
+    def small_thresholds(self, monkeypatch):
+        monkeypatch.setattr(AppSettings, "LOD_POINT_THRESHOLD", 50)
+        monkeypatch.setattr(AppSettings, "LOD_MAX_POINTS_PER_VIEW", 30)
+
+    def test_overview_image_and_capped_points(self):
+        n = 100
+        plot_data = PlotData(documents=_documents(n), coordinates=np.random.rand(n, 2))
+        factory = PlotFactory()
+
+        assert factory.uses_lod(plot_data, "2d")
+        assert not factory.uses_lod(plot_data, "3d")
+
+        fig = factory.create_plot(plot_data, "2d")
+
+        assert len(fig.layout.images) == 1
+        assert fig.layout.images[0].source.startswith("data:image/png")
+        assert len(fig.data[0].x) == 30
+
+    def test_viewport_points(self):
+        n = 100
+        coordinates = np.random.rand(n, 2)
+        plot_data = PlotData(documents=_documents(n), coordinates=coordinates)
+
+        fig = PlotFactory().create_plot(plot_data, "2d", view=(0.0, 0.5, 0.0, 0.5))
+
+        in_view = ((coordinates[:, 0] <= 0.5) & (coordinates[:, 1] <= 0.5)).sum()
+        assert len(fig.data[0].x) == min(in_view, 30)
+        assert np.all(np.asarray(fig.data[0].x) <= 0.5)
+        assert tuple(fig.layout.xaxis.range) == (0.0, 0.5)
+
+    def test_view_patch_matches_rendered_view(self):
+        n = 100
+        plot_data = PlotData(documents=_documents(n), coordinates=np.random.rand(n, 2))
+        factory = PlotFactory()
+        view = (0.0, 0.5, 0.0, 0.5)
+
+        fig = factory.create_plot(plot_data, "2d", "category", "PCA", view=view)
+        points, title = factory.create_lod_view(plot_data, "category", "PCA", view)
+
+        assert title == fig.layout.title.text
+        assert points["type"] == "scattergl"
+        assert _decode(points["x"]).tolist() == list(fig.data[0].x)
+        assert list(points["customdata"]) == list(fig.data[0].customdata)
+
+    def test_density_mode_hides_points_until_zoomed(self, monkeypatch):
+        monkeypatch.setattr(AppSettings, "DENSITY_MAX_POINTS", 20)
+        n = 40
+        coordinates = np.random.default_rng(0).random((n, 2))
+        plot_data = PlotData(documents=_documents(n), coordinates=coordinates)
+        factory = PlotFactory()
+
+        assert factory.uses_lod(plot_data, "2d", density=True)
+        fig = factory.create_plot(plot_data, "2d", density=True)
+
+        assert len(fig.layout.images) == 0
+        assert fig.data[-1].type == "heatmap"
+        assert len(fig.data[0].x) == 0
+
+        zoomed = factory.create_plot(
+            plot_data, "2d", view=(0.0, 0.3, 0.0, 1.0), density=True
+        )
+        assert len(zoomed.data[0].x) == (coordinates[:, 0] <= 0.3).sum()
+
+    def test_hidden_labels(self):
+        n = 60
+        plot_data = PlotData(documents=_documents(n), coordinates=np.random.rand(n, 2))
+
+        fig = PlotFactory().create_plot(plot_data, "2d", hidden=["cat0"])
+
+        assert len(fig.data[0].x) == 30
+        assert all("category=cat0<br>" not in hover for hover in fig.data[0].customdata)
+        legend = {trace.meta: trace.visible for trace in fig.data if trace.showlegend}
+        assert legend == {"cat0": "legendonly", "cat1": True, "cat2": True}
+
+
+class TestFigureCache:
+    def _figure(self, n):
+        plot_data = PlotData(documents=_documents(n), coordinates=np.random.rand(n, 2))
+        return PlotFactory().create_plot(plot_data, "2d")
+
+    def test_hit_returns_encoded_figure(self):
+        cache = FigureCache(max_bytes=10_000_000)
+        stored = cache.put("a", self._figure(10), {"revision": "r"})
+
+        figure, styles = cache.get("a")
+
+        assert figure is stored
+        assert figure["data"][0]["x"]["dtype"] == "f4"
+        assert styles == {"revision": "r"}
+        assert cache.get("b") is None
+
+    def test_evicts_least_recently_used_by_size(self):
+        figure = self._figure(200)
+        cache = FigureCache(max_bytes=10_000_000)
+        cache.put("a", figure)
+        entry_bytes = cache.current_bytes
+
+        cache.max_bytes = int(entry_bytes * 2.5)
+        cache.put("b", figure)
+        cache.get("a")
+        cache.put("c", figure)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.current_bytes == 2 * entry_bytes
+
+    def test_oversized_figure_is_not_stored(self):
+        cache = FigureCache(max_bytes=100)
+        cache.put("a", self._figure(200))
+
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
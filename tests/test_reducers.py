@@ -1,10 +1,16 @@
 import pytest
 import numpy as np
+from src.embeddingbuddy.models import reducers
 from src.embeddingbuddy.models.reducers import (
     ReducerFactory,
     PCAReducer,
     TSNEReducer,
     UMAPReducer,
+    RandomProjectionReducer,
+    SparseRandomProjectionReducer,
+    TruncatedSVDReducer,
+    dataset_fingerprint,
+    state_cache,
 )
 
 
@@ -24,6 +30,11 @@ class TestReducerFactory:
         assert isinstance(reducer, UMAPReducer)
         assert reducer.n_components == 2
 
+    def test_metric_only_for_neighbour_methods(self):
+        assert ReducerFactory.create_reducer("umap", metric="cosine").metric == "cosine"
+        assert ReducerFactory.create_reducer("tsne", metric="cosine").metric == "cosine"
+        assert ReducerFactory.create_reducer("pca", metric="cosine").metric is None
+
     def test_invalid_method(self):
         with pytest.raises(ValueError, match="Unknown reduction method"):
             ReducerFactory.create_reducer("invalid_method")
@@ -33,6 +44,22 @@ class TestReducerFactory:
         assert "pca" in methods
         assert "tsne" in methods
         assert "umap" in methods
+        assert "random_projection" in methods
+        assert "sparse_random_projection" in methods
+        assert "truncated_svd" in methods
+
+    def test_create_large_data_reducers(self):
+        assert isinstance(
+            ReducerFactory.create_reducer("random_projection"),
+            RandomProjectionReducer,
+        )
+        assert isinstance(
+            ReducerFactory.create_reducer("sparse_random_projection"),
+            SparseRandomProjectionReducer,
+        )
+        assert isinstance(
+            ReducerFactory.create_reducer("truncated_svd"), TruncatedSVDReducer
+        )
 
 
 class TestPCAReducer:
@@ -86,5 +113,172 @@ class TestUMAPReducer:
         assert reducer.get_method_name() == "UMAP"
 
 
+class TestLargeDataReducers:
+    def test_random_projection_chunked(self):
+        embeddings = np.random.rand(250, 64)
+        reducer = RandomProjectionReducer(n_components=2)
+        reducer.CHUNK_SIZE = 100
+
+        result = reducer.fit_transform(embeddings)
+
+        assert result.reduced_embeddings.shape == (250, 2)
+        assert np.allclose(
+            result.reduced_embeddings, reducer._reducer.transform(embeddings)
+        )
+        assert result.method == "Random Projection"
+
+    def test_sparse_random_projection_sparse_input(self):
+        import scipy.sparse as sp
+
+        embeddings = sp.random(200, 5000, density=0.01, format="csr")
+        result = SparseRandomProjectionReducer(n_components=3).fit_transform(embeddings)
+
+        assert isinstance(result.reduced_embeddings, np.ndarray)
+        assert result.reduced_embeddings.shape == (200, 3)
+
+    def test_truncated_svd_memmap(self, tmp_path):
+        data = np.random.rand(120, 32).astype(np.float32)
+        embeddings = np.memmap(
+            tmp_path / "embeddings.dat", dtype=np.float32, mode="w+", shape=data.shape
+        )
+        embeddings[:] = data
+
+        result = TruncatedSVDReducer(n_components=2).fit_transform(embeddings)
+
+        assert result.reduced_embeddings.shape == (120, 2)
+        assert result.variance_explained is not None
+        assert result.method == "Truncated SVD"
+
+    def test_truncated_svd_falls_back_to_pca_for_narrow_input(self):
+        embeddings = np.random.rand(20, 2)
+
+        result = TruncatedSVDReducer(n_components=2).fit_transform(embeddings)
+
+        assert result.reduced_embeddings.shape == (20, 2)
+        assert result.method == "PCA"
+
+    def test_truncated_svd_fits_on_sample(self, monkeypatch):
+        monkeypatch.setattr(TruncatedSVDReducer, "FIT_SAMPLE_SIZE", 50)
+        embeddings = np.random.rand(200, 16)
+
+        reducer = TruncatedSVDReducer(n_components=2)
+        result = reducer.fit_transform(embeddings)
+
+        assert result.reduced_embeddings.shape == (200, 2)
+        assert np.allclose(result.reduced_embeddings, reducer.transform(embeddings))
+
+
+class TestReducerStateCache:
+    def setup_method(self):
+        state_cache.clear()
+
+    def test_fingerprint_depends_on_content(self):
+        embeddings = np.random.rand(10, 4)
+        assert dataset_fingerprint(embeddings) == dataset_fingerprint(embeddings.copy())
+        assert dataset_fingerprint(embeddings) != dataset_fingerprint(embeddings + 1.0)
+
+    def test_fingerprint_hashes_memmap_in_blocks(self, tmp_path, monkeypatch):
+        data = np.random.rand(100, 8)
+        embeddings = np.memmap(
+            tmp_path / "embeddings.dat", dtype=data.dtype, mode="w+", shape=data.shape
+        )
+        embeddings[:] = data
+        expected = dataset_fingerprint(data)
+
+        monkeypatch.setattr(reducers, "FINGERPRINT_BLOCK_BYTES", 8 * 8 * 7)
+
+        assert dataset_fingerprint(embeddings) == expected
+        assert dataset_fingerprint(np.asfortranarray(data)) == expected
+
+    def test_pca_2d_slices_3d_fit(self):
+        embeddings = np.random.rand(40, 16)
+
+        result_3d = PCAReducer(n_components=3).fit_transform(embeddings)
+        result_2d = PCAReducer(n_components=2).fit_transform(embeddings)
+
+        assert len(state_cache) == 1
+        assert np.allclose(
+            result_2d.reduced_embeddings, result_3d.reduced_embeddings[:, :2]
+        )
+        assert np.allclose(
+            result_2d.variance_explained, result_3d.variance_explained[:2]
+        )
+
+    def test_tsne_reuses_affinities_across_dimensions(self):
+        embeddings = np.random.rand(30, 10)
+
+        result_2d = TSNEReducer(n_components=2).fit_transform(embeddings)
+        result_3d = TSNEReducer(n_components=3).fit_transform(embeddings)
+
+        assert len(state_cache) == 1
+        assert result_2d.reduced_embeddings.shape == (30, 2)
+        assert result_3d.reduced_embeddings.shape == (30, 3)
+
+    def test_umap_reuses_graph_across_dimensions(self):
+        embeddings = np.random.rand(50, 10)
+
+        result_2d = UMAPReducer(n_components=2).fit_transform(embeddings)
+        result_3d = UMAPReducer(n_components=3).fit_transform(embeddings)
+
+        assert len(state_cache) == 1
+        assert result_2d.reduced_embeddings.shape == (50, 2)
+        assert result_3d.reduced_embeddings.shape == (50, 3)
+
+    def test_umap_graph_keyed_by_metric(self):
+        embeddings = np.random.rand(50, 10)
+
+        UMAPReducer(n_components=2).fit_transform(embeddings)
+        result = UMAPReducer(n_components=2, metric="cosine").fit_transform(embeddings)
+
+        assert len(state_cache) == 2
+        assert result.reduced_embeddings.shape == (50, 2)
+
+
+class TestProgressiveReducers:
+    def setup_method(self):
+        state_cache.clear()
+
+    @pytest.mark.parametrize("reducer_class", [TSNEReducer, UMAPReducer])
+    def test_reports_intermediate_layouts(self, reducer_class):
+        embeddings = np.random.rand(50, 10)
+        steps = []
+
+        def on_progress(step, coordinates):
+            assert coordinates.shape == (50, 2)
+            steps.append(step)
+
+        result = reducer_class(n_components=2).fit_transform_progressive(
+            embeddings, on_progress, every=50
+        )
+
+        assert len(steps) > 1
+        assert steps == sorted(steps)
+        assert result.reduced_embeddings.shape == (50, 2)
+
+    def test_umap_layout_does_not_depend_on_reporting_interval(self):
+        embeddings = np.random.rand(50, 10)
+
+        def fit(every):
+            return (
+                UMAPReducer(n_components=2)
+                .fit_transform_progressive(embeddings, lambda *_: None, every=every)
+                .reduced_embeddings
+            )
+
+        # One learning-rate and sampling schedule runs across all reports
+        assert np.array_equal(fit(7), fit(500))
+
+    def test_default_reports_final_layout(self):
+        embeddings = np.random.rand(30, 8)
+        updates = []
+
+        result = PCAReducer(n_components=2).fit_transform_progressive(
+            embeddings, lambda step, coordinates: updates.append(coordinates)
+        )
+
+        assert len(updates) == 1
+        assert np.allclose(updates[0], result.reduced_embeddings)
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,116 @@
+import pytest
+import numpy as np
+from unittest.mock import Mock
+from src.embeddingbuddy.data.sources.opensearch import OpenSearchClient
+from src.embeddingbuddy.data.sources.snapshots import SnapshotStore
+from src.embeddingbuddy.models.schemas import Document, ProcessedData
+
+
+def _data(n=3):
+    documents = [
+        Document(
+            id=f"doc{i}",
+            text=f"text {i}",
+            embedding=[float(i), 1.0],
+            category="news",
+            tags=["a", "b"],
+        )
+        for i in range(n)
+    ]
+    embeddings = np.array([doc.embedding for doc in documents])
+    return ProcessedData(documents=documents, embeddings=embeddings)
+
+
+STATE = {"uuids": ["u1"], "doc_count": 3, "max_seq_no": 10, "max_timestamp": 5.0}
+
+
+class TestSnapshotStore:
+    def test_save_and_load(self, tmp_path):
+        store = SnapshotStore(str(tmp_path))
+        store.save("key", _data(), dict(STATE, complete=True))
+
+        data, state = SnapshotStore(str(tmp_path)).load("key")
+
+        assert state["complete"] is True
+        assert [doc.id for doc in data.documents] == ["doc0", "doc1", "doc2"]
+        assert data.documents[1].tags == ["a", "b"]
+        assert data.documents[1].subcategory == "Unknown"
+        assert np.array_equal(data.embeddings, _data().embeddings)
+
+    def test_load_missing_or_corrupt(self, tmp_path):
+        store = SnapshotStore(str(tmp_path))
+        assert store.load("missing") is None
+
+        (tmp_path / "corrupt.json").write_text("{not json")
+        assert store.load("corrupt") is None
+
+    def test_key_depends_on_parameters(self):
+        key = SnapshotStore.make_key(index="a", query=None, sampling="first")
+
+        assert key == SnapshotStore.make_key(sampling="first", query=None, index="a")
+        assert key != SnapshotStore.make_key(index="a", query=None, sampling="random")
+
+    def test_clear(self, tmp_path):
+        store = SnapshotStore(str(tmp_path))
+        store.save("key", _data(), STATE)
+
+        assert store.clear() == 1
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.parametrize(
+        "change, current, top_up",
+        [
+            ("unchanged", STATE, False),
+            ("documents added", dict(STATE, doc_count=5, max_seq_no=12), True),
+            ("documents updated", dict(STATE, max_seq_no=12), False),
+            ("index recreated", dict(STATE, uuids=["u2"], doc_count=5), False),
+        ],
+    )
+    def test_staleness(self, change, current, top_up):
+        stored = dict(STATE, complete=True)
+
+        assert SnapshotStore.is_current(stored, current) == (change == "unchanged")
+        assert SnapshotStore.can_top_up(stored, current) == top_up
+
+    def test_incomplete_snapshots_are_not_topped_up(self):
+        stored = dict(STATE, complete=False)
+
+        assert not SnapshotStore.can_top_up(stored, dict(STATE, doc_count=5))
+
+
+class TestIndexState:
+    def test_index_state_from_stats(self):
+        client = OpenSearchClient()
+        client.client = Mock()
+        client.client.indices.stats.return_value = {
+            "_all": {"primaries": {"docs": {"count": 42}}},
+            "indices": {
+                "test-index": {
+                    "uuid": "u1",
+                    "shards": {
+                        "0": [
+                            {"routing": {"primary": True}, "seq_no": {"max_seq_no": 7}},
+                            {
+                                "routing": {"primary": False},
+                                "seq_no": {"max_seq_no": 7},
+                            },
+                        ],
+                        "1": [
+                            {"routing": {"primary": True}, "seq_no": {"max_seq_no": 3}}
+                        ],
+                    },
+                }
+            },
+        }
+        client.client.search.return_value = {
+            "aggregations": {"latest": {"value": 1700000000000.0}}
+        }
+
+        state = client.index_state("test-index", timestamp_field="created_at")
+
+        assert state == {
+            "uuids": ["u1"],
+            "doc_count": 42,
+            "max_seq_no": 10,
+            "max_timestamp": 1700000000000.0,
+        }